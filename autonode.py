@@ -42,7 +42,14 @@ __all__ = ['NODE_CLASS_MAPPINGS', 'NODE_DISPLAY_NAME_MAPPINGS']
 
 # Then, you can use the registered nodes in the UI!
 """
+import asyncio
+import functools
+import inspect
+import os
+import sys
 from inspect import signature
+from . import instrumentation
+from .node_manifest import validated_by_manifest
 
 def get_node_names_mappings(classes):
     node_names = {}
@@ -57,10 +64,55 @@ def get_node_names_mappings(classes):
 def node_wrapper(container):
     def wrap_class(cls):
         container.append(cls)
+        # opt-in (COMFYUI_LOGICUTILS_NODE_STATS=1); otherwise the class is left as is
+        if instrumentation.ENABLED:
+            instrumentation.instrument(cls)
         return cls
     return wrap_class
 
-def validate(container):
+def comfy_supports_async() -> bool:
+    """
+    True when the running ComfyUI awaits coroutine node functions (and runs independent
+    branches concurrently). COMFYUI_LOGICUTILS_ASYNC=1/0 forces it on/off.
+    """
+    setting = os.environ.get("COMFYUI_LOGICUTILS_ASYNC", "auto").strip().lower()
+    if setting in {"1", "true", "yes", "on"}:
+        return True
+    if setting in {"0", "false", "no", "off"}:
+        return False
+    # the executor is imported before custom nodes load, don't import it ourselves
+    execution = sys.modules.get("execution")
+    return inspect.iscoroutinefunction(getattr(execution, "_async_map_node_over_list", None))
+
+def run_in_thread(function):
+    """Coroutine version of a blocking function: awaiting it runs the function on a worker thread."""
+    @functools.wraps(function)
+    async def wrapper(*args, **kwargs):
+        return await asyncio.to_thread(function, *args, **kwargs)
+    return wrapper
+
+def async_io_node(cls):
+    """
+    For nodes blocked on network or disk: adds "<FUNCTION>_async", which runs the sync
+    function on a worker thread, and points FUNCTION at it when ComfyUI can await it.
+    Older ComfyUI builds keep calling the sync function.
+    """
+    name = cls.FUNCTION
+    function = cls.__dict__[name]
+    if isinstance(function, staticmethod):
+        async_function = staticmethod(run_in_thread(function.__func__))
+    else:
+        async_function = run_in_thread(function)
+    setattr(cls, name + "_async", async_function)
+    if comfy_supports_async():
+        cls.FUNCTION = name + "_async"
+    return cls
+
+def validate(container, force=False):
+    # nodes already validated by the manifest generation step (python node_manifest.py) are
+    # skipped while their module's source is unchanged; force or COMFYUI_LOGICUTILS_DEV=1 always checks
+    if not force and container and validated_by_manifest(container[0].__module__):
+        return
     # check if "custom_name", "FUNCTION", "INPUT_TYPES", "RETURN_TYPES", "CATEGORY" attributes are set
     for cls in container:
         for attr in ["FUNCTION", "INPUT_TYPES", "RETURN_TYPES", "CATEGORY"]:
@@ -1,11 +1,31 @@
-from .imgio.converter import PILHandlingHodes
+from .imgio.converter import PILHandlingHodes, IOConverter
+from .imgio import tensor_ops
 from .autonode import node_wrapper, get_node_names_mappings, validate, anytype, PILImage
-from .utils.tagger import get_tags, tagger_keys
-from PIL import Image, ImageFilter
+from .utils.tagger import get_tags, get_tags_batch, tagger_keys
+import torch
 
 auxilary_classes = []
 auxilary_node = node_wrapper(auxilary_classes)
 
+
+def tag_image_batch(image, threshold=0.4, replace=False, model_name=None):
+    """
+    Tag results for every image of an IMAGE batch (one batched inference), or of a single non-tensor input.
+    """
+    if isinstance(image, torch.Tensor):
+        return get_tags_batch(image, threshold=threshold, replace=replace, model_name=model_name)
+    images = PILHandlingHodes.handle_input(image)
+    if not isinstance(images, list):
+        images = [images]
+    return [get_tags(item, threshold=threshold, replace=replace, model_name=model_name) for item in images]
+
+
+def format_batch_output(results, formatter):
+    """
+    One line per image of the batch, joined into a single STRING.
+    """
+    return "\n".join(formatter(result) for result in results)
+
 @auxilary_node
 class GetRatingNode:
     FUNCTION = "get_rating_class"
@@ -14,9 +34,8 @@ class GetRatingNode:
     custom_name = "Get Rating Class"
     @staticmethod
     def get_rating_class(image, model_name):
-        image = PILHandlingHodes.handle_input(image)
-        result_dict = get_tags(image, model_name=model_name)
-        return (result_dict['rating'], )
+        results = tag_image_batch(image, model_name=model_name)
+        return (format_batch_output(results, lambda r: r['rating']), )
     @classmethod
     def INPUT_TYPES(cls):
         return {
@@ -50,29 +69,18 @@ class GetRatingFromTextNode:
             }
         }
 
-def pixelate(image, pixelation_factor=0.1):
-    # Downscale the image
-    small = image.resize(
-        (int(image.width * pixelation_factor), int(image.height * pixelation_factor)),
-        resample=Image.NEAREST
-    )
-    # Upscale back to original size
-    return small.resize(image.size, Image.NEAREST)
+
+rating_levels = ["general", "sensitive", "questionable", "explicit"]
 
 
-def pixelate_target_tiles(image, max_tiles=100):
-    aspect_ratio = image.width / image.height
-    # solve h * a * h = max_tiles
-    h = int((max_tiles / aspect_ratio) ** 0.5)
-    w = int(aspect_ratio * h)
-    h, w = max(4, h), max(4, w)
-    # Downscale the image
-    small = image.resize(
-        (w, h),
-        resample=Image.NEAREST,
-    )
-    # Upscale back to original size
-    return small.resize(image.size, Image.NEAREST)
+def should_censor(rating, rating_threshold):
+    """
+    Censor when the rating is strictly above the threshold level ("explicit" never censors).
+    """
+    rating, rating_threshold = rating.lower(), rating_threshold.lower()
+    if rating not in rating_levels or rating_threshold not in rating_levels:
+        return False
+    return rating_levels.index(rating) > rating_levels.index(rating_threshold)
 
 
 @auxilary_node
@@ -85,46 +93,13 @@ class CensorImageByRating:
     @staticmethod
     @PILHandlingHodes.output_wrapper
     def censor_image(image, rating_threshold, censor_method, model_name=None):
-        # Convert input to a PIL image
-        image = PILHandlingHodes.handle_input(image)
-        result_dict = get_tags(image, model_name=model_name)
-        rating = result_dict['rating']
-        # If rating is general, no censorship required
-        if rating.lower() == "general":
-            return (image,)
-        censor_image = False
-        if rating_threshold == "general":
-            # censor if not general
-            if rating.lower() != "general":
-                censor_image = True
-        elif rating_threshold == "sensitive":
-            # censor if not general or sensitive
-            if rating.lower() not in ["general", "sensitive"]:
-                censor_image = True
-        elif rating_threshold == "questionable":
-            # censor if not general, sensitive or questionable
-            if rating.lower() not in ["general", "sensitive", "questionable"]:
-                censor_image = True
-        elif rating_threshold == "explicit":
-            return (image,) # why are you using this?
-        if censor_image:
-            if censor_method.lower() == "white":
-                # Return a white image of the same size
-                censored_image = Image.new("RGB", image.size, (255, 255, 255))
-                return (censored_image,)
-
-            elif censor_method.lower() == "blur":
-                # Apply a strong blur (you can adjust radius as needed)
-                censored_image = image.filter(ImageFilter.GaussianBlur(radius=40))
-                return (censored_image,)
-            elif censor_method.lower() == "pixelate":
-                # first, blur
-                censored_image = image.filter(ImageFilter.GaussianBlur(radius=20))
-                censored_image = pixelate_target_tiles(censored_image, max_tiles=100)
-                return (censored_image,)
-
-        # If unknown method is provided, just return the original image
-        return (image,)
+        if not isinstance(image, torch.Tensor):
+            image = IOConverter.convert_to_rgb_tensor(image)
+        image = tensor_ops.flatten_alpha(tensor_ops.as_batch(image))
+        # one batched tagger call decides per image, then only flagged images are censored
+        results = tag_image_batch(image, model_name=model_name or tagger_keys[0])
+        selected = [should_censor(result['rating'], rating_threshold) for result in results]
+        return (tensor_ops.censor(image, selected, censor_method),)
 
     @classmethod
     def INPUT_TYPES(cls):
@@ -181,9 +156,8 @@ class GetTagsAboveThresholdNode:
     custom_name = "Get Tags Above Threshold"
     @staticmethod
     def get_tags_above_threshold(image, threshold, replace, model_name):
-        image = PILHandlingHodes.handle_input(image)
-        result_dict = get_tags(image, threshold=threshold, replace=replace, model_name=model_name)
-        return (", ".join(result_dict['tags']), )
+        results = tag_image_batch(image, threshold=threshold, replace=replace, model_name=model_name)
+        return (format_batch_output(results, lambda r: ", ".join(r['tags'])), )
     @classmethod
     def INPUT_TYPES(cls):
         return {
@@ -229,9 +203,8 @@ class GetCharactersAboveThresholdNode:
     custom_name = "Get Chars Above Threshold"
     @staticmethod
     def get_tags_above_threshold(image, threshold, replace, model_name):
-        image = PILHandlingHodes.handle_input(image)
-        result_dict = get_tags(image, threshold=threshold, replace=replace, model_name=model_name)
-        return (", ".join(result_dict['chars']), )
+        results = tag_image_batch(image, threshold=threshold, replace=replace, model_name=model_name)
+        return (format_batch_output(results, lambda r: ", ".join(r['chars'])), )
     @classmethod
     def INPUT_TYPES(cls):
         return {
@@ -277,13 +250,8 @@ class GetAllTagsAboveThresholdNode:
     custom_name = "Get All Tags Above Threshold"
     @staticmethod
     def get_tags(image, threshold, replace, model_name):
-        image = PILHandlingHodes.handle_input(image)
-        result = get_tags(image, threshold=threshold, replace=replace, model_name=model_name)
-        result_list = []
-        result_list.append(result['rating'])
-        result_list.extend(result['tags'])
-        result_list.extend(result['chars'])
-        return (", ".join(result_list), )
+        results = tag_image_batch(image, threshold=threshold, replace=replace, model_name=model_name)
+        return (format_batch_output(results, lambda r: ", ".join([r['rating']] + r['tags'] + r['chars'])), )
     @classmethod
     def INPUT_TYPES(cls):
         return {
@@ -304,12 +272,8 @@ class GetAllTagsExceptCharacterAboveThresholdNode:
     custom_name = "Get All Tags Above Threshold Except Characters"
     @staticmethod
     def get_tags(image, threshold, replace, model_name):
-        image = PILHandlingHodes.handle_input(image)
-        result = get_tags(image, threshold=threshold, replace=replace, model_name=model_name)
-        result_list = []
-        result_list.append(result['rating'])
-        result_list.extend(result['tags'])
-        return (", ".join(result_list), )
+        results = tag_image_batch(image, threshold=threshold, replace=replace, model_name=model_name)
+        return (format_batch_output(results, lambda r: ", ".join([r['rating']] + r['tags'])), )
     @classmethod
     def INPUT_TYPES(cls):
         return {
@@ -1,9 +1,15 @@
 import os, io
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
+from .imgio import codec as codecs
 from .imgio.converter import PILHandlingHodes
-from .autonode import node_wrapper, get_node_names_mappings, validate
+from .imgio.tensor_ops import as_batch, flatten_alpha, frames_to_batch
+from .autonode import node_wrapper, get_node_names_mappings, validate, async_io_node
+from .io_node import throw_if_parent_or_root_access
 
-from PIL import Image
 try:
     from Crypto.PublicKey import RSA
     from Crypto.Cipher import AES, PKCS1_OAEP
@@ -14,17 +20,257 @@ except ImportError:
 
 import torch
 from base64 import b64encode, b64decode
+import filelock
+try:
+    import folder_paths
+except ModuleNotFoundError:
+    folder_paths = None
 
 # List of classes to register
 secure_classes = []
 secure_node = node_wrapper(secure_classes)
 
+##############################################################################
+# Envelope format
+#
+# v1 (single image):
+#   "ENCWEBP" | key_len u16 | RSA-OAEP(session key) | nonce_len u8 | nonce | tag_len u8 | tag | AES-EAX(webp)
+# v2 (batch, one session key per envelope, one authenticated record per frame):
+#   "ENCWEBP" | 0xFF | version u8 | key_len u16 | RSA-OAEP(session key) | frame_count u32 |
+#   frame_count * (nonce[16] | tag[16] | length u32 | AES-EAX(webp))
+# v3: as v2 with a codec byte (see imgio.codec.CODECS) after the version, the records hold
+#   payloads of that codec instead of always WebP.
+#   Each record authenticates the header and its own index as associated data, so frames
+#   can't be reordered, dropped or moved between envelopes without failing verification.
+# The 0xFF marker can't start a v1 key length (that would be a >500000-bit RSA key).
+##############################################################################
+
+ENVELOPE_MAGIC = b"ENCWEBP"
+ENVELOPE_MARKER = 0xFF
+ENVELOPE_VERSION = 3
+NONCE_SIZE = 16
+TAG_SIZE = 16
+
+RSA_KEY_CACHE_SIZE = 8
+_rsa_keys = OrderedDict()
+_rsa_lock = threading.Lock()
+
+
+def load_rsa_key(pem):
+    """
+    RSA.import_key with a small LRU keyed by the PEM's SHA-256, parsing (and for
+    private keys, validating) a 4096-bit key costs more than the AES work of a frame.
+    """
+    if isinstance(pem, str):
+        pem = pem.encode("utf-8")
+    digest = hashlib.sha256(pem).digest()
+    with _rsa_lock:
+        key = _rsa_keys.get(digest)
+        if key is not None:
+            _rsa_keys.move_to_end(digest)
+            return key
+    key = RSA.import_key(pem)
+    with _rsa_lock:
+        _rsa_keys[digest] = key
+        while len(_rsa_keys) > RSA_KEY_CACHE_SIZE:
+            _rsa_keys.popitem(last=False)
+    return key
+
+
+def images_to_uint8(images: torch.Tensor) -> np.ndarray:
+    """(B, H, W, C) float IMAGE -> contiguous (B, H, W, 3) uint8, alpha composited over white."""
+    images = flatten_alpha(as_batch(images).detach().float())
+    return np.ascontiguousarray(images.clamp(0, 1).mul(255.0).round().to(torch.uint8).cpu().numpy())
+
+
+def parallel_map(function, items, max_workers=None):
+    """map() over a thread pool; PIL releases the GIL while encoding/decoding."""
+    items = list(items)
+    if len(items) <= 1:
+        return [function(item) for item in items]
+    workers = min(len(items), max_workers or os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(function, items))
+
+
+CHUNK_SIZE = 1 << 20
+
+
+def _record_aad(header: bytes, index: int) -> bytes:
+    return header + index.to_bytes(4, "big")
+
+
+def _envelope_header(enc_session_key: bytes, frame_count: int, codec: str) -> bytes:
+    return (
+        ENVELOPE_MAGIC
+        + bytes([ENVELOPE_MARKER, ENVELOPE_VERSION, codecs.CODECS[codec]])
+        + len(enc_session_key).to_bytes(2, "big")
+        + enc_session_key
+        + frame_count.to_bytes(4, "big")
+    )
+
+
+def write_envelope(f, payloads, frame_count: int, public_key, codec: str = "webp", chunk_size: int = CHUNK_SIZE):
+    """
+    Write a v3 envelope to a seekable binary file, encrypting each payload chunk by chunk.
+
+    payloads may be a generator, so only one encoded frame has to exist at a time. The record
+    tag is only known once a frame is fully encrypted; a placeholder is written and patched.
+    """
+    session_key = get_random_bytes(16)
+    header = _envelope_header(PKCS1_OAEP.new(public_key).encrypt(session_key), frame_count, codec)
+    f.write(header)
+    written = 0
+    for index, payload in enumerate(payloads):
+        if index >= frame_count:
+            raise ValueError(f"More than the announced {frame_count} frames.")
+        cipher_aes = AES.new(session_key, AES.MODE_EAX, nonce=get_random_bytes(NONCE_SIZE))
+        cipher_aes.update(_record_aad(header, index))
+        tag_offset = f.tell() + NONCE_SIZE
+        f.write(cipher_aes.nonce + bytes(TAG_SIZE) + len(payload).to_bytes(4, "big"))
+        view = memoryview(payload)
+        for offset in range(0, len(view), chunk_size):
+            f.write(cipher_aes.encrypt(view[offset : offset + chunk_size]))
+        end = f.tell()
+        f.seek(tag_offset)
+        f.write(cipher_aes.digest())
+        f.seek(end)
+        written += 1
+    if written != frame_count:
+        raise ValueError(f"Expected {frame_count} frames, got {written}.")
+
+
+def build_envelope(payloads, public_key, codec: str = "webp") -> bytes:
+    """Encrypt payloads (codec-encoded bytes per frame) under one fresh session key wrapped for public_key."""
+    buffer = io.BytesIO()
+    write_envelope(buffer, payloads, len(payloads), public_key, codec)
+    return buffer.getvalue()
+
+
+def _exact_reader(f):
+    def read(length):
+        data = f.read(length)
+        if len(data) != length:
+            raise ValueError("Invalid encrypted WebP data (truncated envelope).")
+        return data
+    return read
+
+
+def _read_header(read):
+    """(enc_session_key, frame_count, codec, header bytes) of a v2/v3 envelope, read from its start."""
+    magic = read(len(ENVELOPE_MAGIC) + 1)
+    if magic != ENVELOPE_MAGIC + bytes([ENVELOPE_MARKER]):
+        raise ValueError("Invalid encrypted WebP data (missing header).")
+    version = read(1)[0]
+    if version not in (2, 3):
+        raise ValueError(f"Unsupported encrypted envelope version {version}.")
+    codec_byte = b""
+    codec = "webp"
+    if version >= 3:
+        codec_byte = read(1)
+        if codec_byte[0] not in codecs.CODEC_NAMES:
+            raise ValueError(f"Unsupported payload codec {codec_byte[0]}.")
+        codec = codecs.CODEC_NAMES[codec_byte[0]]
+    key_length = read(2)
+    enc_session_key = read(int.from_bytes(key_length, "big"))
+    frame_count = read(4)
+    header = magic + bytes([version]) + codec_byte + key_length + enc_session_key + frame_count
+    return enc_session_key, int.from_bytes(frame_count, "big"), codec, header
+
+
+def _read_record_header(read):
+    nonce = read(NONCE_SIZE)
+    tag = read(TAG_SIZE)
+    return nonce, tag, int.from_bytes(read(4), "big")
+
+
+def parse_envelope(data: bytes):
+    """
+    Split an envelope (v1 to v3) into (enc_session_key, records, codec), records being
+    (nonce, tag, ciphertext, associated_data or None) tuples. Nothing is decrypted here.
+    """
+    if data[:7] != ENVELOPE_MAGIC or len(data) < 8:
+        raise ValueError("Invalid encrypted WebP data (missing header).")
+    if data[7] != ENVELOPE_MARKER:
+        return _parse_v1(data)
+    read = _exact_reader(io.BytesIO(data))
+    enc_session_key, frame_count, codec, header = _read_header(read)
+    records = []
+    for index in range(frame_count):
+        nonce, tag, length = _read_record_header(read)
+        records.append((nonce, tag, read(length), _record_aad(header, index)))
+    return enc_session_key, records, codec
+
+
+def iter_envelope_file(f, private_key, chunk_size: int = CHUNK_SIZE):
+    """
+    Decrypt a v2/v3 envelope from a binary file chunk by chunk, yielding each decoded
+    uint8 frame once its record has been authenticated.
+    """
+    read = _exact_reader(f)
+    enc_session_key, frame_count, codec, header = _read_header(read)
+    session_key = PKCS1_OAEP.new(private_key).decrypt(enc_session_key)
+    for index in range(frame_count):
+        nonce, tag, length = _read_record_header(read)
+        cipher_aes = AES.new(session_key, AES.MODE_EAX, nonce=nonce)
+        cipher_aes.update(_record_aad(header, index))
+        payload = bytearray(length)
+        view = memoryview(payload)
+        for offset in range(0, length, chunk_size):
+            chunk = read(min(chunk_size, length - offset))
+            cipher_aes.decrypt(chunk, output=view[offset : offset + len(chunk)])
+        try:
+            cipher_aes.verify(tag)
+        except ValueError:
+            raise ValueError("Decryption failed: data tampered or wrong key.")
+        yield codecs.decode(payload, codec)
+
+
+def _take(data: bytes, idx: int, length: int):
+    if idx + length > len(data):
+        raise ValueError("Invalid encrypted WebP data (truncated envelope).")
+    return data[idx : idx + length], idx + length
+
+
+def _take_int(data: bytes, idx: int, length: int):
+    value, idx = _take(data, idx, length)
+    return int.from_bytes(value, "big"), idx
+
+
+def _parse_v1(data: bytes):
+    enc_key_len, idx = _take_int(data, 7, 2)
+    enc_session_key, idx = _take(data, idx, enc_key_len)
+    nonce_len, idx = _take_int(data, idx, 1)
+    nonce, idx = _take(data, idx, nonce_len)
+    tag_len, idx = _take_int(data, idx, 1)
+    tag, idx = _take(data, idx, tag_len)
+    return enc_session_key, [(nonce, tag, data[idx:], None)], "webp"
+
+
+def decrypt_record(session_key: bytes, record) -> bytes:
+    nonce, tag, ciphertext, associated_data = record
+    cipher_aes = AES.new(session_key, AES.MODE_EAX, nonce=nonce)
+    if associated_data is not None:
+        cipher_aes.update(associated_data)
+    plaintext = cipher_aes.decrypt(ciphertext)
+    try:
+        cipher_aes.verify(tag)
+    except ValueError:
+        raise ValueError("Decryption failed: data tampered or wrong key.")
+    return plaintext
+
+
 @secure_node
 class SecureBase64Encrypt:
     """
     Encrypt an image as a base64 string using RSA public key + AES.
-    - images: Only the first image is used.
+    - images: Only the first image is used, unless encrypt_batch is enabled.
     - public_key_pem: RSA public key (PEM string).
+    - encrypt_batch: Encrypt every image of the batch into one envelope
+      (one RSA-wrapped session key, one authenticated record per frame).
+    - codec: Lossless payload format. webp is smallest and slowest, png trades size for
+      speed with compress_level (0-9), zstd stores raw pixels and is the fastest
+      (compress_level is the zstd level there, needs 'zstandard').
     Outputs: 'encrypted_base64' string that SecureWebPDecrypt can decrypt.
     """
     @classmethod
@@ -33,6 +279,11 @@ class SecureBase64Encrypt:
             "required": {
                 "images": ("IMAGE",),
                 "public_key_pem": ("STRING", {"multiline": True, "default": ""}),
+            },
+            "optional": {
+                "encrypt_batch": ("BOOLEAN", {"default": False}),
+                "codec": (list(codecs.CODECS), {"default": "webp"}),
+                "compress_level": ("INT", {"default": 4, "min": 0, "max": 22}),
             }
         }
 
@@ -44,50 +295,39 @@ class SecureBase64Encrypt:
     OUTPUT_NODE = True
     RESULT_NODE = True
 
-    def encrypted_base64(self, images, public_key_pem):
+    def encrypted_base64(self, images, public_key_pem, encrypt_batch=False, codec="webp", compress_level=4):
         # Check input
         if images is None or not len(images) or images[0] is None:
             raise ValueError("No image provided.")
-        # Load RSA public key
-        rsa_key = RSA.import_key(public_key_pem)
-        cipher_rsa = PKCS1_OAEP.new(rsa_key)
-
-        # Take first image (if there's a batch dimension, pick index [0])
-        img_tensor = images[0].clone().detach()
-        if img_tensor.ndim == 4:
-            img_tensor = img_tensor[0]
-
-        # Convert [0..1] float => [0..255] uint8
-        img_array = (255.0 * img_tensor.clamp(0, 1).cpu().numpy()).astype("uint8")
-
-        # If shape is (C,H,W), transpose to (H,W,C). If shape is (H,W,C), leave as is.
-        if img_array.ndim == 3:
-            # If the first dimension is small (1,3,4), interpret as channels-first
-            if img_array.shape[0] in [1,3,4] and img_array.shape[-1] not in [1,3,4]:
-                img_array = np.transpose(img_array, (1,2,0))
-
-        # The critical fix: ensure array is contiguous
-        img_array = np.ascontiguousarray(img_array)
-
-        # Create a PIL Image from array
-        pil_img = Image.fromarray(img_array, mode="RGB")
+        # Load RSA public key (cached by PEM digest)
+        rsa_key = load_rsa_key(public_key_pem)
+        images = as_batch(images)
+        if not encrypt_batch:
+            if codec == "webp":
+                return (b64encode(self._encrypt_single(images[0], rsa_key)).decode("utf-8"),)
+            images = images[:1]
+
+        frames = parallel_map(
+            lambda array: codecs.encode(array, codec, compress_level), images_to_uint8(images)
+        )
+        return (b64encode(build_envelope(frames, rsa_key, codec)).decode("utf-8"),)
 
-        # Save in-memory as lossless WebP
-        buffer = io.BytesIO()
-        pil_img.save(buffer, format="WEBP", lossless=True)
-        image_bytes = buffer.getvalue()
+    @staticmethod
+    def _encrypt_single(image, rsa_key) -> bytes:
+        # v1 envelope, kept for consumers that only understand the original format
+        image_bytes = codecs.encode(images_to_uint8(image)[0], "webp")
 
         # Generate a random AES session key, encrypt it with RSA
         session_key = get_random_bytes(16)
-        enc_session_key = cipher_rsa.encrypt(session_key)
+        enc_session_key = PKCS1_OAEP.new(rsa_key).encrypt(session_key)
 
         # Encrypt the image bytes with AES-EAX
         cipher_aes = AES.new(session_key, AES.MODE_EAX)
         ciphertext, tag = cipher_aes.encrypt_and_digest(image_bytes)
 
         # Build custom envelope
-        encrypted_blob = (
-            b"ENCWEBP" +
+        return (
+            ENVELOPE_MAGIC +
             len(enc_session_key).to_bytes(2, "big") +
             enc_session_key +
             bytes([len(cipher_aes.nonce)]) + cipher_aes.nonce +
@@ -95,17 +335,13 @@ class SecureBase64Encrypt:
             ciphertext
         )
 
-        # Base64-encode the blob
-        encrypted_base64 = b64encode(encrypted_blob).decode("utf-8")
-
-        return (encrypted_base64,)
-
 
 @secure_node
 class SecureWebPDecrypt:
     """
     Decrypt an encrypted WebP image (or list of them) produced by SecureBase64Encrypt.
-    Returns a single IMAGE (first one).
+    The payload codec is read from each envelope. Every frame of every envelope is returned as one IMAGE batch; frames whose size
+    differs from the first one are resized to it.
     """
     @classmethod
     def INPUT_TYPES(cls):
@@ -130,51 +366,146 @@ class SecureWebPDecrypt:
             encrypted_base64 = [encrypted_base64]
         elif not isinstance(encrypted_base64, (list, tuple)):
             raise ValueError("encrypted_base64 must be string or list/tuple.")
+        if not encrypted_base64:
+            raise ValueError("No encrypted data provided.")
 
-        # Import RSA private key
-        if isinstance(private_key_pem, str):
-            private_key_pem = private_key_pem.encode("utf-8")
-        rsa_key = RSA.import_key(private_key_pem)
-        cipher_rsa = PKCS1_OAEP.new(rsa_key)
+        # Import RSA private key (cached by PEM digest)
+        cipher_rsa = PKCS1_OAEP.new(load_rsa_key(private_key_pem))
 
+        # RSA-decrypt each distinct session key once, a batch envelope shares one
+        session_keys = {}
+        jobs = []
         for b64_item in encrypted_base64:
-            data = b64decode(b64_item)
-            if data[:7] != b"ENCWEBP":
-                raise ValueError("Invalid encrypted WebP data (missing header).")
-
-            idx = 7
-            enc_key_len = int.from_bytes(data[idx : idx + 2], "big")
-            idx += 2
-
-            enc_session_key = data[idx : idx + enc_key_len]
-            idx += enc_key_len
-
-            nonce_len = data[idx]
-            idx += 1
-            nonce = data[idx : idx + nonce_len]
-            idx += nonce_len
-
-            tag_len = data[idx]
-            idx += 1
-            tag = data[idx : idx + tag_len]
-            idx += tag_len
-
-            ciphertext = data[idx:]
-
-            # RSA-decrypt the AES session key
-            session_key = cipher_rsa.decrypt(enc_session_key)
-
-            # AES-EAX decrypt
-            cipher_aes = AES.new(session_key, AES.MODE_EAX, nonce=nonce)
-            plaintext = cipher_aes.decrypt(ciphertext)
-            try:
-                cipher_aes.verify(tag)
-            except ValueError:
-                raise ValueError("Decryption failed: data tampered or wrong key.")
-
-            # plaintext -> PIL
-            pil_img = Image.open(io.BytesIO(plaintext)).convert("RGB")
-            return (pil_img, )
+            enc_session_key, records, codec = parse_envelope(b64decode(b64_item))
+            if enc_session_key not in session_keys:
+                session_keys[enc_session_key] = cipher_rsa.decrypt(enc_session_key)
+            session_key = session_keys[enc_session_key]
+            jobs.extend((session_key, record, codec) for record in records)
+
+        frames = parallel_map(
+            lambda job: codecs.decode(decrypt_record(job[0], job[1]), job[2]), jobs
+        )
+        return (frames_to_batch(frames),)
+
+
+@secure_node
+@async_io_node
+class SecureEncryptedSaveNode:
+    """
+    Encrypt an IMAGE batch straight into a file under the output directory.
+    Same envelope as Secure Base64 Encrypt with encrypt_batch, but without base64:
+    frames are encoded one at a time and encrypted in chunks while writing, so memory
+    stays at one encoded frame plus one chunk.
+    Outputs the saved path, which Secure Encrypted Load accepts.
+    """
+    def __init__(self):
+        self.output_dir = folder_paths.get_output_directory()
+        self.type = "output"
+        self.prefix_append = ""
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "images": ("IMAGE",),
+                "public_key_pem": ("STRING", {"multiline": True, "default": ""}),
+                "filename_prefix": ("STRING", {"default": "ComfyUI"}),
+                "subfolder_dir": ("STRING", {"default": ""}),
+            },
+            "optional": {
+                "codec": (list(codecs.CODECS), {"default": "webp"}),
+                "compress_level": ("INT", {"default": 4, "min": 0, "max": 22}),
+            }
+        }
+
+    RETURN_TYPES = ("STRING",)
+    RETURN_NAMES = ("file_path",)
+    FUNCTION = "save_encrypted"
+    CATEGORY = "image"
+    custom_name = "Secure Encrypted Save"
+    OUTPUT_NODE = True
+    RESULT_NODE = True
+
+    def save_encrypted(self, images, public_key_pem, filename_prefix="ComfyUI", subfolder_dir="", codec="webp", compress_level=4):
+        if images is None or not len(images):
+            raise ValueError("No image provided.")
+        rsa_key = load_rsa_key(public_key_pem)
+        images = as_batch(images)
+
+        throw_if_parent_or_root_access(filename_prefix)
+        throw_if_parent_or_root_access(subfolder_dir)
+        filename_prefix += self.prefix_append
+        output_dir = os.path.join(self.output_dir, subfolder_dir)
+        os.makedirs(output_dir, exist_ok=True)
+        filelock_path = os.path.join(output_dir, filename_prefix + ".lock")
+        with filelock.FileLock(filelock_path, timeout=10):
+            full_output_folder, filename, counter, subfolder, filename_prefix = (
+                folder_paths.get_save_image_path(
+                    filename_prefix, output_dir, images.shape[2], images.shape[1]
+                )
+            )
+            file = f"{filename}_{counter:05}_.enc"
+            final_path = os.path.join(full_output_folder, file)
+            # reserve the name while holding the lock, then write outside of it
+            open(final_path, "wb").close()
+
+        payloads = (
+            codecs.encode(images_to_uint8(image)[0], codec, compress_level) for image in images
+        )
+        try:
+            with open(final_path, "r+b") as f:
+                write_envelope(f, payloads, len(images), rsa_key, codec)
+        except Exception:
+            if os.path.exists(final_path):
+                os.remove(final_path)
+            raise
+        results = [{"filename": file, "subfolder": subfolder, "type": self.type}]
+        return {"ui": {"texts": results}, "result": (final_path,)}
+
+
+@secure_node
+class SecureEncryptedLoadNode:
+    """
+    Decrypt a file written by Secure Encrypted Save into an IMAGE batch.
+    file_path is the saved path, or a path relative to the output directory.
+    """
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "file_path": ("STRING", {"default": ""}),
+                "private_key_pem": ("STRING", {"multiline": True, "default": ""}),
+            }
+        }
+
+    RETURN_TYPES = ("IMAGE",)
+    RETURN_NAMES = ("Decrypted_Image",)
+    FUNCTION = "load_encrypted"
+    CATEGORY = "image"
+    custom_name = "Secure Encrypted Load"
+
+    @staticmethod
+    def resolve_path(file_path):
+        output_dir = os.path.realpath(folder_paths.get_output_directory())
+        if not os.path.isabs(file_path):
+            throw_if_parent_or_root_access(file_path)
+            file_path = os.path.join(output_dir, file_path)
+        path = os.path.realpath(file_path)
+        try:
+            inside = os.path.commonpath([output_dir, path]) == output_dir
+        except ValueError:  # different drives on Windows
+            inside = False
+        if not inside:
+            raise RuntimeError("Encrypted files can only be loaded from the output directory")
+        return path
+
+    def load_encrypted(self, file_path, private_key_pem):
+        rsa_key = load_rsa_key(private_key_pem)
+        with open(self.resolve_path(file_path), "rb") as f:
+            frames = list(iter_envelope_file(f, rsa_key))
+        if not frames:
+            raise ValueError("Encrypted file holds no frames.")
+        return (frames_to_batch(frames),)
 
 
 # Register node classes with ComfyUI
@@ -1,7 +1,9 @@
-from .autonode import node_wrapper, get_node_names_mappings, validate, anytype
+from .autonode import node_wrapper, get_node_names_mappings, validate, anytype, async_io_node
 from .imgio.converter import PILHandlingHodes
+from .imgio.tensor_ops import frames_to_batch
 from .webuiapi.out_api import get_image_from_prompt, get_image_from_prompt_fallback
 
+import numpy as np
 from PIL import Image
 
 
@@ -9,8 +11,13 @@ external_classes = []
 external_nodes = node_wrapper(external_classes)
 
 
-@external_nodes
+def images_to_batch(images):
+    """Every image of a WebUI response as one IMAGE batch."""
+    return frames_to_batch([np.asarray(image.convert("RGB")) for image in images])
+
 
+@external_nodes
+@async_io_node
 class SDWebuiAPINode:
     FUNCTION = "get_image_from_prompt"
     RETURN_TYPES = ("IMAGE",)
@@ -32,14 +39,18 @@ class SDWebuiAPINode:
                 "hr_upscale": ("STRING", {"default": "Latent"}),
                 "enable_hr": ("BOOLEAN", {"default": False}),
                 "cfg_scale": ("INT", {"default": 7}),
+                "batch_size": ("INT", {"default": 1, "min": 1, "max": 64}),
+                "n_iter": ("INT", {"default": 1, "min": 1, "max": 64}),
+                "use_cache": ("BOOLEAN", {"default": False}),
             }
         }
     CATEGORY = "WebUI API"
     custom_name = "Get Image From Prompt"
     @PILHandlingHodes.output_wrapper
-    def get_image_from_prompt(self, prompt, api_endpoint, auth="", seed=-1, negative_prompt="", steps=28, width=1024, height=1024, hr_scale=1.5, hr_upscale="Latent", enable_hr=False, cfg_scale=7):
-        return (get_image_from_prompt(prompt, api_endpoint, auth, seed, negative_prompt, steps, width, height, hr_scale, hr_upscale, enable_hr, cfg_scale)[0],)
+    def get_image_from_prompt(self, prompt, api_endpoint, auth="", seed=-1, negative_prompt="", steps=28, width=1024, height=1024, hr_scale=1.5, hr_upscale="Latent", enable_hr=False, cfg_scale=7, batch_size=1, n_iter=1, use_cache=False):
+        return (images_to_batch(get_image_from_prompt(prompt, api_endpoint, auth, seed, negative_prompt, steps, width, height, hr_scale, hr_upscale, enable_hr, cfg_scale, batch_size, n_iter, use_cache)),)
 @external_nodes
+@async_io_node
 class SDWebuiAPIFallbackNode:
     FUNCTION = "get_image_from_prompt_fallback"
     RETURN_TYPES = ("IMAGE",)
@@ -61,13 +72,16 @@ class SDWebuiAPIFallbackNode:
                 "hr_upscale": ("STRING", {"default": "Latent"}),
                 "enable_hr": ("BOOLEAN", {"default": False}),
                 "cfg_scale": ("INT", {"default": 7}),
+                "batch_size": ("INT", {"default": 1, "min": 1, "max": 64}),
+                "n_iter": ("INT", {"default": 1, "min": 1, "max": 64}),
+                "use_cache": ("BOOLEAN", {"default": False}),
             }
         }
     CATEGORY = "WebUI API"
     custom_name = "Get Image From Prompt (Fallback)"
     @PILHandlingHodes.output_wrapper
-    def get_image_from_prompt_fallback(self, prompt, api_endpoint, auth="", seed=-1, negative_prompt="", steps=28, width=1024, height=1024, hr_scale=1.5, hr_upscale="Latent", enable_hr=False, cfg_scale=7):
-        return (get_image_from_prompt_fallback(prompt, api_endpoint, auth, seed, negative_prompt, steps, width, height, hr_scale, hr_upscale, enable_hr, cfg_scale)[0],)
+    def get_image_from_prompt_fallback(self, prompt, api_endpoint, auth="", seed=-1, negative_prompt="", steps=28, width=1024, height=1024, hr_scale=1.5, hr_upscale="Latent", enable_hr=False, cfg_scale=7, batch_size=1, n_iter=1, use_cache=False):
+        return (images_to_batch(get_image_from_prompt_fallback(prompt, api_endpoint, auth, seed, negative_prompt, steps, width, height, hr_scale, hr_upscale, enable_hr, cfg_scale, batch_size, n_iter, use_cache)),)
 
 CLASS_MAPPINGS, CLASS_NAMES = get_node_names_mappings(external_classes)
 validate(external_classes)
\ No newline at end of file
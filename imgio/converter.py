@@ -1,4 +1,4 @@
-from typing import Union, List
+from typing import Union, List, NamedTuple
 from PIL import Image
 import numpy as np
 import base64
@@ -140,6 +140,15 @@ def fetch_image_securely(image_url: str,
                 f"Unsupported Content-Type or not an image: {content_type}"
             )
 
+class ImageInfo(NamedTuple):
+    """
+    Size of a single image, as reported by IOConverter.inspect_shape.
+    """
+    width: int
+    height: int
+    channels: int
+
+
 class IOConverter:
     """
     Classify the input data type.
@@ -198,6 +207,51 @@ class IOConverter:
         else:
             raise Exception(f"Invalid input type, {type(input_data)}")
     @staticmethod
+    def inspect_shape(input_data, mask=False) -> List[ImageInfo]:
+        """
+        Return per-item (width, height, channels) without decoding any pixels.
+
+        Tensors and arrays are answered from their shape: (B,H,W,C) or (H,W,C) images, or with
+        mask=True (B,H,W) / (H,W) masks. A 3-dim shape is never guessed at, since a mask
+        batch of width 1, 3 or 4 looks like (H,W,C); without mask=True its last dim must be
+        1, 3 or 4, else ValueError. Files / base64 / URLs are read from the image header
+        only (PIL opens lazily), but a URL is still downloaded.
+        Lists and tuples return the infos of all their items in order.
+        """
+        if isinstance(input_data, (list, tuple)):
+            infos = []
+            for item in input_data:
+                infos.extend(IOConverter.inspect_shape(item, mask=mask))
+            return infos
+        input_type = IOConverter.classify(input_data)
+        if input_type in (IOConverter.InputType.NUMPY, IOConverter.InputType.TORCH):
+            shape = tuple(int(x) for x in input_data.shape)
+            if len(shape) == 2:
+                return [ImageInfo(shape[1], shape[0], 1)]
+            if len(shape) == 3 and mask:
+                return [ImageInfo(shape[2], shape[1], 1)] * shape[0]
+            if len(shape) == 3 and shape[-1] in (1, 3, 4):
+                return [ImageInfo(shape[1], shape[0], shape[2])]
+            if len(shape) == 4 and not mask:
+                return [ImageInfo(shape[2], shape[1], shape[3])] * shape[0]
+            raise ValueError(f"Invalid {'mask' if mask else 'image'} shape, {shape}")
+        if input_type == IOConverter.InputType.PIL:
+            return [ImageInfo(input_data.width, input_data.height, len(input_data.getbands()))]
+        if input_type == IOConverter.InputType.STRING:
+            with Image.open(input_data) as image:
+                return [ImageInfo(image.width, image.height, len(image.getbands()))]
+        if input_type == IOConverter.InputType.URL:
+            image = fetch_image_securely(input_data)
+        else:
+            if input_data.startswith("data:image/"):
+                input_data = input_data.split(",", 1)[-1]
+            decoded_data = IOConverter.read_base64(input_data)
+            if input_type == IOConverter.InputType.GZIP_BASE64:
+                decoded_data = gzip.decompress(decoded_data)
+            image = Image.open(BytesIO(decoded_data))
+        return [ImageInfo(image.width, image.height, len(image.getbands()))]
+
+    @staticmethod
     def match_dtype(array_or_tensor, is_tensor=False):
         # if all value is between 0 and 1, multiply by 255 and convert to uint8
         # however already uint8, skip
@@ -376,6 +430,10 @@ class PILHandlingHodes:
         pil_image = IOConverter.convert_to_pil(tensor_or_image)
         return pil_image
 
+    @staticmethod
+    def inspect_shape(anything, mask=False) -> List[ImageInfo]:
+        return IOConverter.inspect_shape(anything, mask=mask)
+
     @staticmethod
     def handle_output_as_pil(pil_image: Image.Image) -> Image.Image:
         return pil_image
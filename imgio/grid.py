@@ -0,0 +1,180 @@
+import math
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+from PIL import Image
+
+
+# canvas rows per streamed strip; bounds the strip buffer to STRIP_ROWS * canvas_width * 4 bytes
+STRIP_ROWS = 256
+
+
+def image_to_rgba_uint8(image) -> np.ndarray:
+    """
+    Convert a single image (H,W,C float tensor / ndarray, or PIL image) to an (H,W,4) uint8 array.
+    Only this one image is materialized, never the whole batch.
+    """
+    if isinstance(image, Image.Image):
+        return np.asarray(image.convert("RGBA"))
+    if isinstance(image, torch.Tensor):
+        image = image.detach()
+        if image.dtype != torch.uint8:
+            image = (image.clamp(0, 1) * 255.0).round().to(torch.uint8)
+        array = image.cpu().numpy()
+    else:
+        array = np.asarray(image)
+        if array.dtype != np.uint8:
+            array = (np.clip(array, 0, 1) * 255.0).round().astype(np.uint8)
+    if array.ndim == 2:
+        array = array[:, :, None]
+    channels = array.shape[-1]
+    if channels == 4:
+        return array
+    if channels == 1:
+        array = np.repeat(array, 3, axis=-1)
+    alpha = np.full(array.shape[:2] + (1,), 255, dtype=np.uint8)
+    return np.concatenate([array[:, :, :3], alpha], axis=-1)
+
+
+def image_size(image) -> Tuple[int, int]:
+    """(width, height) of a single image without converting it."""
+    if isinstance(image, Image.Image):
+        return image.size
+    return int(image.shape[1]), int(image.shape[0])
+
+
+def grid_layout(sizes: Sequence[Tuple[int, int]], direction="horizontal", match_method="resize"):
+    """
+    Compute the grid placement used by ConcatGridNode from image sizes alone.
+
+    Returns (canvas_width, canvas_height, rows) where every row is
+    (row_height, [(index, x_offset, cell_width, cell_height, resize), ...]).
+    A cell with resize=False is pasted at its original size (transparent padding).
+    """
+    if len(sizes) == 0:
+        raise RuntimeError("No images provided to Concat Grid")
+    resize = match_method == "resize"
+    if direction == "horizontal":
+        max_height = max(h for _, h in sizes)
+        cells = []
+        x_offset = 0
+        for index, (w, h) in enumerate(sizes):
+            if resize:
+                if h == 0:
+                    raise RuntimeError("Encountered an image of zero height.")
+                cell_w = int(w * (max_height / float(h)))
+                cells.append((index, x_offset, cell_w, max_height, True))
+            else:
+                cell_w = w
+                cells.append((index, x_offset, w, h, False))
+            x_offset += cell_w
+        return x_offset, max_height, [(max_height, cells)]
+    elif direction == "vertical":
+        max_width = max(w for w, _ in sizes)
+        rows = []
+        total_height = 0
+        for index, (w, h) in enumerate(sizes):
+            if resize:
+                if w == 0:
+                    raise RuntimeError("Encountered an image of zero width.")
+                cell_h = int(h * (max_width / float(w)))
+                rows.append((cell_h, [(index, 0, max_width, cell_h, True)]))
+            else:
+                cell_h = h
+                rows.append((h, [(index, 0, w, h, False)]))
+            total_height += cell_h
+        return max_width, total_height, rows
+    # square-like
+    count = len(sizes)
+    num_cols = int(math.ceil(math.sqrt(count)))
+    num_rows = int(math.ceil(count / num_cols))
+    max_width = max(w for w, _ in sizes)
+    max_height = max(h for _, h in sizes)
+    rows = []
+    for row in range(num_rows):
+        cells = []
+        for col in range(num_cols):
+            index = row * num_cols + col
+            if index >= count:
+                break
+            w, h = sizes[index]
+            if resize:
+                cells.append((index, col * max_width, max_width, max_height, True))
+            else:
+                cells.append((index, col * max_width, w, h, False))
+        rows.append((max_height, cells))
+    return num_cols * max_width, num_rows * max_height, rows
+
+
+def _source_rows(image, top: int, bottom: int) -> np.ndarray:
+    """Rows [top, bottom) of a single image as (rows, W, 4) uint8; the other rows are never converted."""
+    if isinstance(image, Image.Image):
+        return image_to_rgba_uint8(image.crop((0, top, image.width, bottom)))
+    return image_to_rgba_uint8(image[top:bottom])
+
+
+def _resized_rows(image, cell_w: int, cell_h: int, top: int, bottom: int) -> np.ndarray:
+    """
+    Rows [top, bottom) of image resized to (cell_w, cell_h) with LANCZOS.
+
+    Only the source rows under the filter window are converted and resampled (PIL's resize box),
+    so a band costs a band, and the pixels match resizing the whole image.
+    """
+    src_w, src_h = image_size(image)
+    src_top = top * src_h / cell_h
+    src_bottom = bottom * src_h / cell_h
+    # LANCZOS reads 3 pixels on each side, scaled up when downsampling
+    margin = 3 * max(src_h / cell_h, 1.0) + 1
+    crop_top = max(int(math.floor(src_top - margin)), 0)
+    crop_bottom = min(int(math.ceil(src_bottom + margin)), src_h)
+    rows = Image.fromarray(_source_rows(image, crop_top, crop_bottom), mode="RGBA")
+    box = (0, src_top - crop_top, src_w, src_bottom - crop_top)
+    return np.asarray(rows.resize((cell_w, bottom - top), Image.Resampling.LANCZOS, box=box))
+
+
+def iter_grid_strips(fetch: Callable[[int], object], layout, strip_rows: Optional[int] = STRIP_ROWS):
+    """
+    Yield (rows, canvas_width, 4) uint8 strips for a layout from grid_layout, top to bottom.
+
+    Every grid row is split into bands of at most strip_rows canvas rows (None: one strip per
+    grid row), so a single wide row (horizontal mode) doesn't turn into one canvas-sized strip.
+    fetch(index) must return the image at that index; it is called once per cell and band,
+    so at most one source image and one strip are held at any time.
+    """
+    canvas_width, _, rows = layout
+    for row_height, cells in rows:
+        band = row_height if strip_rows is None else max(int(strip_rows), 1)
+        for top in range(0, row_height, band):
+            bottom = min(top + band, row_height)
+            strip = np.zeros((bottom - top, canvas_width, 4), dtype=np.uint8)
+            for index, x_offset, cell_w, cell_h, resize in cells:
+                cell_bottom = min(bottom, cell_h)
+                if cell_bottom <= top:
+                    continue  # padded cell shorter than the row, nothing in this band
+                image = fetch(index)
+                if resize and image_size(image) != (cell_w, cell_h):
+                    cell = _resized_rows(image, cell_w, cell_h, top, cell_bottom)
+                else:
+                    cell = _source_rows(image, top, cell_bottom)
+                w = min(cell.shape[1], canvas_width - x_offset)
+                strip[: cell.shape[0], x_offset : x_offset + w] = cell[:, :w]
+                del cell, image
+            yield strip
+
+
+def grid_sources(images) -> List:
+    """Normalize a batch tensor / list / single image into an indexable sequence of single images."""
+    if isinstance(images, torch.Tensor):
+        if images.ndim == 3:
+            return [images]
+        return images  # indexing a batch tensor yields views, nothing is copied
+    if isinstance(images, (list, tuple)):
+        sources = []
+        for item in images:
+            if isinstance(item, torch.Tensor) and item.ndim == 4:
+                sources.extend(item)
+            else:
+                sources.append(item)
+        return sources
+    return [images]
@@ -0,0 +1,347 @@
+"""
+Tensor-native image operations on ComfyUI IMAGE batches (B, H, W, C float in [0, 1]).
+
+These avoid the PIL round trip (and its per-image uint8/float conversions) for
+nodes whose inputs are already tensors.
+"""
+import math
+from typing import Tuple
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+
+def as_batch(image: torch.Tensor) -> torch.Tensor:
+    """Return a (B, H, W, C) view of a single image or batch."""
+    if image.ndim == 3:
+        return image.unsqueeze(0)
+    if image.ndim != 4:
+        raise ValueError(f"Expected a (B, H, W, C) image tensor, got shape {tuple(image.shape)}")
+    return image
+
+
+def flatten_alpha(images: torch.Tensor, background: float = 1.0) -> torch.Tensor:
+    """
+    Composite RGBA over a flat background and return RGB, like handle_rgba_composite.
+    RGB input is returned as is, greyscale is expanded to 3 channels (as a view).
+    """
+    channels = images.shape[-1]
+    if channels == 3:
+        return images
+    if channels == 1:
+        return images.expand(*images.shape[:-1], 3)
+    if channels == 4:
+        alpha = images[..., 3:]
+        return images[..., :3] * alpha + background * (1.0 - alpha)
+    raise ValueError(f"Unsupported channel count {channels}")
+
+
+def resize(images: torch.Tensor, width: int, height: int, mode: str = "bicubic") -> torch.Tensor:
+    """Resize a (B, H, W, C) batch in one interpolate call. No-op when the size already matches."""
+    if images.shape[1] == height and images.shape[2] == width:
+        return images
+    if width <= 0 or height <= 0:
+        raise RuntimeError(f"Invalid target size {width}x{height}")
+    antialias = mode in ("bilinear", "bicubic")
+    kwargs = {"antialias": antialias, "align_corners": False} if antialias else {}
+    resized = F.interpolate(
+        images.movedim(-1, 1), size=(height, width), mode=mode, **kwargs
+    ).movedim(1, -1)
+    return resized.clamp_(0.0, 1.0) if mode == "bicubic" else resized
+
+
+def pad(images: torch.Tensor, width: int, height: int, value: float = 1.0) -> torch.Tensor:
+    """Pad a (B, H, W, C) batch on the right/bottom up to (width, height)."""
+    pad_w = width - images.shape[2]
+    pad_h = height - images.shape[1]
+    if pad_w < 0 or pad_h < 0:
+        raise RuntimeError("Pad target is smaller than the image")
+    if pad_w == 0 and pad_h == 0:
+        return images
+    # F.pad pads the last dims first: (C), (W), (H)
+    return F.pad(images, (0, 0, 0, pad_w, 0, pad_h), value=value)
+
+
+def frames_to_batch(frames) -> torch.Tensor:
+    """
+    uint8 (H, W, C) arrays -> one (B, H, W, C) IMAGE. Frames whose size differs from the
+    first one are resized to it, like ComfyUI's ImageBatch does.
+    """
+    height, width = frames[0].shape[:2]
+    if all(frame.shape == frames[0].shape for frame in frames):
+        return torch.from_numpy(np.stack(frames)).float().div_(255.0)
+    return torch.cat([
+        resize(torch.from_numpy(np.array(frame)).unsqueeze(0).float().div_(255.0), width, height)
+        for frame in frames
+    ])
+
+
+def broadcast_pair(a: torch.Tensor, b: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+    """Pair two batches item by item; a batch of one is broadcast (as a view) against the other."""
+    if a.shape[0] == b.shape[0]:
+        return a, b
+    if a.shape[0] == 1:
+        return a.expand(b.shape[0], *a.shape[1:]), b
+    if b.shape[0] == 1:
+        return a, b.expand(a.shape[0], *b.shape[1:])
+    raise RuntimeError(
+        f"Batch sizes must match or one of them must be 1, got {a.shape[0]} and {b.shape[0]}"
+    )
+
+
+def concat_pair(
+    a: torch.Tensor,
+    b: torch.Tensor,
+    direction: str = "horizontal",
+    match_method: str = "resize",
+    pad_value: float = 1.0,
+) -> torch.Tensor:
+    """
+    Concatenate two IMAGE batches pairwise (a[i] next to b[i]).
+
+    When the matching dimension already agrees this is a single torch.cat;
+    otherwise the smaller side is resized (keeping aspect ratio) or padded first.
+    Padding defaults to white, which is what the PIL path produces after
+    compositing its transparent padding.
+    """
+    a = flatten_alpha(as_batch(a))
+    b = flatten_alpha(as_batch(b))
+    if b.device != a.device or b.dtype != a.dtype:
+        b = b.to(device=a.device, dtype=a.dtype)
+    a, b = broadcast_pair(a, b)
+    if direction == "horizontal":
+        target = max(a.shape[1], b.shape[1])
+        if a.shape[1] != b.shape[1]:
+            a = _match_height(a, target, match_method, pad_value)
+            b = _match_height(b, target, match_method, pad_value)
+        return torch.cat((a, b), dim=2)
+    elif direction == "vertical":
+        target = max(a.shape[2], b.shape[2])
+        if a.shape[2] != b.shape[2]:
+            a = _match_width(a, target, match_method, pad_value)
+            b = _match_width(b, target, match_method, pad_value)
+        return torch.cat((a, b), dim=1)
+    raise ValueError(f"Unknown direction {direction}")
+
+
+def _match_height(images, target_h, match_method, pad_value):
+    height, width = images.shape[1], images.shape[2]
+    if match_method == "resize":
+        if height == 0:
+            raise RuntimeError("Encountered an image with zero height.")
+        return resize(images, int(width * (target_h / float(height))), target_h)
+    return pad(images, width, target_h, pad_value)
+
+
+def _match_width(images, target_w, match_method, pad_value):
+    height, width = images.shape[1], images.shape[2]
+    if match_method == "resize":
+        if width == 0:
+            raise RuntimeError("Encountered an image with zero width.")
+        return resize(images, target_w, int(height * (target_w / float(width))))
+    return pad(images, target_w, height, pad_value)
+
+
+def _fill_tensor(fill, channels, like: torch.Tensor) -> torch.Tensor:
+    """Broadcastable fill colour; fill is a float or a sequence of floats in [0, 1]."""
+    if isinstance(fill, (int, float)):
+        fill = [float(fill)] * channels
+    fill = list(fill)[:channels]
+    fill += [1.0] * (channels - len(fill))  # missing alpha is opaque
+    return torch.tensor(fill, dtype=like.dtype, device=like.device)
+
+
+def fit_center(images: torch.Tensor, width: int, height: int, fill=0.0) -> torch.Tensor:
+    """Center crop and/or pad a (B, H, W, C) batch to (width, height)."""
+    src_h, src_w = images.shape[1], images.shape[2]
+    if src_h == height and src_w == width:
+        return images
+    out = _fill_tensor(fill, images.shape[-1], images).expand(
+        images.shape[0], height, width, images.shape[-1]
+    ).clone()
+    copy_h, copy_w = min(src_h, height), min(src_w, width)
+    src_y, src_x = (src_h - copy_h) // 2, (src_w - copy_w) // 2
+    dst_y, dst_x = (height - copy_h) // 2, (width - copy_w) // 2
+    out[:, dst_y : dst_y + copy_h, dst_x : dst_x + copy_w] = images[
+        :, src_y : src_y + copy_h, src_x : src_x + copy_w
+    ]
+    return out
+
+
+def _expanded_size(width: int, height: int, angle: float) -> Tuple[int, int]:
+    """Canvas (width, height) of Image.rotate(angle, expand=True): the rotated corners' bounds, as PIL rounds them."""
+    radians = -math.radians(angle)
+    # PIL rounds the matrix to 15 digits, which keeps near-integer corners from spilling over
+    cos, sin = round(math.cos(radians), 15), round(math.sin(radians), 15)
+    a, b, d, e = cos, sin, -sin, cos
+    # same evaluation order as PIL, so a corner landing on an integer rounds the same way
+    c = a * -(width / 2.0) + b * -(height / 2.0) + width / 2.0
+    f = d * -(width / 2.0) + e * -(height / 2.0) + height / 2.0
+    xs = [a * x + b * y + c for x, y in ((0, 0), (width, 0), (width, height), (0, height))]
+    ys = [d * x + e * y + f for x, y in ((0, 0), (width, 0), (width, height), (0, height))]
+    return math.ceil(max(xs)) - math.floor(min(xs)), math.ceil(max(ys)) - math.floor(min(ys))
+
+
+def rotate(images: torch.Tensor, angle: float, expand: bool = False, fill=0.0, mode: str = "bilinear") -> torch.Tensor:
+    """
+    Rotate a (B, H, W, C) batch counter-clockwise by angle degrees, like PIL Image.rotate.
+
+    Multiples of 90 degrees use torch.rot90 (exact, no resampling); 0 returns the input itself.
+    Any other angle is a single affine_grid + grid_sample over the whole batch.
+    Without expand the result is cropped/padded to the original canvas around the center.
+    """
+    images = as_batch(images)
+    height, width = images.shape[1], images.shape[2]
+    angle = float(angle) % 360.0
+    if angle.is_integer() and int(angle) % 90 == 0:
+        k = int(angle) // 90
+        if k == 0:
+            return images
+        rotated = torch.rot90(images, k, dims=(1, 2))
+        if expand or k == 2:
+            return rotated
+        return fit_center(rotated, width, height, fill)
+
+    radians = math.radians(angle)
+    cos, sin = math.cos(radians), math.sin(radians)
+    if expand:
+        out_w, out_h = _expanded_size(width, height, angle)
+    else:
+        out_w, out_h = width, height
+    # output (normalized) -> input (normalized) sampling matrix; y points down in image space
+    theta = torch.tensor(
+        [
+            [cos * out_w / width, -sin * out_h / width, 0.0],
+            [sin * out_w / height, cos * out_h / height, 0.0],
+        ],
+        dtype=images.dtype if images.is_floating_point() else torch.float32,
+        device=images.device,
+    ).expand(images.shape[0], 2, 3)
+    source = images.movedim(-1, 1)
+    if not source.is_floating_point():
+        source = source.float()
+    # sample a coverage channel along with the image so the fill colour can be blended in
+    coverage = torch.ones_like(source[:, :1])
+    grid = F.affine_grid(theta, (images.shape[0], 1, out_h, out_w), align_corners=False)
+    sampled = F.grid_sample(
+        torch.cat((source, coverage), dim=1), grid, mode=mode, padding_mode="zeros", align_corners=False
+    ).movedim(1, -1)
+    rotated, coverage = sampled[..., :-1], sampled[..., -1:]
+    fill_color = _fill_tensor(fill, rotated.shape[-1], rotated)
+    return rotated + (1.0 - coverage) * fill_color
+
+
+def compose_rgba(image: torch.Tensor, mask: torch.Tensor, invert: bool = False, out: torch.Tensor = None) -> torch.Tensor:
+    """
+    Attach mask as the alpha channel of an RGB/RGBA batch.
+
+    - mask may be (H, W), (B, H, W) or (B, H, W, 1); a single mask is broadcast over the batch.
+    - the mask is resized (bilinear, once per distinct mask) only if its size differs,
+      and inverted in place inside the alpha plane, so no extra full-size temporary is made.
+    - out: optional preallocated (B, H, W, 4) buffer to write into. Passing the RGBA image
+      itself as out updates its alpha channel in place.
+    """
+    image = as_batch(image)
+    batch, height, width, channels = image.shape
+    if channels not in (3, 4):
+        raise ValueError("Image must have 3 (RGB) or 4 (RGBA) channels")
+    if mask.ndim == 4 and mask.shape[-1] == 1:
+        mask = mask[..., 0]
+    if mask.ndim == 2:
+        mask = mask.unsqueeze(0)
+    if mask.ndim != 3:
+        raise ValueError(f"Invalid mask shape {tuple(mask.shape)}")
+    if mask.shape[0] not in (1, batch):
+        raise ValueError(f"Mask batch {mask.shape[0]} does not match image batch {batch}")
+    mask = mask.to(device=image.device, dtype=image.dtype).unsqueeze(-1)
+    if mask.shape[1:3] != (height, width):
+        mask = resize(mask, width, height, mode="bilinear")
+    alpha_source = mask.expand(batch, height, width, 1)
+
+    if out is None:
+        out = torch.empty((batch, height, width, 4), dtype=image.dtype, device=image.device)
+    elif tuple(out.shape) != (batch, height, width, 4):
+        raise ValueError(f"Output buffer must have shape {(batch, height, width, 4)}, got {tuple(out.shape)}")
+    if out.data_ptr() != image.data_ptr():
+        out[..., :3].copy_(image[..., :3])
+    alpha = out[..., 3:]
+    alpha.copy_(alpha_source)
+    if invert:
+        alpha.neg_().add_(1.0)
+    return out
+
+
+def _gaussian_kernel(sigma: float, like: torch.Tensor) -> torch.Tensor:
+    half = max(int(math.ceil(3.0 * sigma)), 1)
+    x = torch.arange(-half, half + 1, dtype=like.dtype, device=like.device)
+    kernel = torch.exp(-0.5 * (x / sigma) ** 2)
+    return kernel / kernel.sum()
+
+
+def gaussian_blur(images: torch.Tensor, radius: float, working_sigma: float = 3.0) -> torch.Tensor:
+    """
+    Approximate PIL GaussianBlur(radius) on a (B, H, W, C) batch, cheaply for large radii.
+
+    The batch is downscaled so the blur becomes about working_sigma pixels, blurred with a
+    small separable kernel, then upscaled back. The visual radius matches the full-resolution
+    blur while the cost no longer grows with the radius.
+    """
+    images = as_batch(images)
+    if radius <= 0:
+        return images
+    height, width = images.shape[1], images.shape[2]
+    scale = min(1.0, working_sigma / float(radius))
+    small_h, small_w = max(1, int(round(height * scale))), max(1, int(round(width * scale)))
+    x = images.movedim(-1, 1)
+    if (small_h, small_w) != (height, width):
+        x = F.interpolate(x, size=(small_h, small_w), mode="bilinear", antialias=True, align_corners=False)
+    # the antialiased downscale already contributes roughly half a pixel of blur
+    sigma = max(math.sqrt(max((radius * scale) ** 2 - 0.25, 0.0)), 0.5)
+    kernel = _gaussian_kernel(sigma, x)
+    half = kernel.shape[0] // 2
+    channels = x.shape[1]
+    horizontal = kernel.view(1, 1, 1, -1).expand(channels, 1, 1, -1)
+    vertical = kernel.view(1, 1, -1, 1).expand(channels, 1, -1, 1)
+    x = F.conv2d(F.pad(x, (half, half, 0, 0), mode="replicate"), horizontal, groups=channels)
+    x = F.conv2d(F.pad(x, (0, 0, half, half), mode="replicate"), vertical, groups=channels)
+    if (small_h, small_w) != (height, width):
+        x = F.interpolate(x, size=(height, width), mode="bilinear", align_corners=False)
+    return x.movedim(1, -1)
+
+
+def pixelate(images: torch.Tensor, max_tiles: int = 100) -> torch.Tensor:
+    """
+    Pixelate a (B, H, W, C) batch into roughly max_tiles blocks (at least 4 per side),
+    each block filled with its average colour.
+    """
+    images = as_batch(images)
+    height, width = images.shape[1], images.shape[2]
+    aspect_ratio = width / height
+    tiles_h = int((max_tiles / aspect_ratio) ** 0.5)
+    tiles_w = int(aspect_ratio * tiles_h)
+    tiles_h, tiles_w = min(max(4, tiles_h), height), min(max(4, tiles_w), width)
+    blocks = F.adaptive_avg_pool2d(images.movedim(-1, 1), (tiles_h, tiles_w))
+    return F.interpolate(blocks, size=(height, width), mode="nearest").movedim(1, -1)
+
+
+def censor(images: torch.Tensor, selected, method: str = "blur") -> torch.Tensor:
+    """
+    Censor the images of a batch where selected[i] is True, leaving the others untouched.
+
+    method: "white", "blur" (radius 40) or "pixelate" (block average, ~100 tiles).
+    The input is returned as is when nothing is selected or the method is unknown.
+    """
+    images = as_batch(images)
+    indexes = [i for i, flag in enumerate(selected) if flag]
+    method = method.lower()
+    if not indexes or method not in ("white", "blur", "pixelate"):
+        return images
+    out = images.clone()
+    if method == "white":
+        out[indexes] = 1.0
+    elif method == "blur":
+        out[indexes] = gaussian_blur(images[indexes], 40)
+    else:
+        out[indexes] = pixelate(images[indexes], max_tiles=100)
+    return out
@@ -0,0 +1,127 @@
+import struct
+import zlib
+
+import numpy as np
+
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_COLOR_TYPES = {
+    1: 0,  # greyscale
+    3: 2,  # RGB
+    4: 6,  # RGBA
+}
+
+
+class PNGStripWriter:
+    """
+    Writes an 8-bit PNG incrementally, one horizontal strip at a time.
+
+    The full canvas never has to exist in memory: each strip is filtered,
+    deflated and flushed into IDAT chunks as soon as it is written.
+
+    with PNGStripWriter(path, width, height, channels=4) as writer:
+        for strip in strips:  # uint8 arrays of shape (rows, width, channels)
+            writer.write_rows(strip)
+    """
+
+    def __init__(self, path_or_file, width, height, channels=4, compress_level=4, text=None, chunk_size=1 << 20):
+        if channels not in _COLOR_TYPES:
+            raise ValueError(f"Unsupported channel count {channels}, expected 1, 3 or 4")
+        if width <= 0 or height <= 0:
+            raise ValueError(f"Invalid PNG size {width}x{height}")
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.chunk_size = chunk_size
+        self.rows_written = 0
+        self._owns_file = isinstance(path_or_file, str)
+        self._file = open(path_or_file, "wb") if self._owns_file else path_or_file
+        self._compressor = zlib.compressobj(compress_level)
+        self._pending = bytearray()
+        self._prev_row = np.zeros((width * channels,), dtype=np.uint8)
+        self._closed = False
+
+        self._file.write(PNG_SIGNATURE)
+        ihdr = struct.pack(">IIBBBBB", width, height, 8, _COLOR_TYPES[channels], 0, 0, 0)
+        self._write_chunk(b"IHDR", ihdr)
+        for key, value in (text or {}).items():
+            # tEXt is latin-1 only, fall back to iTXt for anything else
+            try:
+                payload = key.encode("latin-1") + b"\x00" + str(value).encode("latin-1")
+                self._write_chunk(b"tEXt", payload)
+            except UnicodeEncodeError:
+                payload = key.encode("latin-1") + b"\x00\x00\x00\x00\x00" + str(value).encode("utf-8")
+                self._write_chunk(b"iTXt", payload)
+
+    def _write_chunk(self, chunk_type: bytes, data: bytes):
+        self._file.write(struct.pack(">I", len(data)))
+        self._file.write(chunk_type)
+        self._file.write(data)
+        self._file.write(struct.pack(">I", zlib.crc32(chunk_type + data) & 0xFFFFFFFF))
+
+    def _flush_pending(self, force=False):
+        while len(self._pending) >= self.chunk_size or (force and self._pending):
+            data = bytes(self._pending[: self.chunk_size])
+            del self._pending[: self.chunk_size]
+            self._write_chunk(b"IDAT", data)
+
+    def write_rows(self, rows: np.ndarray):
+        """
+        Append rows of shape (n, width, channels) or (n, width) for greyscale.
+        """
+        if self._closed:
+            raise RuntimeError("PNGStripWriter is already closed")
+        rows = np.asarray(rows)
+        if rows.dtype != np.uint8:
+            raise ValueError(f"Rows must be uint8, got {rows.dtype}")
+        if rows.ndim == 2:
+            rows = rows[:, :, None]
+        if rows.shape[1] != self.width or rows.shape[2] != self.channels:
+            raise ValueError(
+                f"Row shape {rows.shape[1:]} does not match PNG ({self.width}, {self.channels})"
+            )
+        if self.rows_written + rows.shape[0] > self.height:
+            raise ValueError("Too many rows written for PNG height")
+        if rows.shape[0] == 0:
+            return
+        flat = np.ascontiguousarray(rows).reshape(rows.shape[0], -1)
+        # PNG "Up" filter (type 2): byte minus the byte above, wrapping in uint8
+        above = np.empty_like(flat)
+        above[0] = self._prev_row
+        above[1:] = flat[:-1]
+        filtered = np.empty((flat.shape[0], flat.shape[1] + 1), dtype=np.uint8)
+        filtered[:, 0] = 2
+        np.subtract(flat, above, out=filtered[:, 1:])
+        self._prev_row = flat[-1].copy()
+        self._pending += self._compressor.compress(filtered.tobytes())
+        self._flush_pending()
+        self.rows_written += rows.shape[0]
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            if self.rows_written != self.height:
+                raise ValueError(
+                    f"PNG expects {self.height} rows, but only {self.rows_written} were written"
+                )
+            self._pending += self._compressor.flush()
+            self._flush_pending(force=True)
+            self._write_chunk(b"IEND", b"")
+        finally:
+            if self._owns_file:
+                self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            # don't mask the original error with a row-count mismatch
+            self._closed = True
+            if self._owns_file:
+                self._file.close()
+            return False
+        self.close()
+        return False
@@ -0,0 +1,216 @@
+"""
+Opt-in per-node timing and memory statistics.
+
+With COMFYUI_LOGICUTILS_NODE_STATS=1, autonode.node_wrapper wraps each class's FUNCTION
+so that every call records wall time, CPU time, input/output tensor bytes and the
+growth of the process's peak RSS. When it is off, classes are left untouched and cost
+nothing extra. Calls append one tuple to a deque (atomic under the GIL, no lock on
+the hot path); readers fold the pending events into per-node totals.
+
+COMFYUI_LOGICUTILS_NODE_STATS_FILE=<path> also enables it and rewrites that JSON file
+every COMFYUI_LOGICUTILS_NODE_STATS_INTERVAL seconds (default 60) and at exit.
+"""
+import atexit
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+STATS_FILE = os.environ.get("COMFYUI_LOGICUTILS_NODE_STATS_FILE", "").strip()
+ENABLED = bool(STATS_FILE) or os.environ.get("COMFYUI_LOGICUTILS_NODE_STATS", "").strip().lower() in {
+    "1",
+    "true",
+    "yes",
+    "on",
+}
+
+# drain from the writer side too, so an unread registry stays bounded
+_DRAIN_THRESHOLD = 4096
+_events = deque()
+_totals = {}
+_drain_lock = threading.Lock()
+_dumper = None
+_dumper_lock = threading.Lock()
+
+
+def peak_rss_bytes() -> int:
+    """High-water mark of the process's resident set size, 0 where unavailable."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on Linux, bytes on macOS
+        return peak if sys.platform == "darwin" else peak * 1024
+    try:
+        import psutil
+        return getattr(psutil.Process().memory_info(), "peak_wset", 0)
+    except Exception:
+        return 0
+
+
+def tensor_bytes(value, depth=0) -> int:
+    """Bytes held by tensors/arrays in value, looking into dicts, lists and tuples (LATENT, batches)."""
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes
+    if depth >= 3:
+        return 0
+    if isinstance(value, dict):
+        return sum(tensor_bytes(item, depth + 1) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(tensor_bytes(item, depth + 1) for item in value)
+    return 0
+
+
+def record(node, wall, cpu, input_bytes, output_bytes, rss_delta, failed=False):
+    _events.append((node, wall, cpu, input_bytes, output_bytes, rss_delta, failed))
+    if len(_events) > _DRAIN_THRESHOLD and _drain_lock.acquire(blocking=False):
+        try:
+            _drain_locked()
+        finally:
+            _drain_lock.release()
+
+
+def _drain_locked():
+    while True:
+        try:
+            node, wall, cpu, input_bytes, output_bytes, rss_delta, failed = _events.popleft()
+        except IndexError:
+            return
+        stats = _totals.get(node)
+        if stats is None:
+            stats = _totals[node] = {
+                "calls": 0,
+                "errors": 0,
+                "wall_s": 0.0,
+                "wall_max_s": 0.0,
+                "cpu_s": 0.0,
+                "input_bytes": 0,
+                "output_bytes": 0,
+                "peak_rss_delta_bytes": 0,
+            }
+        stats["calls"] += 1
+        stats["errors"] += failed
+        stats["wall_s"] += wall
+        stats["wall_max_s"] = max(stats["wall_max_s"], wall)
+        if cpu is not None:
+            stats["cpu_s"] += cpu
+        stats["input_bytes"] += input_bytes
+        stats["output_bytes"] += output_bytes
+        stats["peak_rss_delta_bytes"] = max(stats["peak_rss_delta_bytes"], rss_delta)
+
+
+def snapshot(reset=False) -> dict:
+    """Per-node totals: node class name -> stats dict, with mean wall time added."""
+    with _drain_lock:
+        _drain_locked()
+        result = {node: dict(stats) for node, stats in _totals.items()}
+        if reset:
+            _totals.clear()
+    for stats in result.values():
+        stats["wall_mean_s"] = stats["wall_s"] / stats["calls"]
+    return result
+
+
+def _measure(node, function):
+    # async node functions run their work on another thread, so only wall time is theirs
+    if inspect.iscoroutinefunction(function):
+        @functools.wraps(function)
+        async def timed_async(*args, **kwargs):
+            input_bytes = tensor_bytes(args) + tensor_bytes(kwargs)
+            rss_before = peak_rss_bytes()
+            start = time.perf_counter()
+            result, failed = None, True
+            try:
+                result = await function(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                record(node, time.perf_counter() - start, None, input_bytes, tensor_bytes(result),
+                       peak_rss_bytes() - rss_before, failed)
+        timed_async.__node_stats_original__ = function
+        return timed_async
+
+    @functools.wraps(function)
+    def timed(*args, **kwargs):
+        input_bytes = tensor_bytes(args) + tensor_bytes(kwargs)
+        rss_before = peak_rss_bytes()
+        cpu_start = time.thread_time()
+        start = time.perf_counter()
+        result, failed = None, True
+        try:
+            result = function(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            record(node, time.perf_counter() - start, time.thread_time() - cpu_start, input_bytes,
+                   tensor_bytes(result), peak_rss_bytes() - rss_before, failed)
+    timed.__node_stats_original__ = function
+    return timed
+
+
+def instrument(cls):
+    """Replace cls's FUNCTION with a measured version, recorded under cls.__name__."""
+    name = getattr(cls, "FUNCTION", None)
+    if name is None:
+        return cls
+    attribute = inspect.getattr_static(cls, name, None)
+    if isinstance(attribute, (staticmethod, classmethod)):
+        kind, function = type(attribute), attribute.__func__
+    elif callable(attribute):
+        kind, function = None, attribute
+    else:
+        return cls
+    # subclasses of an instrumented node wrap the original, not the parent's wrapper
+    function = getattr(function, "__node_stats_original__", function)
+    measured = _measure(cls.__name__, function)
+    setattr(cls, name, kind(measured) if kind else measured)
+    if STATS_FILE:
+        start_dumper(STATS_FILE)
+    return cls
+
+
+def dump(path: str):
+    data = {"timestamp": time.time(), "pid": os.getpid(), "nodes": snapshot()}
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    partial = f"{path}.{os.getpid()}.partial"
+    with open(partial, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+    os.replace(partial, path)
+
+
+def start_dumper(path: str, interval=None):
+    """Rewrite path with the current snapshot every interval seconds on a daemon thread, and at exit."""
+    global _dumper
+    with _dumper_lock:
+        if _dumper is not None:
+            return
+        if interval is None:
+            try:
+                interval = float(os.environ.get("COMFYUI_LOGICUTILS_NODE_STATS_INTERVAL", "60"))
+            except ValueError:
+                interval = 60.0
+        interval = max(interval, 1.0)
+
+        def dump_logged():
+            try:
+                dump(path)
+            except OSError as e:
+                print(f"[ComfyUI-LogicUtils] node stats dump to {path} failed: {e}")
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                dump_logged()
+
+        _dumper = threading.Thread(target=loop, name="logicutils-node-stats", daemon=True)
+        _dumper.start()
+        atexit.register(dump_logged)
@@ -1,6 +1,5 @@
 import base64
 import json
-import math
 import numpy as np
 import torch
 
@@ -14,13 +13,17 @@ except ImportError:
     piexif_loaded = False
 
 from .imgio.converter import PILHandlingHodes
-from .autonode import node_wrapper, get_node_names_mappings, validate, anytype, PILImage
+from .imgio import tensor_ops
+from .imgio.grid import grid_layout, grid_sources, image_size, iter_grid_strips
+from .imgio.writer import PNGStripWriter
+from .autonode import node_wrapper, get_node_names_mappings, validate, anytype, PILImage, async_io_node
 import time
 import os
 import shutil
 from PIL import Image
 from PIL import ImageOps
 from PIL import ImageEnhance
+from PIL import ImageColor
 from PIL.PngImagePlugin import PngInfo
 try:
     import folder_paths
@@ -232,6 +235,7 @@ def throw_if_parent_or_root_access(path):
 
 
 @fundamental_node
+@async_io_node
 class SaveImageCustomNode:
     def __init__(self):
         self.output_dir = folder_paths.get_output_directory()
@@ -278,39 +282,44 @@ class SaveImageCustomNode:
         throw_if_parent_or_root_access(filename_prefix)
         throw_if_parent_or_root_access(subfolder_dir)
         output_dir = os.path.join(self.output_dir, subfolder_dir)
-        full_output_folder, filename, counter, subfolder, filename_prefix = (
-            folder_paths.get_save_image_path(
-                filename_prefix, output_dir, images[0].shape[1], images[0].shape[0]
-            )
-        )
+        filelock_path = os.path.join(output_dir, filename_prefix + ".lock")
         results = list()
-        for image in images:
-            i = 255.0 * image.cpu().numpy()
-            img = Image.fromarray(np.clip(i, 0, 255).astype(np.uint8))
-            metadata = None
-            if not args.disable_metadata:
-                metadata = PngInfo()
-                if prompt is not None:
-                    metadata.add_text("prompt", json.dumps(prompt))
-                if extra_pnginfo is not None:
-                    for x in extra_pnginfo:
-                        metadata.add_text(x, json.dumps(extra_pnginfo[x]))
-
-            file = f"{filename}_{counter:05}_.png"
-            img.save(
-                os.path.join(full_output_folder, file),
-                pnginfo=metadata,
-                compress_level=self.compress_level,
-            )
-            results.append(
-                {"filename": file, "subfolder": subfolder, "type": self.type}
+        # the counter is only claimed once files exist, so concurrent saves (async
+        # execution) with the same prefix must not interleave
+        with filelock.FileLock(filelock_path, timeout=10):
+            full_output_folder, filename, counter, subfolder, filename_prefix = (
+                folder_paths.get_save_image_path(
+                    filename_prefix, output_dir, images[0].shape[1], images[0].shape[0]
+                )
             )
-            counter += 1
+            for image in images:
+                i = 255.0 * image.cpu().numpy()
+                img = Image.fromarray(np.clip(i, 0, 255).astype(np.uint8))
+                metadata = None
+                if not args.disable_metadata:
+                    metadata = PngInfo()
+                    if prompt is not None:
+                        metadata.add_text("prompt", json.dumps(prompt))
+                    if extra_pnginfo is not None:
+                        for x in extra_pnginfo:
+                            metadata.add_text(x, json.dumps(extra_pnginfo[x]))
+
+                file = f"{filename}_{counter:05}_.png"
+                img.save(
+                    os.path.join(full_output_folder, file),
+                    pnginfo=metadata,
+                    compress_level=self.compress_level,
+                )
+                results.append(
+                    {"filename": file, "subfolder": subfolder, "type": self.type}
+                )
+                counter += 1
 
         return {"ui": {"images": results}, "outputs": {"images": file.rstrip(".png")}}
 
 
 @fundamental_node
+@async_io_node
 class SaveTextCustomNode:
     def __init__(self):
         self.output_dir = folder_paths.get_output_directory()
@@ -357,6 +366,7 @@ class SaveTextCustomNode:
 
 
 @fundamental_node
+@async_io_node
 class DumpTextJsonlNode:
     """
     Appends text to a JSONL file (one JSON object per line).
@@ -490,104 +500,131 @@ class ConcatGridNode:
         else:
             pil_images = [converted.convert("RGBA")]
 
-        if len(pil_images) == 0:
-            raise RuntimeError("No images provided to Concat Grid")
-
-        # 2) Handle the three layout directions
-        if direction == "horizontal":
-            # --- Horizontal layout ---
-            max_height = max(img.height for img in pil_images)
-            processed = []
-            for img in pil_images:
-                if match_method == "resize":
-                    # Scale the image so that height == max_height
-                    if img.height == 0:
-                        raise RuntimeError("Encountered an image of zero height.")
-                    ratio = max_height / float(img.height)
-                    new_w = int(img.width * ratio)
-                    new_h = max_height
-                    new_img = img.resize((new_w, new_h), Image.Resampling.LANCZOS)
-                else:  # "pad"
-                    # Create a new image with the same width but max_height
-                    new_img = Image.new("RGBA", (img.width, max_height), (0, 0, 0, 0))
-                    new_img.paste(img, (0, 0))
-                processed.append(new_img)
-
-            total_width = sum(im.width for im in processed)
-            out = Image.new("RGBA", (total_width, max_height), (0, 0, 0, 0))
-            x_offset = 0
-            for im in processed:
-                out.paste(im, (x_offset, 0))
-                x_offset += im.width
-
-        elif direction == "vertical":
-            # --- Vertical layout ---
-            max_width = max(img.width for img in pil_images)
-            processed = []
-            for img in pil_images:
-                if match_method == "resize":
-                    if img.width == 0:
-                        raise RuntimeError("Encountered an image of zero width.")
-                    ratio = max_width / float(img.width)
-                    new_w = max_width
-                    new_h = int(img.height * ratio)
-                    new_img = img.resize((new_w, new_h), Image.Resampling.LANCZOS)
-                else:  # "pad"
-                    new_img = Image.new("RGBA", (max_width, img.height), (0, 0, 0, 0))
-                    new_img.paste(img, (0, 0))
-                processed.append(new_img)
-
-            total_height = sum(im.height for im in processed)
-            out = Image.new("RGBA", (max_width, total_height), (0, 0, 0, 0))
-            y_offset = 0
-            for im in processed:
-                out.paste(im, (0, y_offset))
-                y_offset += im.height
-
-        else:  # direction == "square-like"
-            # --- Square-like NxN grid ---
-            count = len(pil_images)
-            # Determine grid size
-            num_cols = int(math.ceil(math.sqrt(count)))
-            num_rows = int(math.ceil(count / num_cols))
-
-            # Find maximum width/height among images
-            max_width = max(img.width for img in pil_images)
-            max_height = max(img.height for img in pil_images)
-
-            processed = []
-            for img in pil_images:
-                if match_method == "resize":
-                    # Here we forcibly resize each image to (max_width, max_height)
-                    # (which may distort if aspect ratios differ).
-                    new_img = img.resize(
-                        (max_width, max_height), Image.Resampling.LANCZOS
-                    )
-                else:  # "pad"
-                    # Keep original size but create a new RGBA canvas so each cell is (max_w, max_h)
-                    new_img = Image.new("RGBA", (max_width, max_height), (0, 0, 0, 0))
-                    new_img.paste(img, (0, 0))
-                processed.append(new_img)
-
-            # Create the final output canvas
-            grid_width = num_cols * max_width
-            grid_height = num_rows * max_height
-            out = Image.new("RGBA", (grid_width, grid_height), (0, 0, 0, 0))
-
-            # Paste images in row-major order
-            idx = 0
-            for row in range(num_rows):
-                for col in range(num_cols):
-                    if idx >= count:
-                        break  # no more images
-                    x_offset = col * max_width
-                    y_offset = row * max_height
-                    out.paste(processed[idx], (x_offset, y_offset))
-                    idx += 1
+        # 2) Lay out and paste through the same code as the streaming saver, so the two can't drift
+        layout = grid_layout([img.size for img in pil_images], direction, match_method)
+        canvas_width, canvas_height, _ = layout
+        canvas = np.zeros((canvas_height, canvas_width, 4), dtype=np.uint8)
+        y_offset = 0
+        for strip in iter_grid_strips(lambda i: pil_images[i], layout, strip_rows=None):
+            canvas[y_offset : y_offset + strip.shape[0]] = strip
+            y_offset += strip.shape[0]
+        out = Image.fromarray(canvas, mode="RGBA")
 
         return (out,)
 
 
+@fundamental_node
+@async_io_node
+class SaveConcatGridStreamNode:
+    """
+    Same layout as ConcatGridNode, but the grid is rendered one strip of at most
+    STRIP_ROWS canvas rows at a time and streamed straight into a PNG under the
+    output directory.
+
+    Peak memory is bounded by one strip plus one source image instead of the whole
+    canvas, in every direction, so contact sheets of several gigapixels can be written.
+    """
+
+    def __init__(self):
+        self.output_dir = folder_paths.get_output_directory()
+        self.type = "output"
+        self.prefix_append = ""
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "images": ("IMAGE",),
+                "direction": (
+                    ["horizontal", "vertical", "square-like"],
+                    {"default": "square-like"},
+                ),
+                "match_method": (["resize", "pad"], {"default": "resize"}),
+                "filename_prefix": ("STRING", {"default": "ComfyUI"}),
+                "subfolder_dir": ("STRING", {"default": ""}),
+            },
+            "optional": {
+                "compress_level": ("INT", {"default": 4, "min": 0, "max": 9}),
+            },
+            "hidden": {"prompt": "PROMPT", "extra_pnginfo": "EXTRA_PNGINFO"},
+        }
+
+    RETURN_TYPES = ("STRING",)  # Filename
+    FUNCTION = "save_grid"
+
+    OUTPUT_NODE = True
+    RESULT_NODE = True
+    CATEGORY = "image"
+    custom_name = "Save Concat Grid (Streaming PNG)"
+
+    def save_grid(
+        self,
+        images,
+        direction="square-like",
+        match_method="resize",
+        filename_prefix="ComfyUI",
+        subfolder_dir="",
+        compress_level=4,
+        prompt=None,
+        extra_pnginfo=None,
+    ):
+        if images is None:
+            return {"ui": {"images": []}, "outputs": {"images": ""}}
+        sources = grid_sources(images)
+        if len(sources) == 0:
+            return {"ui": {"images": []}, "outputs": {"images": ""}}
+
+        throw_if_parent_or_root_access(filename_prefix)
+        throw_if_parent_or_root_access(subfolder_dir)
+        filename_prefix += self.prefix_append
+        output_dir = os.path.join(self.output_dir, subfolder_dir)
+        filelock_path = os.path.join(output_dir, filename_prefix + ".lock")
+
+        # layout only needs shapes, no pixel data is touched here
+        layout = grid_layout(
+            [image_size(source) for source in sources], direction, match_method
+        )
+        canvas_width, canvas_height, _ = layout
+
+        text = {}
+        if not args.disable_metadata:
+            if prompt is not None:
+                text["prompt"] = json.dumps(prompt)
+            if extra_pnginfo is not None:
+                for x in extra_pnginfo:
+                    text[x] = json.dumps(extra_pnginfo[x])
+
+        with filelock.FileLock(filelock_path, timeout=10):
+            full_output_folder, filename, counter, subfolder, filename_prefix = (
+                folder_paths.get_save_image_path(
+                    filename_prefix, output_dir, canvas_width, canvas_height
+                )
+            )
+            file = f"{filename}_{counter:05}_.png"
+            final_path = os.path.join(full_output_folder, file)
+            # reserve the name while holding the lock, then stream outside of it
+            open(final_path, "wb").close()
+
+        try:
+            with PNGStripWriter(
+                final_path,
+                canvas_width,
+                canvas_height,
+                channels=4,
+                compress_level=compress_level,
+                text=text,
+            ) as writer:
+                for strip in iter_grid_strips(lambda i: sources[i], layout):
+                    writer.write_rows(strip)
+        except Exception:
+            if os.path.exists(final_path):
+                os.remove(final_path)
+            raise
+
+        results = [{"filename": file, "subfolder": subfolder, "type": self.type}]
+        return {"ui": {"images": results}, "outputs": {"images": final_path[: -len(".png")]}}
+
+
 @fundamental_node
 class ConcatTwoImagesNode:
     """
@@ -601,6 +638,9 @@ class ConcatTwoImagesNode:
         - "resize": scale images so their matching dimension is the same
           (height for horizontal, width for vertical)
         - "pad": keep original size but pad them so the matching dimension is the same
+
+    Tensor inputs are concatenated pairwise (imageA[i] with imageB[i], a batch of
+    one is broadcast) directly in tensor space; other inputs go through PIL.
     """
 
     FUNCTION = "concat_two_images"
@@ -624,6 +664,11 @@ class ConcatTwoImagesNode:
     def concat_two_images(
         imageA, imageB, direction="horizontal", match_method="resize"
     ):
+        if isinstance(imageA, torch.Tensor) and isinstance(imageB, torch.Tensor):
+            # one torch.cat when shapes already match, resize/pad in tensor space otherwise
+            return (
+                tensor_ops.concat_pair(imageA, imageB, direction, match_method),
+            )
         # Convert input to PIL images (RGBA to preserve alpha if needed)
         pilA = PILHandlingHodes.handle_input(imageA)
         if isinstance(pilA, list):
@@ -706,6 +751,7 @@ class ConcatTwoImagesNode:
 
 
 @fundamental_node
+@async_io_node
 class SaveCustomJPGNode:
     def __init__(self):
         self.output_dir = folder_paths.get_output_directory()
@@ -839,6 +885,7 @@ class SaveCustomJPGNode:
 
 
 @fundamental_node
+@async_io_node
 class SaveImageWebpCustomNode:
     def __init__(self):
         self.output_dir = folder_paths.get_output_directory()
@@ -1006,40 +1053,41 @@ class ComposeRGBAImageFromMask:
 
     @staticmethod
     def compose(image, mask, invert):
-        if invert:
-            mask = 1.0 - mask
-
-        # Ensure mask has shape (batch_size, height, width, 1)
-        mask = mask.reshape((-1, mask.shape[-2], mask.shape[-1], 1))
-        # check devices, move to cpu
-        if hasattr(image, "device"):
-            image = image.cpu()
-        if hasattr(mask, "device"):
-            mask = mask.cpu()
-        # Resize mask to match image dimensions if necessary
-        if (
-            image.shape[0] != mask.shape[0]
-            or image.shape[1] != mask.shape[1]
-            or image.shape[2] != mask.shape[2]
-        ):
-            # Resize mask to match image dimensions
-            mask = torch.nn.functional.interpolate(
-                mask.permute(0, 3, 1, 2),
-                size=(image.shape[1], image.shape[2]),
-                mode="bilinear",
-                align_corners=False,
-            ).permute(0, 2, 3, 1)
-
-        num_channels = image.shape[-1]
-        if num_channels == 3:
-            rgba_image = torch.cat((image, mask), dim=-1)
-        elif num_channels == 4:
-            rgba_image = image.clone()
-            rgba_image[:, :, :, 3:] = mask
-        else:
-            raise ValueError("Image must have 3 (RGB) or 4 (RGBA) channels")
+        # mask is broadcast / resized / inverted straight into the alpha plane of one new RGBA tensor
+        return (tensor_ops.compose_rgba(image, mask, invert),)
+
+
+def _in_memory(image):
+    if isinstance(image, (list, tuple)):
+        return len(image) > 0 and all(_in_memory(item) for item in image)
+    return isinstance(image, (torch.Tensor, np.ndarray, Image.Image))
+
+
+def _all_sizes(image, predicate):
+    """
+    True if predicate(width, height) holds for every item, checked from shapes only.
+
+    Only tensors, arrays and PIL images are inspected: for paths, base64 and URLs the
+    normal path decodes (or downloads) the input anyway, so checking first would only
+    read it twice.
+    """
+    if not _in_memory(image):
+        return False
+    try:
+        infos = PILHandlingHodes.inspect_shape(image)
+    except ValueError:
+        # a shape the converter can't read as an image, the normal path reports it
+        return False
+    return len(infos) > 0 and all(predicate(info.width, info.height) for info in infos)
+
 
-        return (rgba_image,)
+def _passthrough(image):
+    """
+    Return an input unchanged for early exits, flattened to RGB like the PIL path would.
+    """
+    if isinstance(image, torch.Tensor):
+        return tensor_ops.flatten_alpha(tensor_ops.as_batch(image))
+    return PILHandlingHodes.handle_input(image)
 
 
 @fundamental_node
@@ -1134,6 +1182,10 @@ class ResizeImageEnsuringMultiple:
     @staticmethod
     @PILHandlingHodes.output_wrapper
     def resize_image_ensuring_multiple(image, multiple, method):
+        if _all_sizes(
+            image, lambda w, h: w > 0 and h > 0 and w % multiple == 0 and h % multiple == 0
+        ):
+            return (_passthrough(image),)
         image = PILHandlingHodes.handle_input(image)
         image_width, image_height = image.size
         total_pixels = image_width * image_height
@@ -1174,6 +1226,8 @@ class ResizeImageResolutionIfBigger:
     @staticmethod
     @PILHandlingHodes.output_wrapper
     def resize_image_resolution_if_bigger(image, resolution, method):
+        if _all_sizes(image, lambda w, h: 0 < w * h <= resolution**2):
+            return (_passthrough(image),)
         image = PILHandlingHodes.handle_input(image)
         image_width, image_height = image.size
         total_pixels = image_width * image_height
@@ -1220,6 +1274,8 @@ class ResizeImageResolutionIfSmaller:
     @staticmethod
     @PILHandlingHodes.output_wrapper
     def resize_image_resolution_if_smaller(image, resolution, method):
+        if _all_sizes(image, lambda w, h: w * h >= resolution**2 and w * h > 0):
+            return (_passthrough(image),)
         image = PILHandlingHodes.handle_input(image)
         image_width, image_height = image.size
         total_pixels = image_width * image_height
@@ -1275,6 +1331,7 @@ class Base64DecodeNode:
 
 
 @fundamental_node
+@async_io_node
 class ImageFromURLNode:
     FUNCTION = "url_download"
     RETURN_TYPES = ("IMAGE",)
@@ -1551,9 +1608,17 @@ class RotateImageNode:
 
     @staticmethod
     @PILHandlingHodes.output_wrapper
-    def rotate_image(image, angle):
+    def rotate_image(image, angle, expand=False, fill_color="#000000"):
+        fill = ImageColor.getrgb(fill_color or "#000000")
+        if isinstance(image, torch.Tensor):
+            # rot90 for right angles, one batched grid_sample otherwise
+            return (
+                tensor_ops.rotate(
+                    image, angle, expand=expand, fill=[c / 255.0 for c in fill]
+                ),
+            )
         image = PILHandlingHodes.handle_input(image)
-        return (image.rotate(angle),)
+        return (image.rotate(angle, expand=expand, fillcolor=fill[:3]),)
 
     @classmethod
     def INPUT_TYPES(cls):
@@ -1561,7 +1626,11 @@ class RotateImageNode:
             "required": {
                 "image": ("IMAGE",),
                 "angle": ("INT", {"default": 0}),
-            }
+            },
+            "optional": {
+                "expand": ("BOOLEAN", {"default": False}),
+                "fill_color": ("STRING", {"default": "#000000"}),
+            },
         }
 
 
@@ -1782,16 +1851,23 @@ class FFTNode:
 
 @fundamental_node
 class GetImageInfoNode:
+    """
+    WIDTH, HEIGHT and TOTAL_PIXELS describe the first item of a batch or list;
+    sizes lists every item as WIDTHxHEIGHT, one per line, for mixed-size inputs.
+    """
     FUNCTION = "get_image_info"
-    RETURN_TYPES = ("WIDTH", "HEIGHT", "TOTAL_PIXELS")
+    RETURN_TYPES = ("WIDTH", "HEIGHT", "TOTAL_PIXELS", "STRING")
+    RETURN_NAMES = ("WIDTH", "HEIGHT", "TOTAL_PIXELS", "sizes")
     CATEGORY = "image"
     custom_name = "Get Image Info"
 
     @staticmethod
     def get_image_info(image):
-        image = PILHandlingHodes.handle_input(image)
-        width, height = image.size
-        return (width, height, width * height)
+        # read from tensor shape / file header, nothing is decoded
+        infos = PILHandlingHodes.inspect_shape(image)
+        sizes = "\n".join(f"{info.width}x{info.height}" for info in infos)
+        first = infos[0]
+        return (first.width, first.height, first.width * first.height, sizes)
 
     @classmethod
     def INPUT_TYPES(cls):
@@ -0,0 +1,317 @@
+"""
+Node manifest (node_manifest.json) and lazy node registration.
+
+The manifest is written by a generation step that imports and validates every node
+module once. Per module it records the source hash, and per node the display name,
+input keys and return types. It is stamped with the package version.
+
+Heavy node modules (torch, PIL, requests, Crypto, the tagger stack) are not imported
+at startup. Instead their classes are registered as light proxies listed in the
+manifest, and the module is imported the first time a proxy is instantiated or asked
+for anything beyond its name (INPUT_TYPES, FUNCTION, ...). When a module's hash
+matches, autonode.validate skips it at import; with COMFYUI_LOGICUTILS_DEV=1 it always
+runs in full. When the hash doesn't match, the module is imported eagerly and
+validated, so a stale manifest costs startup time but never hides or skips anything.
+
+Regenerate after adding, removing or renaming nodes:
+
+    python node_manifest.py
+"""
+import hashlib
+import importlib
+import importlib.util
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+MANIFEST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "node_manifest.json")
+MANIFEST_FORMAT = 2
+
+# every module defining nodes; the ones in LAZY_MODULES have their import deferred
+NODE_MODULES = ("logic_gates", "randomness", "conversion", "math_nodes", "node_stats", "pystructure",
+                "io_node", "external", "auxilary", "crypto")
+LAZY_MODULES = ("io_node", "external", "auxilary", "crypto")
+# work that has to start when the nodes load, not when their (lazy) module is first imported:
+# module -> (environment variable, submodule, function), called when the variable is set
+STARTUP_HOOKS = {
+    "auxilary": ("COMFYUI_LOGICUTILS_TAGGER_PRELOAD", "utils.tagger", "start_preload"),
+}
+
+_PROGRESS = "[ComfyUI-LogicUtils]"
+_lock = threading.RLock()
+_manifest = None
+_hashes = {}
+import_times = OrderedDict()  # module -> seconds spent importing it, eager or deferred
+startup_seconds = None
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def import_budget_ms() -> float:
+    """Startup budget for nodes.py; exceeding it prints a per-module breakdown."""
+    try:
+        return float(os.environ.get("COMFYUI_LOGICUTILS_IMPORT_BUDGET_MS", "250"))
+    except ValueError:
+        return 250.0
+
+
+def developer_mode() -> bool:
+    return _env_flag("COMFYUI_LOGICUTILS_DEV")
+
+
+def source_path(module: str) -> str:
+    return os.path.join(os.path.dirname(MANIFEST_PATH), module + ".py")
+
+
+def source_hash(module: str) -> str:
+    digest = _hashes.get(module)
+    if digest is None:
+        with open(source_path(module), "rb") as f:
+            # line endings differ between checkouts (core.autocrlf), the source doesn't
+            source = f.read().replace(b"\r\n", b"\n")
+        digest = _hashes[module] = hashlib.sha256(source).hexdigest()
+    return digest
+
+
+def package_version() -> str:
+    try:
+        with open(os.path.join(os.path.dirname(MANIFEST_PATH), "pyproject.toml"), "r", encoding="utf-8") as f:
+            match = re.search(r'^version\s*=\s*"([^"]+)"', f.read(), re.MULTILINE)
+    except OSError:
+        return "unknown"
+    return match.group(1) if match else "unknown"
+
+
+def load_manifest(path: str = MANIFEST_PATH) -> dict:
+    global _manifest
+    if path == MANIFEST_PATH and _manifest is not None:
+        return _manifest
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+    if manifest.get("format") != MANIFEST_FORMAT or manifest.get("version") != package_version():
+        manifest = {"format": MANIFEST_FORMAT, "version": package_version(), "modules": {}}
+    if path == MANIFEST_PATH:
+        _manifest = manifest
+    return manifest
+
+
+def current_entry(module: str):
+    """The manifest entry of module if it was generated from the current source, else None."""
+    entry = load_manifest()["modules"].get(module)
+    if entry is None or entry.get("hash") != source_hash(module):
+        return None
+    return entry
+
+
+def validated_by_manifest(module_name: str) -> bool:
+    """
+    True when the manifest was generated (and so validated) from the current source of
+    module_name, a node module's __name__; autonode.validate then has nothing to check.
+    """
+    module = module_name.rsplit(".", 1)[-1]
+    if developer_mode() or module not in NODE_MODULES:
+        return False
+    try:
+        return current_entry(module) is not None
+    except OSError:
+        return False
+
+
+def import_module(module: str):
+    """Import a sibling node module, recording how long it took."""
+    full_name = f"{__package__}.{module}"
+    with _lock:
+        loaded = sys.modules.get(full_name)
+        if loaded is not None:
+            return loaded
+        start = time.perf_counter()
+        loaded = importlib.import_module(full_name)
+        import_times[module] = time.perf_counter() - start
+    if startup_seconds is not None and _env_flag("COMFYUI_LOGICUTILS_IMPORT_REPORT"):
+        print(f"{_PROGRESS} deferred import of {module} took {import_times[module] * 1000:.0f} ms")
+    return loaded
+
+
+class LazyNodeMeta(type):
+    """
+    Metaclass of the proxies. Attribute reads the proxy can't answer and instantiation
+    go to the real class, importing its module on first need. Attributes ComfyUI sets
+    on the proxy (RELATIVE_PYTHON_MODULE) are kept and copied onto the real class.
+    """
+    def resolve(cls):
+        real = cls.__dict__.get("_lazy_real")
+        if real is None:
+            with _lock:
+                real = cls.__dict__.get("_lazy_real")
+                if real is None:
+                    real = getattr(import_module(cls._lazy_module), cls.__name__)
+                    for name, value in cls._lazy_assigned.items():
+                        setattr(real, name, value)
+                    type.__setattr__(cls, "_lazy_real", real)
+        return real
+
+    def __getattr__(cls, name):
+        # dunder probes (copy, inspect, typing) shouldn't import anything
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(cls.resolve(), name)
+
+    def __setattr__(cls, name, value):
+        type.__setattr__(cls, name, value)
+        cls._lazy_assigned[name] = value
+        real = cls.__dict__.get("_lazy_real")
+        if real is not None:
+            setattr(real, name, value)
+
+    def __call__(cls, *args, **kwargs):
+        return cls.resolve()(*args, **kwargs)
+
+
+def lazy_class(module: str, class_name: str) -> LazyNodeMeta:
+    return LazyNodeMeta(class_name, (), {
+        "__module__": f"{__package__}.{module}",
+        "_lazy_module": module,
+        "_lazy_real": None,
+        "_lazy_assigned": {},
+    })
+
+
+def is_loaded(node_class) -> bool:
+    return not isinstance(node_class, LazyNodeMeta) or node_class.__dict__.get("_lazy_real") is not None
+
+
+def run_startup_hook(module: str):
+    """Run the STARTUP_HOOKS entry of module if its environment variable is set."""
+    hook = STARTUP_HOOKS.get(module)
+    if hook is None or not os.environ.get(hook[0], "").strip():
+        return None
+    _, submodule, function = hook
+    return getattr(importlib.import_module(f"{__package__}.{submodule}"), function)()
+
+
+def load_nodes(module: str, lazy: bool = False, requires=()):
+    """
+    (CLASS_MAPPINGS, CLASS_NAMES) of a node module. With lazy=True and a manifest entry
+    matching the module source, proxies are returned and nothing is imported;
+    `requires` are top-level packages checked (not imported) up front so that a
+    missing optional dependency still drops the module at startup.
+    The module's startup hook, if any, runs either way.
+    """
+    if lazy:
+        for requirement in requires:
+            if importlib.util.find_spec(requirement) is None:
+                raise ModuleNotFoundError(f"{module} requires {requirement}", name=requirement)
+        entry = current_entry(module)
+        if entry is not None:
+            names = {name: node["display_name"] for name, node in entry["nodes"].items()}
+            run_startup_hook(module)
+            return {name: lazy_class(module, name) for name in names}, names
+        print(f"{_PROGRESS} node_manifest.json is out of date for {module}, importing it eagerly "
+              f"(run `python node_manifest.py` to refresh)")
+    loaded = import_module(module)
+    run_startup_hook(module)
+    return loaded.CLASS_MAPPINGS, loaded.CLASS_NAMES
+
+
+def report_startup(seconds: float):
+    """Record the nodes.py load time and print a breakdown when over budget (or asked to)."""
+    global startup_seconds
+    startup_seconds = seconds
+    budget = import_budget_ms()
+    over_budget = seconds * 1000 > budget
+    if not (over_budget or _env_flag("COMFYUI_LOGICUTILS_IMPORT_REPORT")):
+        return
+    breakdown = ", ".join(f"{module} {elapsed * 1000:.0f} ms" for module, elapsed in import_times.items())
+    status = f"over the {budget:.0f} ms budget" if over_budget else f"budget {budget:.0f} ms"
+    print(f"{_PROGRESS} nodes loaded in {seconds * 1000:.0f} ms ({status}): {breakdown}")
+
+
+def import_report() -> dict:
+    return {
+        "startup_ms": None if startup_seconds is None else startup_seconds * 1000,
+        "budget_ms": import_budget_ms(),
+        "modules_ms": {module: elapsed * 1000 for module, elapsed in import_times.items()},
+        "deferred": [module for module in LAZY_MODULES if f"{__package__}.{module}" not in sys.modules],
+    }
+
+
+def describe_node(cls, display_name: str) -> dict:
+    input_types = cls.INPUT_TYPES()
+    return {
+        "display_name": display_name,
+        "inputs": list(input_types["required"]) + list(input_types.get("optional", {})),
+        "return_types": [str(return_type) for return_type in cls.RETURN_TYPES],
+    }
+
+
+def build_manifest(modules=NODE_MODULES) -> dict:
+    """
+    Import and fully validate each module, then describe its nodes; the result is what
+    gets written to the manifest. Raises like validate() does on an invalid node.
+    """
+    from .autonode import validate
+    entries = {}
+    for module in modules:
+        loaded = importlib.import_module(f"{__package__}.{module}")
+        validate(list(loaded.CLASS_MAPPINGS.values()), force=True)
+        entries[module] = {
+            "hash": source_hash(module),
+            "nodes": {
+                name: describe_node(loaded.CLASS_MAPPINGS[name], loaded.CLASS_NAMES[name])
+                for name in sorted(loaded.CLASS_NAMES)
+            },
+        }
+    return {"format": MANIFEST_FORMAT, "version": package_version(), "modules": entries}
+
+
+def write_manifest(manifest: dict, path: str = MANIFEST_PATH):
+    global _manifest
+    partial = path + ".partial"
+    with open(partial, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True, ensure_ascii=False)
+        f.write("\n")
+    os.replace(partial, path)
+    if path == MANIFEST_PATH:
+        _manifest = None
+        _hashes.clear()
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Regenerate node_manifest.json from the node modules.")
+    parser.add_argument("--check", action="store_true", help="exit 1 if the manifest is out of date, don't write")
+    args = parser.parse_args(argv)
+    manifest = build_manifest()
+    if args.check:
+        current = load_manifest()
+        stale = [module for module in NODE_MODULES if current["modules"].get(module) != manifest["modules"][module]]
+        if stale:
+            print(f"node_manifest.json is out of date for: {', '.join(stale)}")
+            return 1
+        print("node_manifest.json is up to date")
+        return 0
+    write_manifest(manifest)
+    count = sum(len(entry["nodes"]) for entry in manifest["modules"].values())
+    print(f"wrote {count} nodes from {len(manifest['modules'])} modules to {MANIFEST_PATH}")
+    return 0
+
+
+if __name__ == "__main__":
+    if not __package__:
+        # standalone use (python node_manifest.py): the repo folder name isn't importable,
+        # so expose it as a package for the relative imports inside the node modules
+        import types
+        package = types.ModuleType("comfyui_logicutils")
+        package.__path__ = [os.path.dirname(MANIFEST_PATH)]
+        sys.modules["comfyui_logicutils"] = package
+        sys.exit(importlib.import_module("comfyui_logicutils.node_manifest").main())
+    sys.exit(main())
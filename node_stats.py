@@ -0,0 +1,55 @@
+"""
+Node Stats: reports the per-node measurements collected by instrumentation.py
+(enabled with COMFYUI_LOGICUTILS_NODE_STATS=1).
+"""
+import json
+
+from . import instrumentation
+from .autonode import node_wrapper, get_node_names_mappings, validate, anytype
+
+stats_classes = []
+stats_node = node_wrapper(stats_classes)
+
+SORT_KEYS = ["wall_s", "cpu_s", "calls", "wall_max_s", "input_bytes", "output_bytes", "peak_rss_delta_bytes"]
+
+
+@stats_node
+class NodeStatsNode:
+    """
+    Returns the collected node statistics as JSON, slowest (by sort_by) first.
+    Connect trigger to the last node of a workflow to read the stats after it ran.
+    """
+    FUNCTION = "node_stats"
+    RETURN_TYPES = ("STRING",)
+    CATEGORY = "Misc"
+    custom_name = "Node Stats"
+
+    @classmethod
+    def IS_CHANGED(cls, *args, **kwargs):
+        return float("NaN")
+
+    @staticmethod
+    def node_stats(sort_by, top, reset, trigger=None):
+        nodes = instrumentation.snapshot(reset=reset)
+        ranked = sorted(nodes.items(), key=lambda item: item[1][sort_by], reverse=True)
+        if top > 0:
+            ranked = ranked[:top]
+        report = {"enabled": instrumentation.ENABLED, "nodes": dict(ranked)}
+        return (json.dumps(report, indent=1),)
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "sort_by": (SORT_KEYS,),
+                "top": ("INT", {"default": 20, "min": 0, "max": 1000}),
+                "reset": ("BOOLEAN", {"default": False}),
+            },
+            "optional": {
+                "trigger": (anytype,),
+            },
+        }
+
+
+CLASS_MAPPINGS, CLASS_NAMES = get_node_names_mappings(stats_classes)
+validate(stats_classes)
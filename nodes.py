@@ -1,4 +1,5 @@
 import os
+import time
 
 from .install import initialization
 
@@ -21,53 +22,42 @@ _SKIP_INSTALL = os.environ.get("COMFYUI_LOGICUTILS_SKIP_INSTALL", "").strip().lo
 if _IN_COMFYUI and not _SKIP_INSTALL:
     initialization()
 
-from .logic_gates import CLASS_MAPPINGS as LogicMapping, CLASS_NAMES as LogicNames
-from .randomness import CLASS_MAPPINGS as RandomMapping, CLASS_NAMES as RandomNames
-from .conversion import CLASS_MAPPINGS as ConversionMapping, CLASS_NAMES as ConversionNames
-from .math_nodes import CLASS_MAPPINGS as MathMapping, CLASS_NAMES as MathNames
-if _IN_COMFYUI:
-    from .io_node import CLASS_MAPPINGS as IOMapping, CLASS_NAMES as IONames
-else:
-    IOMapping = {}
-    IONames = {}
-from .auxilary import CLASS_MAPPINGS as AuxilaryMapping, CLASS_NAMES as AuxilaryNames
-from .external import CLASS_MAPPINGS as ExternalMapping, CLASS_NAMES as ExternalNames
-
+_load_started = time.perf_counter()
 
+from .node_manifest import load_nodes, report_startup
 
 NODE_CLASS_MAPPINGS = {
 }
-NODE_CLASS_MAPPINGS.update(IOMapping)
-NODE_CLASS_MAPPINGS.update(LogicMapping)
-NODE_CLASS_MAPPINGS.update(RandomMapping)
-NODE_CLASS_MAPPINGS.update(ConversionMapping)
-NODE_CLASS_MAPPINGS.update(MathMapping)
-NODE_CLASS_MAPPINGS.update(ExternalMapping)
-NODE_CLASS_MAPPINGS.update(AuxilaryMapping)
+NODE_DISPLAY_NAME_MAPPINGS = {
 
+}
 
 
-NODE_DISPLAY_NAME_MAPPINGS = {
+def _register(mappings, names):
+    NODE_CLASS_MAPPINGS.update(mappings)
+    NODE_DISPLAY_NAME_MAPPINGS.update(names)
 
-}
-NODE_DISPLAY_NAME_MAPPINGS.update(IONames)
-NODE_DISPLAY_NAME_MAPPINGS.update(LogicNames)
-NODE_DISPLAY_NAME_MAPPINGS.update(RandomNames)
-NODE_DISPLAY_NAME_MAPPINGS.update(ConversionNames)
-NODE_DISPLAY_NAME_MAPPINGS.update(MathNames)
-NODE_DISPLAY_NAME_MAPPINGS.update(ExternalNames)
-NODE_DISPLAY_NAME_MAPPINGS.update(AuxilaryNames)
+
+# io_node, external, auxilary and crypto are registered from node_manifest.json and
+# imported when one of their nodes is first used; see node_manifest.py
+if _IN_COMFYUI:
+    _register(*load_nodes("io_node", lazy=True))
+_register(*load_nodes("logic_gates"))
+_register(*load_nodes("randomness"))
+_register(*load_nodes("conversion"))
+_register(*load_nodes("math_nodes"))
+_register(*load_nodes("node_stats"))
+_register(*load_nodes("external", lazy=True))
+_register(*load_nodes("auxilary", lazy=True))
 
 
 try:
-    from .pystructure import CLASS_MAPPINGS as PyStructureMapping, CLASS_NAMES as PyStructureNames
-    NODE_CLASS_MAPPINGS.update(PyStructureMapping)
-    NODE_DISPLAY_NAME_MAPPINGS.update(PyStructureNames)
+    _register(*load_nodes("pystructure"))
 except Exception:
     pass
 try:
-    from .crypto import CLASS_MAPPINGS as SecureMapping, CLASS_NAMES as SecureNames
-    NODE_CLASS_MAPPINGS.update(SecureMapping)
-    NODE_DISPLAY_NAME_MAPPINGS.update(SecureNames)
+    _register(*load_nodes("crypto", lazy=True, requires=("Crypto",)))
 except Exception:
     pass
+
+report_startup(time.perf_counter() - _load_started)
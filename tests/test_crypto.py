@@ -1,4 +1,6 @@
+import base64
 import unittest
+from unittest.mock import patch
 
 import numpy as np
 import torch
@@ -36,3 +38,99 @@ class TestCryptoNodes(unittest.TestCase):
         self.assertTrue(torch.is_tensor(decrypted))
         self.assertEqual(tuple(decrypted.shape), tuple(img.shape))
         self.assertTrue(torch.allclose(decrypted, img, atol=1 / 255, rtol=0))
+
+    def test_batch_envelope_roundtrip_and_tamper_detection(self):
+        Encrypt = self.crypto.CLASS_MAPPINGS["SecureBase64Encrypt"]
+        Decrypt = self.crypto.CLASS_MAPPINGS["SecureWebPDecrypt"]
+        key = RSA.generate(1024)
+        private_pem = key.export_key().decode("utf-8")
+        public_pem = key.publickey().export_key().decode("utf-8")
+        self.assertIs(self.crypto.load_rsa_key(public_pem), self.crypto.load_rsa_key(public_pem.encode("utf-8")))
+
+        rng = np.random.default_rng(0)
+        arr = rng.integers(0, 256, size=(3, 6, 5, 3), dtype=np.uint8)
+        images = torch.from_numpy(arr.astype(np.float32) / 255.0)
+        encrypted = Encrypt().encrypted_base64(images, public_pem, encrypt_batch=True)[0]
+        decrypted = Decrypt().decrypt_image(encrypted, private_pem)[0]
+        self.assertEqual(tuple(decrypted.shape), (3, 6, 5, 3))
+        np.testing.assert_array_equal((decrypted.numpy() * 255).round().astype(np.uint8), arr)
+
+        # swapping two frame records must fail authentication
+        data = base64.b64decode(encrypted)
+        enc_key, records, codec = self.crypto.parse_envelope(data)
+        header_end = len(data) - sum(36 + len(r[2]) for r in records)
+        first = 36 + len(records[0][2])
+        second = 36 + len(records[1][2])
+        body = data[header_end:]
+        swapped = data[:header_end] + body[first : first + second] + body[:first] + body[first + second :]
+        with self.assertRaises(ValueError):
+            Decrypt().decrypt_image(base64.b64encode(swapped).decode("utf-8"), private_pem)
+
+    def test_decrypt_joins_envelopes_and_unwraps_each_key_once(self):
+        Encrypt = self.crypto.CLASS_MAPPINGS["SecureBase64Encrypt"]
+        Decrypt = self.crypto.CLASS_MAPPINGS["SecureWebPDecrypt"]
+        key = RSA.generate(1024)
+        private_pem = key.export_key().decode("utf-8")
+        public_pem = key.publickey().export_key().decode("utf-8")
+        batch = Encrypt().encrypted_base64(torch.rand(2, 4, 4, 3), public_pem, encrypt_batch=True)[0]
+        single = Encrypt().encrypted_base64(torch.rand(1, 8, 8, 3), public_pem)[0]
+
+        unwraps = []
+        original = self.crypto.PKCS1_OAEP.new
+
+        def counting_new(rsa_key):
+            cipher = original(rsa_key)
+            decrypt = cipher.decrypt
+            cipher.decrypt = lambda data: unwraps.append(data) or decrypt(data)
+            return cipher
+
+        with patch.object(self.crypto.PKCS1_OAEP, "new", side_effect=counting_new):
+            out = Decrypt().decrypt_image([batch, single, batch], private_pem)[0]
+        self.assertEqual(tuple(out.shape), (5, 4, 4, 3))
+        self.assertEqual(len(unwraps), 2)
+        self.assertTrue(torch.equal(out[0], out[3]))
+
+    def test_codec_is_recorded_in_envelope(self):
+        Encrypt = self.crypto.CLASS_MAPPINGS["SecureBase64Encrypt"]
+        Decrypt = self.crypto.CLASS_MAPPINGS["SecureWebPDecrypt"]
+        key = RSA.generate(1024)
+        public_pem = key.publickey().export_key().decode("utf-8")
+        arr = np.random.default_rng(1).integers(0, 256, size=(2, 5, 7, 3), dtype=np.uint8)
+        images = torch.from_numpy(arr.astype(np.float32) / 255.0)
+        encrypted = Encrypt().encrypted_base64(images, public_pem, codec="png", compress_level=1)[0]
+        self.assertEqual(self.crypto.parse_envelope(base64.b64decode(encrypted))[2], "png")
+        decrypted = Decrypt().decrypt_image(encrypted, key.export_key().decode("utf-8"))[0]
+        self.assertEqual(tuple(decrypted.shape), (1, 5, 7, 3))
+        np.testing.assert_array_equal((decrypted[0].numpy() * 255).round().astype(np.uint8), arr[0])
+
+    def test_streamed_file_roundtrip_through_save_and_load_nodes(self):
+        import os
+        import tempfile
+        from types import SimpleNamespace
+
+        key = RSA.generate(1024)
+        arr = np.random.default_rng(2).integers(0, 256, size=(3, 9, 6, 3), dtype=np.uint8)
+        images = torch.from_numpy(arr.astype(np.float32) / 255.0)
+        with tempfile.TemporaryDirectory() as root:
+            fake_paths = SimpleNamespace(
+                get_output_directory=lambda: root,
+                get_save_image_path=lambda prefix, output_dir, w, h: (output_dir, prefix, 1, "", prefix),
+            )
+            with patch.object(self.crypto, "folder_paths", fake_paths):
+                Save = self.crypto.CLASS_MAPPINGS["SecureEncryptedSaveNode"]
+                Load = self.crypto.CLASS_MAPPINGS["SecureEncryptedLoadNode"]
+                saved = Save().save_encrypted(images, key.publickey().export_key(), "enc", codec="png")
+                path = saved["result"][0]
+                self.assertEqual(os.path.basename(path), "enc_00001_.enc")
+                # tiny chunks exercise the chunked encrypt/decrypt paths
+                with open(path, "rb") as f:
+                    frames = list(self.crypto.iter_envelope_file(f, key, chunk_size=7))
+                np.testing.assert_array_equal(np.stack(frames), arr)
+                loaded = Load().load_encrypted("enc_00001_.enc", key.export_key())[0]
+                self.assertEqual(tuple(loaded.shape), (3, 9, 6, 3))
+                with self.assertRaises(RuntimeError):
+                    Load().load_encrypted("../outside.enc", key.export_key())
+                # commonpath raises ValueError for paths on different Windows drives
+                with patch.object(self.crypto.os.path, "commonpath", side_effect=ValueError("different drives")):
+                    with self.assertRaises(RuntimeError):
+                        Load().load_encrypted(os.path.join(root, "enc_00001_.enc"), key.export_key())
@@ -0,0 +1,31 @@
+import importlib.util
+import unittest
+
+import numpy as np
+
+from import_utils import import_local
+
+
+class TestImgIOCodec(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.codec = import_local("imgio.codec")
+
+    def test_lossless_roundtrip(self):
+        rng = np.random.default_rng(0)
+        array = rng.integers(0, 256, size=(7, 5, 3), dtype=np.uint8)
+        for name in ("webp", "png"):
+            np.testing.assert_array_equal(self.codec.decode(self.codec.encode(array, name, 1), name), array)
+
+    @unittest.skipUnless(importlib.util.find_spec("zstandard"), "zstandard not installed")
+    def test_zstd_roundtrip_keeps_shape(self):
+        array = np.arange(4 * 6 * 3, dtype=np.uint8).reshape(4, 6, 3)
+        payload = self.codec.encode(array, "zstd", 3)
+        np.testing.assert_array_equal(self.codec.decode(payload, "zstd"), array)
+
+    def test_benchmark_reports_every_available_codec(self):
+        frame = self.codec._sample_frame(32, 24)
+        results = self.codec.benchmark([frame], compress_levels=(1,), repeat=1)
+        names = {result["codec"] for result in results}
+        self.assertTrue({"webp", "png-1"} <= names)
+        self.assertTrue(all(result["bytes"] > 0 for result in results))
@@ -40,3 +40,19 @@ class TestImgIOConverter(unittest.TestCase):
         text = "hello world"
         b64 = IOConverter.string_to_base64(text, gzip_compress=True)
         self.assertEqual(IOConverter.read_maybe_gzip_base64(b64), text)
+
+    def test_inspect_shape_reads_shapes_and_headers(self):
+        IOConverter = self.converter.IOConverter
+        ten = torch.zeros((3, 5, 7, 4), dtype=torch.float32)
+        self.assertEqual(IOConverter.inspect_shape(ten), [(7, 5, 4)] * 3)
+        mask = np.zeros((2, 5, 7), dtype=np.float32)
+        self.assertEqual(IOConverter.inspect_shape(mask, mask=True), [(7, 5, 1)] * 2)
+        with self.assertRaises(ValueError):
+            IOConverter.inspect_shape(mask)
+        # width 3 mask batch vs. a 2x5 RGB image: same shape, the caller decides
+        narrow = np.zeros((2, 5, 3), dtype=np.float32)
+        self.assertEqual(IOConverter.inspect_shape(narrow, mask=True), [(3, 5, 1)] * 2)
+        self.assertEqual(IOConverter.inspect_shape(narrow), [(5, 2, 3)])
+        b64 = IOConverter.convert_to_base64(Image.new("RGB", (9, 4)), format="PNG")
+        self.assertEqual(IOConverter.inspect_shape(b64), [(9, 4, 3)])
+        self.assertEqual(IOConverter.inspect_shape([ten[0], b64])[1].width, 9)
@@ -0,0 +1,97 @@
+import io
+import unittest
+
+import numpy as np
+import torch
+from PIL import Image
+
+from import_utils import import_local
+
+
+class TestImgIOGrid(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.grid = import_local("imgio.grid")
+        cls.writer = import_local("imgio.writer")
+        cls.io_node = import_local("io_node")
+
+    def _stream_grid(self, images, direction, match_method):
+        sources = self.grid.grid_sources(images)
+        layout = self.grid.grid_layout(
+            [self.grid.image_size(s) for s in sources], direction, match_method
+        )
+        buffer = io.BytesIO()
+        with self.writer.PNGStripWriter(buffer, layout[0], layout[1], channels=4) as writer:
+            for strip in self.grid.iter_grid_strips(lambda i: sources[i], layout):
+                writer.write_rows(strip)
+        buffer.seek(0)
+        return Image.open(buffer)
+
+    def test_png_strip_writer_roundtrip(self):
+        rng = np.random.default_rng(0)
+        arr = rng.integers(0, 256, size=(7, 5, 4), dtype=np.uint8)
+        buffer = io.BytesIO()
+        with self.writer.PNGStripWriter(buffer, 5, 7, channels=4, text={"prompt": "{}"}) as writer:
+            writer.write_rows(arr[:3])
+            writer.write_rows(arr[3:])
+        buffer.seek(0)
+        out = Image.open(buffer)
+        self.assertEqual(out.info.get("prompt"), "{}")
+        np.testing.assert_array_equal(np.asarray(out), arr)
+
+    def test_png_strip_writer_rejects_short_image(self):
+        buffer = io.BytesIO()
+        with self.assertRaises(ValueError):
+            writer = self.writer.PNGStripWriter(buffer, 2, 2, channels=3)
+            writer.write_rows(np.zeros((1, 2, 3), dtype=np.uint8))
+            writer.close()
+
+    def test_streamed_grid_matches_concat_grid(self):
+        rng = np.random.default_rng(1)
+        images = torch.from_numpy(rng.random((5, 6, 4, 3), dtype=np.float32))
+        Concat = self.io_node.CLASS_MAPPINGS["ConcatGridNode"]
+        for direction in ("horizontal", "vertical", "square-like"):
+            expected = Concat.concat_grid(images, direction, "resize")[0][0]
+            streamed = self._stream_grid(images, direction, "resize")
+            composed = Image.alpha_composite(
+                Image.new("RGBA", streamed.size, (255, 255, 255, 255)), streamed
+            ).convert("RGB")
+            actual = torch.from_numpy(np.asarray(composed).astype(np.float32) / 255.0)
+            self.assertEqual(tuple(actual.shape), tuple(expected.shape))
+            self.assertTrue(torch.allclose(actual, expected, atol=1.5 / 255, rtol=0))
+
+    def test_strips_are_bounded_in_every_direction(self):
+        rng = np.random.default_rng(2)
+        # mixed sizes so both upscaling and downscaling bands are exercised; opaque, since
+        # un-premultiplying a translucent pixel would magnify the +-1 rounding slack
+        images = [
+            Image.fromarray(rng.integers(0, 256, size=(h, w, 3), dtype=np.uint8)).convert("RGBA")
+            for w, h in ((9, 23), (17, 7), (5, 40), (12, 12))
+        ]
+        for direction in ("horizontal", "vertical", "square-like"):
+            for match_method in ("resize", "pad"):
+                layout = self.grid.grid_layout([img.size for img in images], direction, match_method)
+                whole = np.concatenate(
+                    list(self.grid.iter_grid_strips(lambda i: images[i], layout, strip_rows=None))
+                )
+                strips = list(self.grid.iter_grid_strips(lambda i: images[i], layout, strip_rows=6))
+                self.assertTrue(all(strip.shape[0] <= 6 for strip in strips))
+                banded = np.concatenate(strips)
+                self.assertEqual(banded.shape, (layout[1], layout[0], 4))
+                diff = np.abs(banded.astype(np.int16) - whole.astype(np.int16))
+                self.assertLessEqual(int(diff.max()), 1, (direction, match_method))
+
+    def test_concat_grid_uses_grid_layout(self):
+        images = torch.rand(3, 5, 4, 3)
+        Concat = self.io_node.CLASS_MAPPINGS["ConcatGridNode"]
+        for direction in ("horizontal", "vertical", "square-like"):
+            for match_method in ("resize", "pad"):
+                width, height, _ = self.grid.grid_layout([(4, 5)] * 3, direction, match_method)
+                out = Concat.concat_grid(images, direction, match_method)[0]
+                self.assertEqual(tuple(out.shape), (1, height, width, 3))
+
+    def test_grid_layout_pad_keeps_original_sizes(self):
+        width, height, rows = self.grid.grid_layout([(4, 2), (3, 5)], "horizontal", "pad")
+        self.assertEqual((width, height), (7, 5))
+        self.assertEqual([cell[2:4] for cell in rows[0][1]], [(4, 2), (3, 5)])
+
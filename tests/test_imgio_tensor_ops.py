@@ -0,0 +1,113 @@
+import unittest
+
+import numpy as np
+import torch
+from PIL import Image, ImageFilter
+
+from import_utils import import_local
+
+
+class TestTensorOps(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.ops = import_local("imgio.tensor_ops")
+        cls.io_node = import_local("io_node")
+
+    def test_concat_matching_shapes_is_plain_cat(self):
+        a = torch.rand(2, 4, 3, 3)
+        b = torch.rand(2, 4, 5, 3)
+        out = self.ops.concat_pair(a, b, "horizontal", "resize")
+        self.assertTrue(torch.equal(out, torch.cat((a, b), dim=2)))
+
+    def test_concat_broadcasts_single_image(self):
+        a = torch.rand(1, 4, 3, 3)
+        b = torch.rand(3, 2, 3, 3)
+        out = self.ops.concat_pair(a, b, "vertical", "pad")
+        self.assertEqual(tuple(out.shape), (3, 6, 3, 3))
+        self.assertTrue(torch.equal(out[2, :4], a[0]))
+
+    def test_concat_pad_fills_white(self):
+        a = torch.zeros(1, 4, 2, 3)
+        b = torch.zeros(1, 2, 2, 3)
+        out = self.ops.concat_pair(a, b, "horizontal", "pad")
+        self.assertEqual(tuple(out.shape), (1, 4, 4, 3))
+        self.assertTrue(torch.all(out[0, 2:, 2:] == 1.0))
+        self.assertTrue(torch.all(out[0, :2, 2:] == 0.0))
+
+    def test_concat_resize_matches_pil_shape(self):
+        a = torch.rand(1, 8, 6, 3)
+        b = torch.rand(1, 4, 5, 3)
+        Node = self.io_node.CLASS_MAPPINGS["ConcatTwoImagesNode"]
+        out = Node.concat_two_images(a, b, "horizontal", "resize")[0]
+        self.assertEqual(tuple(out.shape), (1, 8, 16, 3))
+
+    def test_concat_rejects_mismatched_batches(self):
+        with self.assertRaises(RuntimeError):
+            self.ops.concat_pair(torch.rand(2, 2, 2, 3), torch.rand(3, 2, 2, 3))
+
+    def test_rotate_right_angles_match_pil(self):
+        image = torch.rand(2, 4, 6, 3)
+        for angle in (90, 180, 270, -90):
+            out = self.ops.rotate(image, angle, expand=True)
+            expected = torch.from_numpy(
+                np.array(Image.fromarray(image[1].numpy()[..., 0]).rotate(angle, expand=True))
+            )
+            self.assertTrue(torch.equal(out[1, ..., 0], expected))
+        self.assertIs(self.ops.rotate(image, 360), image)
+
+    def test_rotate_without_expand_keeps_canvas(self):
+        image = torch.rand(3, 4, 6, 3)
+        self.assertEqual(tuple(self.ops.rotate(image, 90).shape), (3, 4, 6, 3))
+        self.assertEqual(tuple(self.ops.rotate(image, 30).shape), (3, 4, 6, 3))
+        self.assertEqual(tuple(self.ops.rotate(image, 45, expand=True).shape), (3, 8, 8, 3))
+
+    def test_rotate_expand_size_matches_pil(self):
+        for (width, height), angle in (((60, 40), 30), ((6, 4), 45), ((33, 17), 12.5), ((40, 60), 200)):
+            image = torch.rand(1, height, width, 3)
+            expected = Image.new("RGB", (width, height)).rotate(angle, expand=True).size
+            out = self.ops.rotate(image, angle, expand=True)
+            self.assertEqual((out.shape[2], out.shape[1]), expected, (width, height, angle))
+
+    def test_rotate_arbitrary_angle_matches_pil(self):
+        # a smooth gradient keeps interpolation differences between torch and PIL small
+        y, x = torch.meshgrid(torch.linspace(0, 1, 32), torch.linspace(0, 1, 48), indexing="ij")
+        image = torch.stack((x, y, x * y), dim=-1).unsqueeze(0)
+        out = self.ops.rotate(image, 30, fill=1.0)[0]
+        pil = Image.fromarray((image[0].numpy() * 255).round().astype(np.uint8))
+        expected = np.asarray(pil.rotate(30, resample=Image.BILINEAR, fillcolor=(255, 255, 255)))
+        center = (out[8:24, 12:36].numpy() * 255) - expected[8:24, 12:36]
+        self.assertLess(np.abs(center).max(), 3)
+
+    def test_compose_rgba_broadcasts_and_inverts(self):
+        image = torch.rand(3, 4, 5, 3)
+        mask = torch.rand(4, 5)
+        out = self.ops.compose_rgba(image, mask, invert=True)
+        self.assertEqual(tuple(out.shape), (3, 4, 5, 4))
+        self.assertTrue(torch.equal(out[..., :3], image))
+        self.assertTrue(torch.allclose(out[2, ..., 3], 1.0 - mask))
+
+    def test_compose_rgba_resizes_mask_and_writes_in_place(self):
+        image = torch.rand(2, 8, 8, 4)
+        out = self.ops.compose_rgba(image, torch.ones(2, 4, 4, 1), out=image)
+        self.assertIs(out, image)
+        self.assertTrue(torch.all(image[..., 3] == 1.0))
+        with self.assertRaises(ValueError):
+            self.ops.compose_rgba(image, torch.ones(3, 8, 8))
+
+    def test_gaussian_blur_matches_pil_visually(self):
+        y, x = torch.meshgrid(torch.arange(160), torch.arange(200), indexing="ij")
+        image = (((x // 20 + y // 20) % 2).float()).unsqueeze(-1).repeat(1, 1, 3).unsqueeze(0)
+        out = self.ops.gaussian_blur(image, 12)
+        pil = Image.fromarray((image[0].numpy() * 255).astype(np.uint8))
+        expected = np.asarray(pil.filter(ImageFilter.GaussianBlur(radius=12)), dtype=np.float32) / 255.0
+        self.assertEqual(tuple(out.shape), tuple(image.shape))
+        self.assertLess(np.abs(out[0].numpy() - expected)[20:-20, 20:-20].mean(), 0.03)
+
+    def test_censor_only_touches_selected_images(self):
+        images = torch.rand(3, 32, 48, 3)
+        out = self.ops.censor(images, [False, True, False], "pixelate")
+        self.assertTrue(torch.equal(out[0], images[0]))
+        self.assertFalse(torch.equal(out[1], images[1]))
+        self.assertLessEqual(torch.unique(out[1, ..., 0]).numel(), 8 * 12)
+        self.assertIs(self.ops.censor(images, [False] * 3, "white"), images)
+        self.assertTrue(torch.all(self.ops.censor(images, [True] * 3, "white") == 1.0))
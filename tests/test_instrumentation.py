@@ -0,0 +1,105 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from import_utils import import_local
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.instrumentation = import_local("instrumentation")
+        self.instrumentation.snapshot(reset=True)
+
+    def make_node(self):
+        class ScaleNode:
+            FUNCTION = "scale"
+            RETURN_TYPES = ("IMAGE",)
+
+            @staticmethod
+            def scale(image, factor):
+                if factor < 0:
+                    raise ValueError("negative factor")
+                return (np.concatenate([image] * factor),)
+        return ScaleNode
+
+    def test_calls_are_recorded_with_tensor_bytes(self):
+        node = self.instrumentation.instrument(self.make_node())
+        image = np.zeros((1, 8, 8, 3), dtype=np.float32)
+        node().scale(image=image, factor=2)
+        node.scale(image, 1)
+        with self.assertRaises(ValueError):
+            node().scale(image=image, factor=-1)
+
+        stats = self.instrumentation.snapshot()["ScaleNode"]
+        self.assertEqual(stats["calls"], 3)
+        self.assertEqual(stats["errors"], 1)
+        self.assertEqual(stats["input_bytes"], 3 * image.nbytes)
+        self.assertEqual(stats["output_bytes"], 3 * image.nbytes)
+        self.assertGreaterEqual(stats["cpu_s"], 0.0)
+        self.assertGreater(stats["wall_s"], 0.0)
+        self.assertAlmostEqual(stats["wall_mean_s"], stats["wall_s"] / 3)
+
+    def test_subclass_of_instrumented_node_is_recorded_once(self):
+        parent = self.instrumentation.instrument(self.make_node())
+        child = self.instrumentation.instrument(type("ChildScaleNode", (parent,), {}))
+        child.scale(np.zeros(4, dtype=np.uint8), 1)
+
+        stats = self.instrumentation.snapshot()
+        self.assertEqual(set(stats), {"ChildScaleNode"})
+        self.assertEqual(stats["ChildScaleNode"]["input_bytes"], 4)
+
+    def test_async_function_records_wall_time(self):
+        class FetchNode:
+            FUNCTION = "fetch"
+
+            async def fetch(self, latent):
+                await asyncio.sleep(0.01)
+                return ({"samples": latent["samples"]},)
+
+        node = self.instrumentation.instrument(FetchNode)
+        latent = {"samples": np.zeros((2, 4, 8, 8), dtype=np.float32)}
+        asyncio.run(node().fetch(latent=latent))
+
+        stats = self.instrumentation.snapshot()["FetchNode"]
+        self.assertGreaterEqual(stats["wall_s"], 0.01)
+        self.assertEqual(stats["cpu_s"], 0.0)
+        self.assertEqual(stats["output_bytes"], latent["samples"].nbytes)
+
+    def test_node_wrapper_leaves_classes_alone_when_disabled(self):
+        autonode = import_local("autonode")
+        container = []
+        node_class = self.make_node()
+        original = node_class.__dict__["scale"]
+        with mock.patch.object(self.instrumentation, "ENABLED", False):
+            autonode.node_wrapper(container)(node_class)
+        self.assertIs(node_class.__dict__["scale"], original)
+        with mock.patch.object(self.instrumentation, "ENABLED", True):
+            autonode.node_wrapper(container)(node_class)
+        self.assertTrue(hasattr(node_class.__dict__["scale"].__func__, "__node_stats_original__"))
+
+    def test_node_stats_node_and_dump(self):
+        node_stats = import_local("node_stats")
+        node = self.instrumentation.instrument(self.make_node())
+        node.scale(np.zeros(16, dtype=np.uint8), 3)
+        node.scale(np.zeros(16, dtype=np.uint8), 1)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "stats", "nodes.json")
+            self.instrumentation.dump(path)
+            with open(path, "r", encoding="utf-8") as f:
+                dumped = json.load(f)
+        self.assertEqual(dumped["nodes"]["ScaleNode"]["calls"], 2)
+
+        (text,) = node_stats.NodeStatsNode.node_stats("output_bytes", 5, True)
+        self.assertEqual(json.loads(text)["nodes"]["ScaleNode"]["output_bytes"], 64)
+        (text,) = node_stats.NodeStatsNode.node_stats("wall_s", 0, False)
+        self.assertNotIn("ScaleNode", json.loads(text)["nodes"])
+
+
+if __name__ == "__main__":
+    unittest.main()
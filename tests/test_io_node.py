@@ -0,0 +1,101 @@
+import unittest
+
+import torch
+
+from import_utils import import_local
+
+
+class TestIONodes(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.io_node = import_local("io_node")
+
+    def test_get_image_info_handles_batches(self):
+        Node = self.io_node.CLASS_MAPPINGS["GetImageInfoNode"]
+        self.assertEqual(Node.get_image_info(torch.zeros(2, 6, 10, 3)), (10, 6, 60, "10x6\n10x6"))
+
+    def test_get_image_info_lists_every_size_of_a_mixed_list(self):
+        from PIL import Image
+        Node = self.io_node.CLASS_MAPPINGS["GetImageInfoNode"]
+        images = [torch.zeros(1, 6, 10, 3), Image.new("RGB", (7, 3)), torch.zeros(4, 5, 3)]
+        width, height, pixels, sizes = Node.get_image_info(images)
+        self.assertEqual((width, height, pixels), (10, 6, 60))
+        self.assertEqual(sizes.splitlines(), ["10x6", "7x3", "5x4"])
+
+    def test_resize_if_bigger_early_exit_keeps_tensor(self):
+        Node = self.io_node.CLASS_MAPPINGS["ResizeImageResolutionIfBigger"]
+        image = torch.rand(2, 8, 8, 3)
+        out = Node.resize_image_resolution_if_bigger(image, 512, "LANCZOS")[0]
+        self.assertIs(out, image)
+
+    def test_resize_ensuring_multiple_early_exit(self):
+        Node = self.io_node.CLASS_MAPPINGS["ResizeImageEnsuringMultiple"]
+        image = torch.rand(1, 64, 32, 4)
+        out = Node.resize_image_ensuring_multiple(image, 32, "NEAREST")[0]
+        self.assertEqual(tuple(out.shape), (1, 64, 32, 3))
+
+    def test_size_check_skips_inputs_that_are_not_in_memory(self):
+        from unittest import mock
+
+        converter = self.io_node.PILHandlingHodes
+        with mock.patch.object(converter, "inspect_shape") as inspect:
+            self.assertFalse(self.io_node._all_sizes("https://example.com/a.png", lambda w, h: True))
+            self.assertFalse(self.io_node._all_sizes([torch.zeros(1, 4, 4, 3), "a.png"], lambda w, h: True))
+        inspect.assert_not_called()
+        # unreadable shapes fall through to the normal path, other errors propagate
+        self.assertFalse(self.io_node._all_sizes(torch.zeros(2, 5, 7), lambda w, h: True))
+        with mock.patch.object(converter, "inspect_shape", side_effect=RuntimeError("boom")):
+            with self.assertRaises(RuntimeError):
+                self.io_node._all_sizes(torch.zeros(1, 4, 4, 3), lambda w, h: True)
+
+    def test_async_url_downloads_overlap(self):
+        import asyncio
+        import time
+        from unittest.mock import patch
+
+        from PIL import Image
+
+        Node = self.io_node.CLASS_MAPPINGS["ImageFromURLNode"]
+
+        def slow_download(url):
+            time.sleep(0.3)
+            return Image.new("RGB", (2, 2))
+
+        async def both():
+            return await asyncio.gather(
+                Node.url_download_async("http://a/1.png"), Node.url_download_async("http://b/2.png")
+            )
+
+        with patch.object(self.io_node.PILHandlingHodes, "handle_input", side_effect=slow_download):
+            start = time.perf_counter()
+            results = asyncio.run(both())
+            elapsed = time.perf_counter() - start
+        self.assertLess(elapsed, 0.55)
+        self.assertEqual(tuple(results[1][0].shape), (1, 2, 2, 3))
+
+    def test_async_function_is_selected_only_when_comfy_awaits_it(self):
+        import sys
+        import types
+        from unittest.mock import patch
+
+        autonode = import_local("autonode")
+        execution = types.ModuleType("execution")
+
+        async def _async_map_node_over_list(*args):
+            pass
+
+        execution._async_map_node_over_list = _async_map_node_over_list
+        with patch.dict("os.environ", {"COMFYUI_LOGICUTILS_ASYNC": "auto"}):
+            self.assertFalse(autonode.comfy_supports_async())
+            with patch.dict(sys.modules, {"execution": execution}):
+                self.assertTrue(autonode.comfy_supports_async())
+
+        class Probe:
+            FUNCTION = "run"
+
+            def run(self, value):
+                return (value,)
+
+        with patch.dict("os.environ", {"COMFYUI_LOGICUTILS_ASYNC": "0"}):
+            self.assertEqual(autonode.async_io_node(Probe).FUNCTION, "run")
+        self.assertTrue(hasattr(Probe, "run_async"))
@@ -0,0 +1,124 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+from unittest import mock
+
+from import_utils import import_local
+
+
+class TestNodeManifest(unittest.TestCase):
+    def setUp(self):
+        self.manifest = import_local("node_manifest")
+
+    def test_manifest_matches_node_modules(self):
+        # fails after adding or renaming nodes: run `python node_manifest.py`
+        built = self.manifest.build_manifest()
+        self.assertEqual(self.manifest.load_manifest(), built)
+
+    def test_proxy_imports_on_first_use_and_keeps_assigned_attributes(self):
+        logic_gates = import_local("logic_gates")
+        proxy = self.manifest.lazy_class("logic_gates", "LogicGateCompare")
+        proxy.RELATIVE_PYTHON_MODULE = "custom_nodes.logicutils"
+        with self.assertRaises(AttributeError):
+            proxy.__wrapped__
+        self.assertFalse(self.manifest.is_loaded(proxy))
+
+        instance = proxy()
+        self.assertIsInstance(instance, logic_gates.LogicGateCompare)
+        self.assertTrue(self.manifest.is_loaded(proxy))
+        self.assertEqual(logic_gates.LogicGateCompare.RELATIVE_PYTHON_MODULE, "custom_nodes.logicutils")
+        self.assertEqual(proxy.FUNCTION, logic_gates.LogicGateCompare.FUNCTION)
+        self.assertEqual(proxy.INPUT_TYPES(), logic_gates.LogicGateCompare.INPUT_TYPES())
+
+    def test_stale_entry_falls_back_to_import(self):
+        conversion = import_local("conversion")
+        names = dict(conversion.CLASS_NAMES)
+        nodes = {name: {"display_name": display} for name, display in names.items()}
+        current = {"modules": {"conversion": {"hash": self.manifest.source_hash("conversion"), "nodes": nodes}}}
+        stale = {"modules": {"conversion": {"hash": "0" * 64, "nodes": {}}}}
+
+        with mock.patch.object(self.manifest, "_manifest", current):
+            mappings, display = self.manifest.load_nodes("conversion", lazy=True)
+        self.assertEqual(display, names)
+        self.assertTrue(all(isinstance(cls, self.manifest.LazyNodeMeta) for cls in mappings.values()))
+
+        with mock.patch.object(self.manifest, "_manifest", stale), mock.patch("builtins.print"):
+            mappings, display = self.manifest.load_nodes("conversion", lazy=True)
+        self.assertIs(mappings, conversion.CLASS_MAPPINGS)
+
+    def test_manifest_is_version_stamped(self):
+        manifest = self.manifest.load_manifest()
+        self.assertEqual(manifest["version"], self.manifest.package_version())
+        self.assertEqual(set(manifest["modules"]), set(self.manifest.NODE_MODULES))
+        compare = manifest["modules"]["logic_gates"]["nodes"]["LogicGateCompare"]
+        self.assertEqual(compare["return_types"], ["BOOLEAN"])
+        self.assertEqual(compare["inputs"], ["input1", "input2"])
+
+        with mock.patch.object(self.manifest, "_manifest", None), \
+                mock.patch.object(self.manifest, "package_version", return_value="0.0.0-other"):
+            self.assertEqual(self.manifest.load_manifest()["modules"], {})
+            self.assertFalse(self.manifest.validated_by_manifest("logic_gates"))
+
+    def test_validate_skipped_only_for_unchanged_modules(self):
+        autonode = import_local("autonode")
+        logic_gates = import_local("logic_gates")
+
+        class Broken:
+            __module__ = logic_gates.__name__
+            custom_name = "Broken"
+
+        # the module source matches the manifest, so validate trusts it
+        with mock.patch.dict(os.environ, {"COMFYUI_LOGICUTILS_DEV": ""}):
+            autonode.validate([Broken])
+        for forced in ({"force": True}, {}):
+            env = {} if forced else {"COMFYUI_LOGICUTILS_DEV": "1"}
+            with mock.patch.dict(os.environ, env), self.assertRaises(Exception):
+                autonode.validate([Broken], **forced)
+        with mock.patch.dict(self.manifest._hashes, {"logic_gates": "0" * 64}), self.assertRaises(Exception):
+            autonode.validate([Broken])
+
+    def test_load_nodes_starts_tagger_preload_when_set(self):
+        tagger = import_local("utils.tagger")
+        with mock.patch.object(tagger, "start_preload") as start_preload:
+            with mock.patch.dict(os.environ, {"COMFYUI_LOGICUTILS_TAGGER_PRELOAD": ""}):
+                self.manifest.load_nodes("auxilary", lazy=True)
+            start_preload.assert_not_called()
+            with mock.patch.dict(os.environ, {"COMFYUI_LOGICUTILS_TAGGER_PRELOAD": "SwinV2"}):
+                mappings, _ = self.manifest.load_nodes("auxilary", lazy=True)
+            start_preload.assert_called_once_with()
+        self.assertIn("GetAllTagsAboveThresholdNode", mappings)
+
+    def test_missing_requirement_drops_module(self):
+        with self.assertRaises(ModuleNotFoundError):
+            self.manifest.load_nodes("crypto", lazy=True, requires=("no_such_package_logicutils",))
+
+    def test_nodes_import_stays_light_and_within_budget(self):
+        # fresh interpreter: other tests have already imported torch in this one
+        script = (
+            "import json, sys\n"
+            "from import_utils import import_local\n"
+            "import_local('nodes')\n"
+            "report = import_local('node_manifest').import_report()\n"
+            "heavy = [name for name in ('torch', 'PIL', 'requests', 'Crypto', 'imgutils') if name in sys.modules]\n"
+            "print(json.dumps({'report': report, 'heavy': heavy}))\n"
+        )
+        env = dict(os.environ, COMFYUI_LOGICUTILS_IMPORT_BUDGET_MS="1000")
+        env.pop("COMFYUI_LOGICUTILS_IMPORT_REPORT", None)
+        output = subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        self.assertEqual(result["heavy"], [])
+        self.assertLess(result["report"]["startup_ms"], result["report"]["budget_ms"])
+        self.assertIn("auxilary", result["report"]["deferred"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,324 @@
+import os
+import subprocess
+import sys
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import torch
+from PIL import Image
+
+from import_utils import import_local
+
+
+def fake_wd14_tags(image, model_name=None, **kwargs):
+    rating = {"general": 0.2, "sensitive": 0.7, "questionable": 0.05, "explicit": 0.05}
+    features = {"long_hair": 0.9, "smile": 0.5, "hat": 0.1}
+    chars = {"hatsune_miku": 0.9, "kagamine_rin": 0.6, "someone_else": 0.02}
+    return rating, features, chars
+
+
+def baseline_get_tags(raw, threshold, replace):
+    """get_tags as it was on top of imgutils: get_wd14_tags cutoffs, then the node threshold."""
+    rating, features, chars = raw
+    features = {tag: score for tag, score in features.items() if score > 0.35}
+    chars = {tag: score for tag, score in chars.items() if score > 0.85}
+    result = {
+        "rating": max(rating, key=rating.get),
+        "tags": [tag for tag, score in features.items() if score > threshold],
+        "chars": [tag for tag, score in chars.items() if score > threshold],
+    }
+    if replace:
+        result["tags"] = [tag.replace("_", " ") for tag in result["tags"]]
+        result["chars"] = [tag.replace("_", " ") for tag in result["chars"]]
+    return result
+
+
+def fake_infer_batch(images, model_name):
+    TagScores = import_local("utils.tagger").TagScores
+    return [TagScores.from_dicts(*fake_wd14_tags(image)) for image in images]
+
+
+class TestTagger(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tagger = import_local("utils.tagger")
+        cls.auxilary = import_local("auxilary")
+
+    def setUp(self):
+        self.tagger.score_cache.clear()
+
+    def test_nodes_share_one_inference_per_image_and_model(self):
+        image = torch.rand(1, 8, 8, 3)
+        nodes = self.auxilary.CLASS_MAPPINGS
+        with patch.object(self.tagger, "_infer_batch", side_effect=fake_infer_batch) as fake:
+            self.assertEqual(nodes["GetRatingNode"].get_rating_class(image, "SwinV2"), ("sensitive",))
+            tags = nodes["GetTagsAboveThresholdNode"].get_tags_above_threshold(image, 0.4, True, "SwinV2")
+            chars = nodes["GetCharactersAboveThresholdNode"].get_tags_above_threshold(image, 0.4, False, "SwinV2")
+            self.assertEqual(fake.call_count, 1)
+            nodes["GetRatingNode"].get_rating_class(image, "ViT")
+            self.assertEqual(fake.call_count, 2)
+        self.assertEqual(tags, ("long hair, smile",))
+        self.assertEqual(chars, ("hatsune_miku",))
+
+    def test_pil_inputs_are_cached_too(self):
+        image = Image.new("RGB", (4, 4))
+        with patch.object(self.tagger, "_infer_batch", side_effect=fake_infer_batch) as fake:
+            self.tagger.get_tags(image, model_name="SwinV2")
+            self.tagger.get_tags(image.copy(), threshold=0.01, model_name="SwinV2")
+        self.assertEqual(fake.call_count, 1)
+
+    def test_path_inputs_close_their_file(self):
+        import builtins
+        import tempfile
+        opened = []
+        open_file = builtins.open
+
+        def tracking_open(*args, **kwargs):
+            opened.append(open_file(*args, **kwargs))
+            return opened[-1]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            # animated GIFs keep their file open after load() so they can seek to other frames
+            path = os.path.join(tmp, "frames.gif")
+            frames = [Image.new("RGB", (4, 4), color) for color in ("red", "blue")]
+            frames[0].save(path, save_all=True, append_images=frames[1:])
+            with patch.object(self.tagger, "_infer_batch", side_effect=fake_infer_batch), \
+                    patch("builtins.open", side_effect=tracking_open):
+                self.tagger.get_raw_scores(path, "SwinV2")
+            self.assertTrue(opened)
+            self.assertTrue(all(f.closed for f in opened))
+
+    def test_batch_runs_one_inference_and_joins_results(self):
+        images = torch.rand(3, 8, 8, 3)
+        Node = self.auxilary.CLASS_MAPPINGS["GetAllTagsAboveThresholdNode"]
+        with patch.object(self.tagger, "_infer_batch", side_effect=fake_infer_batch) as fake:
+            joined = Node.get_tags(images, 0.4, False, "SwinV2")[0]
+        self.assertEqual(fake.call_count, 1)
+        self.assertEqual(len(fake.call_args[0][0]), 3)
+        self.assertIsInstance(joined, str)
+        self.assertEqual(joined.split("\n"), ["sensitive, long_hair, smile, hatsune_miku"] * 3)
+        for name, node in self.auxilary.CLASS_MAPPINGS.items():
+            # STRING outputs carry one str; no node returns a Python list there
+            self.assertNotIn("batch_output", node.INPUT_TYPES().get("optional", {}), name)
+
+    def test_preprocess_batch_matches_pil_preprocessing(self):
+        rng = np.random.default_rng(0)
+        arr = rng.integers(0, 256, size=(6, 10, 3), dtype=np.uint8)
+        images = torch.from_numpy(arr.astype(np.float32) / 255.0).unsqueeze(0).repeat(2, 1, 1, 1)
+        out = self.tagger.preprocess_batch(images, 10)
+        self.assertEqual(out.shape, (2, 10, 10, 3))
+        padded = Image.new("RGB", (10, 10), (255, 255, 255))
+        padded.paste(Image.fromarray(arr), (0, 2))
+        expected = np.asarray(padded, dtype=np.float32)[:, :, ::-1]
+        np.testing.assert_allclose(out[1], expected, atol=1)
+
+    def test_score_cache_evicts_by_bytes(self):
+        cache = self.tagger.ScoreCache(max_bytes=100)
+        cache.put("a", 1, 60)
+        cache.put("b", 2, 30)
+        self.assertEqual(cache.get("a"), 1)  # "b" becomes least recently used
+        cache.put("c", 3, 30)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.current_bytes, 90)
+        cache.put("huge", 4, 1000)
+        self.assertIsNone(cache.get("huge"))
+
+    def test_session_pool_is_bounded_and_loads_once(self):
+        pool = self.tagger.TaggerSessionPool(max_models=2, idle_seconds=0)
+        with patch.object(pool, "_create_session", side_effect=lambda name: object()) as create:
+            first = pool.get("SwinV2")
+            self.assertIs(pool.get("SwinV2"), first)
+            pool.get("ViT")
+            pool.get("MOAT")
+        self.assertEqual(create.call_count, 3)
+        self.assertEqual(pool.loaded(), ["ViT", "MOAT"])
+
+    def test_session_pool_evicts_idle_sessions(self):
+        pool = self.tagger.TaggerSessionPool(max_models=2, idle_seconds=0)
+        with patch.object(pool, "_create_session", side_effect=lambda name: object()):
+            pool.get("SwinV2")
+        pool.idle_seconds = 10
+        with patch.object(self.tagger.time, "monotonic", return_value=self.tagger.time.monotonic() + 60):
+            pool.evict_idle()
+        self.assertEqual(pool.loaded(), [])
+
+    def test_thresholds_match_get_wd14_tags_path(self):
+        rng = np.random.default_rng(0)
+        names = [f"tag_{i}" for i in range(40)]
+        raw = (
+            {"general": 0.1, "sensitive": 0.3, "questionable": 0.5, "explicit": 0.1},
+            dict(zip(names[:25], rng.random(25).tolist())),
+            dict(zip(names[25:], rng.random(15).tolist())),
+        )
+
+        def infer(images, model_name):
+            return [self.tagger.TagScores.from_dicts(*raw) for _ in images]
+
+        image, batch = Image.new("RGB", (4, 4)), torch.rand(1, 4, 4, 3)
+        with patch.object(self.tagger, "_infer_batch", side_effect=infer):
+            for threshold in (0.0, 0.2, 0.35, 0.4, 0.6, 0.85, 0.95):
+                for replace in (False, True):
+                    expected = baseline_get_tags(raw, threshold, replace)
+                    self.assertEqual(self.tagger.get_tags(image, threshold, replace), expected)
+                    self.assertEqual(self.tagger.get_tags_batch(batch, threshold, replace), [expected])
+
+    def test_tagger_import_is_lazy(self):
+        # fresh interpreter, with a finder recording any attempt to import the ONNX stack
+        script = (
+            "import sys\n"
+            "attempts = []\n"
+            "class Recorder:\n"
+            "    def find_spec(self, name, path=None, target=None):\n"
+            "        if name.split('.')[0] in ('imgutils', 'onnxruntime', 'onnx'):\n"
+            "            attempts.append(name)\n"
+            "        return None\n"
+            "sys.meta_path.insert(0, Recorder())\n"
+            "from import_utils import import_local\n"
+            "import_local('auxilary')\n"
+            "print(attempts)\n"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        self.assertEqual(output.strip().splitlines()[-1], "[]")
+
+    def test_session_providers_prefer_gpu_and_fall_back_to_cpu(self):
+        select = self.tagger.select_providers
+        available = ["TensorrtExecutionProvider", "CUDAExecutionProvider", "CPUExecutionProvider"]
+        self.assertEqual(select(available), ["CUDAExecutionProvider", "CPUExecutionProvider"])
+        self.assertEqual(select(["CPUExecutionProvider"]), ["CPUExecutionProvider"])
+        self.assertEqual(select(available, ["CPUExecutionProvider"]), ["CPUExecutionProvider"])
+        with patch.dict(os.environ, {"COMFYUI_LOGICUTILS_TAGGER_PROVIDERS": "TensorrtExecutionProvider, CUDAExecutionProvider"}):
+            self.assertEqual(select(available), available)
+
+    def test_tag_scores_vectorized_views(self):
+        scores = self.tagger.TagScores.from_dicts(*fake_wd14_tags(None))
+        self.assertEqual(scores.rating(), "sensitive")
+        self.assertEqual(scores.above(0.05), ["long_hair", "smile", "hat"])
+        self.assertEqual(scores.above(0.05, top_k=2, replace=True), ["long hair", "smile"])
+        # highest first whether or not top_k truncates
+        self.assertEqual(scores.above(0.01, category="character", top_k=5), ["hatsune_miku", "kagamine_rin", "someone_else"])
+        self.assertEqual(scores.above(0.3, category="rating", top_k=5), ["sensitive"])
+        self.assertEqual(scores.above(0.01, category="rating", top_k=4), ["sensitive", "general", "questionable", "explicit"])
+        self.assertEqual(scores.above(0.01, category="character"), ["hatsune_miku", "kagamine_rin", "someone_else"])
+        rating, features, chars = scores.as_dicts()
+        self.assertAlmostEqual(features["smile"], 0.5)
+        self.assertEqual(len(scores.scores), 10)
+
+    def test_censor_decides_per_image_from_one_batch_call(self):
+        TagScores = self.tagger.TagScores
+        ratings = [
+            {"general": 0.9, "sensitive": 0.1, "questionable": 0.0, "explicit": 0.0},
+            {"general": 0.0, "sensitive": 0.1, "questionable": 0.2, "explicit": 0.7},
+        ]
+
+        def infer(images, model_name):
+            return [TagScores.from_dicts(rating, {}, {}) for rating in ratings[: len(images)]]
+
+        images = torch.rand(2, 16, 16, 3)
+        Node = self.auxilary.CLASS_MAPPINGS["CensorImageByRating"]
+        with patch.object(self.tagger, "_infer_batch", side_effect=infer) as fake:
+            out = Node.censor_image(images, "sensitive", "white", "SwinV2")[0]
+        self.assertEqual(fake.call_count, 1)
+        self.assertTrue(torch.equal(out[0], images[0]))
+        self.assertTrue(torch.all(out[1] == 1.0))
+
+    def test_tag_folder_resumes_from_jsonl_checkpoint(self):
+        import json
+        import tempfile
+        from types import SimpleNamespace
+
+        labels = self.tagger.LabelIndex(["general", "explicit", "long_hair", "miku"], [0, 1], [2], [3])
+
+        class FakeModel:
+            def get_inputs(self):
+                return [SimpleNamespace(name="input", shape=["batch", 8, 8, 3])]
+
+            def get_outputs(self):
+                return [SimpleNamespace(name="output")]
+
+            def run(self, names, feed):
+                batch = feed["input"].shape[0]
+                return [np.tile(np.array([[0.9, 0.1, 0.8, 0.2]], dtype=np.float32), (batch, 1))]
+
+        with tempfile.TemporaryDirectory() as root:
+            for i in range(3):
+                Image.new("RGB", (12, 6), (i, i, i)).save(os.path.join(root, f"{i}.png"))
+            output = os.path.join(root, "tags.jsonl")
+            with patch.object(self.tagger.session_pool, "get", return_value=FakeModel()), \
+                    patch.object(self.tagger, "get_label_index", return_value=labels):
+                stats = self.tagger.tag_folder(root, output, batch_size=2, workers=1, log=lambda *a: None)
+                self.assertEqual(stats["tagged"], 3)
+                # simulate an interrupted write of the last record
+                with open(output, "rb") as f:
+                    lines = f.read().splitlines(keepends=True)
+                with open(output, "wb") as f:
+                    f.writelines(lines[:2] + [lines[2][:10]])
+                stats = self.tagger.tag_folder(root, output, batch_size=2, workers=1, log=lambda *a: None)
+            self.assertEqual((stats["tagged"], stats["skipped"]), (1, 2))
+            with open(output, encoding="utf-8") as f:
+                records = [json.loads(line) for line in f]
+        self.assertEqual(sorted(r["path"] for r in records), ["0.png", "1.png", "2.png"])
+        self.assertEqual(records[0]["rating"], "general")
+        self.assertEqual(records[0]["tags"], ["long_hair"])
+
+    def test_bounded_map_limits_tasks_in_flight(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        submitted = []
+        consumed = []
+
+        class CountingPool(ThreadPoolExecutor):
+            def submit(self, function, *args):
+                submitted.append(args[0])
+                return super().submit(function, *args)
+
+        with CountingPool(max_workers=2) as pool:
+            for result in self.tagger.bounded_map(pool, lambda x, k: x * k, range(20), 4, 10):
+                consumed.append(result)
+                self.assertLessEqual(len(submitted) - len(consumed), 4)
+        self.assertEqual(consumed, [x * 10 for x in range(20)])
+
+    def test_int8_variant_shares_labels_and_is_compared_to_fp32(self):
+        import tempfile
+        from types import SimpleNamespace
+
+        self.assertIn("SwinV2_int8", self.tagger.tagger_keys)
+        self.assertEqual(self.tagger.split_model_name("SwinV2_int8"), ("SwinV2", True))
+        labels = self.tagger.LabelIndex(["general", "explicit", "long_hair", "hat", "miku"], [0, 1], [2, 3], [4])
+
+        class FakeModel:
+            def __init__(self, row):
+                self.row = np.array([row], dtype=np.float32)
+
+            def get_inputs(self):
+                return [SimpleNamespace(name="input", shape=[None, 8, 8, 3])]
+
+            def get_outputs(self):
+                return [SimpleNamespace(name="output")]
+
+            def run(self, names, feed):
+                return [np.repeat(self.row, feed["input"].shape[0], axis=0)]
+
+        models = {
+            "SwinV2": FakeModel([0.9, 0.1, 0.8, 0.4, 0.9]),
+            "SwinV2_int8": FakeModel([0.8, 0.2, 0.7, 0.3, 0.9]),
+        }
+        with tempfile.TemporaryDirectory() as root:
+            for i in range(3):
+                Image.new("RGB", (8, 8)).save(os.path.join(root, f"{i}.png"))
+            with patch.object(self.tagger.session_pool, "get", side_effect=models.__getitem__), \
+                    patch.dict(self.tagger._label_indexes, {"SwinV2": labels}):
+                self.assertIs(self.tagger.get_label_index("SwinV2_int8"), labels)
+                report = self.tagger.compare_models(root, "SwinV2", threshold=0.35, log=lambda *a: None)
+        self.assertEqual(report["images"], 3)
+        self.assertEqual(report["rating_agreement"], 1.0)
+        self.assertAlmostEqual(report["tag_agreement"], 0.5)
+        self.assertEqual(report["character_agreement"], 1.0)
+        self.assertAlmostEqual(report["max_abs_score_diff"], 0.1, places=5)
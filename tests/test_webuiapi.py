@@ -0,0 +1,195 @@
+import base64
+import io
+import json
+import time
+import unittest
+from unittest.mock import patch
+
+import requests
+from PIL import Image
+
+from import_utils import import_local
+
+
+def fake_response(status, payload=None):
+    response = requests.Response()
+    response.status_code = status
+    response._content = json.dumps(payload or {}).encode("utf-8")
+    response.raw = io.BytesIO()
+    response.url = "http://stub/sdapi/v1/txt2img"
+    return response
+
+
+def png_base64(color=(255, 0, 0), size=(4, 4)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="PNG")
+    return base64.b64encode(buffer.getvalue()).decode("utf-8")
+
+
+class TestWebuiAPI(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.api = import_local("webuiapi.out_api")
+
+    def test_pool_reuses_sessions_per_endpoint_and_auth(self):
+        pool = self.api.APIClientPool()
+        self.assertIs(pool.session("http://a/", "u:p"), pool.session("http://a", "u:p"))
+        self.assertIsNot(pool.session("http://a", "u:p"), pool.session("http://a", "v:p"))
+        self.assertEqual(pool.session("http://a", "user:pa:ss").auth, ("user", "pa:ss"))
+
+    def test_retries_503_and_connection_errors_then_counts(self):
+        pool = self.api.APIClientPool(retries=3, backoff=0)
+        session = pool.session("http://stub")
+        ok = fake_response(200, {"images": [png_base64()]})
+        responses = [fake_response(503), requests.ConnectionError("refused"), ok]
+        with patch.object(session, "post", side_effect=responses) as post:
+            response = pool.post("http://stub", None, "/sdapi/v1/txt2img", {})
+        self.assertIs(response, ok)
+        self.assertEqual(post.call_count, 3)
+        self.assertEqual(post.call_args.kwargs["timeout"], (pool.connect_timeout, pool.read_timeout))
+        stats = pool.stats()["http://stub"]
+        self.assertEqual((stats["requests"], stats["errors"], stats["retries"]), (1, 0, 2))
+
+    def test_gives_up_after_retries_and_records_error(self):
+        pool = self.api.APIClientPool(retries=1, backoff=0)
+        session = pool.session("http://stub")
+        with patch.object(session, "post", side_effect=[fake_response(502), fake_response(502)]):
+            with self.assertRaises(requests.HTTPError):
+                pool.post("http://stub", None, "/sdapi/v1/txt2img", {})
+        with patch.object(session, "post", side_effect=[fake_response(500)]) as post:
+            with self.assertRaises(requests.HTTPError):
+                pool.post("http://stub", None, "/sdapi/v1/txt2img", {})
+        self.assertEqual(post.call_count, 1)  # 500 is not retried
+        self.assertEqual(pool.stats()["http://stub"]["errors"], 2)
+
+    def test_node_returns_every_image_of_one_request(self):
+        external = import_local("external")
+        Node = external.CLASS_MAPPINGS["SDWebuiAPINode"]
+        colors = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (9, 9, 9)]
+        ok = fake_response(200, {"images": [png_base64(color) for color in colors]})
+        session = self.api.client_pool.session("http://batch-stub")
+        with patch.object(session, "post", return_value=ok) as post:
+            out = Node().get_image_from_prompt("cat", "http://batch-stub", batch_size=2, n_iter=2)[0]
+        self.assertEqual(post.call_count, 1)
+        payload = post.call_args.kwargs["json"]
+        self.assertEqual((payload["batch_size"], payload["n_iter"]), (2, 2))
+        self.assertEqual(tuple(out.shape), (4, 4, 4, 3))
+        self.assertEqual(out[1, 0, 0].tolist(), [0.0, 1.0, 0.0])
+
+    def test_balancer_prefers_least_outstanding_and_breaker_half_opens(self):
+        balancer = self.api.EndpointBalancer(failure_threshold=2, reset_seconds=10)
+        self.assertEqual(balancer.acquire(["a", "b"]), "a")
+        self.assertEqual(balancer.acquire(["a", "b"]), "b")
+        balancer.release("b", healthy=True)
+        self.assertEqual(balancer.acquire(["a", "b"]), "b")
+        balancer.release("a", healthy=False)
+        balancer.release("b", healthy=False)
+        self.assertEqual(balancer.acquire(["a"]), "a")
+        balancer.release("a", healthy=False)  # second failure in a row opens it
+        self.assertIsNone(balancer.acquire(["a"]))
+        later = self.api.time.monotonic() + 11
+        with patch.object(self.api.time, "monotonic", return_value=later):
+            self.assertEqual(balancer.acquire(["a"]), "a")  # the half-open probe
+            self.assertIsNone(balancer.acquire(["a"]))  # only one probe at a time
+            balancer.release("a", healthy=True)
+            self.assertEqual(balancer.snapshot()["a"]["state"], "closed")
+
+    def test_fallback_fails_over_and_blanks_only_when_all_circuits_open(self):
+        balancer = self.api.EndpointBalancer(failure_threshold=1, reset_seconds=60)
+        dead = self.api.client_pool.session("http://dead")
+        alive = self.api.client_pool.session("http://alive")
+        ok = fake_response(200, {"images": [png_base64((0, 0, 255))]})
+        with patch.object(self.api, "balancer", balancer), \
+                patch.object(dead, "post", side_effect=requests.ConnectionError("refused")) as dead_post, \
+                patch.object(alive, "post", return_value=ok):
+            images = self.api.get_image_from_prompt_fallback("cat", "http://dead, http://alive", width=8, height=8)
+            self.assertEqual(images[0].getpixel((0, 0)), (0, 0, 255))
+            self.api.get_image_from_prompt_fallback("cat", ["http://dead", "http://alive"])
+            self.assertEqual(dead_post.call_count, 1)  # open circuit, skipped the second time
+            balancer.release(balancer.acquire(["http://alive"]), healthy=False)
+            blank = self.api.get_image_from_prompt_fallback("cat", "http://dead\nhttp://alive", width=8, height=8)
+        self.assertEqual(blank[0].getpixel((0, 0)), (255, 255, 255))
+
+    def test_fixed_seed_responses_are_cached_on_disk_and_lru_bounded(self):
+        import os
+        import tempfile
+
+        ok = fake_response(200, {"images": [png_base64((0, 255, 0))]})
+        session = self.api.client_pool.session("http://cache-stub")
+        with tempfile.TemporaryDirectory() as root:
+            cache = self.api.ResponseCache(root, max_bytes=10_000)
+            with patch.object(self.api, "response_cache", cache), \
+                    patch.object(session, "post", return_value=ok) as post:
+                for _ in range(2):
+                    images = self.api.get_image_from_prompt("cat", "http://cache-stub/", seed=5, use_cache=True)
+                self.assertEqual(post.call_count, 1)
+                self.assertEqual(images[0].getpixel((0, 0)), (0, 255, 0))
+                self.api.get_image_from_prompt("cat", "http://cache-stub", seed=-1, use_cache=True)
+                self.api.get_image_from_prompt("cat", "http://cache-stub", seed=-1, use_cache=True)
+                self.assertEqual(post.call_count, 3)  # random seeds bypass the cache
+            small = self.api.ResponseCache(os.path.join(root, "small"), max_bytes=120)
+            small.put("a", [b"x" * 40])
+            small.put("b", [b"y" * 40])
+            self.assertEqual(small.get("a"), [b"x" * 40])
+            small.put("c", [b"z" * 40])
+            self.assertIsNone(small.get("b"))
+            self.assertLessEqual(small.total_bytes, 120)
+
+    def test_identical_inflight_requests_share_one_call(self):
+        import threading
+
+        cache = import_local("webuiapi.cache")
+        started, follower_waiting = threading.Event(), threading.Event()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            started.set()
+            follower_waiting.wait(5)
+            return [b"payload"]
+
+        class SignallingEvent(threading.Event):
+            def wait(self, timeout=None):
+                follower_waiting.set()
+                return super().wait(timeout)
+
+        results = []
+        first = threading.Thread(target=lambda: results.append(cache.coalesce("k", fetch)))
+        first.start()
+        started.wait(5)
+        cache._inflight["k"].done = SignallingEvent()
+        second = threading.Thread(target=lambda: results.append(cache.coalesce("k", fetch)))
+        second.start()
+        first.join(5)
+        second.join(5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [[b"payload"], [b"payload"]])
+        self.assertEqual(
+            cache.request_key("e", {"a": 1, "b": 2}), cache.request_key("e", {"b": 2, "a": 1})
+        )
+
+    def test_stub_server_serves_batches_and_failures_offline(self):
+        stub_server = import_local("webuiapi.stub_server")
+        benchmark = import_local("webuiapi.benchmark")
+        with stub_server.StubServer(image_size=(16, 8)) as stub:
+            images = self.api.get_image_from_prompt("cat", stub.url, batch_size=3)
+            self.assertEqual([image.size for image in images], [(16, 8)] * 3)
+            result = benchmark.run_load(lambda: self.api.get_image_from_prompt("cat", stub.url), 6, 3)
+        self.assertEqual((result["images"], result["errors"]), (6, 0))
+        self.assertGreater(result["decode_seconds"], 0.0)
+        pool = self.api.APIClientPool(retries=0)
+        with stub_server.StubServer(failure_rate=1.0) as stub:
+            with self.assertRaises(requests.HTTPError):
+                pool.post(stub.url, None, "/sdapi/v1/txt2img", {})
+
+    def test_stub_round_trip_overhead_is_small_next_to_latency(self):
+        stub_server = import_local("webuiapi.stub_server")
+        latency = 0.05
+        durations = []
+        with stub_server.StubServer(latency=latency, image_size=(8, 8)) as stub, requests.Session() as session:
+            for _ in range(8):  # one keep-alive connection, like the client pool
+                start = time.perf_counter()
+                session.post(stub.url + "/sdapi/v1/txt2img", json={}).raise_for_status()
+                durations.append(time.perf_counter() - start)
+        median = sorted(durations)[len(durations) // 2]
+        self.assertLess(median - latency, latency / 2)
@@ -1,27 +1,550 @@
-try:
-    from imgutils.tagging import get_wd14_tags
-    from imgutils.tagging.wd14 import MODEL_NAMES as tagger_model_names
-except Exception as e:
-    _tagger_import_error = e
-
-    def get_wd14_tags(image_path, model_name=None):
-        raise RuntimeError(
-            "Tagger feature not available. Install 'dghs-imgutils' to enable it."
-        ) from _tagger_import_error
-    tagger_model_names = {
-        "EVA02_Large": None,
-        "ViT_Large": None,
-        "SwinV2": None,
-        "ConvNext": None,
-        "ConvNextV2": None,
-        "ViT": None,
-        "MOAT": None,
-        "SwinV2_v3": None,
-        "ConvNext_v3": None,
-        "ViT_v3": None,
-    }
-from typing import Union
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Optional, Union
+import numpy as np
+import torch
+import torch.nn.functional as F
 from PIL import Image
+try:
+    from ..imgio.tensor_ops import as_batch, flatten_alpha
+except ImportError:
+    # standalone use (python utils/tagger.py ...), without ComfyUI or the package around it
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from imgio.tensor_ops import as_batch, flatten_alpha
+
+# imgutils (and onnxruntime under it) is imported on first use instead of at node load,
+# so the model list for the combo inputs is kept here.
+tagger_model_names = {
+    "EVA02_Large": None,
+    "ViT_Large": None,
+    "SwinV2": None,
+    "ConvNext": None,
+    "ConvNextV2": None,
+    "ViT": None,
+    "MOAT": None,
+    "SwinV2_v3": None,
+    "ConvNext_v3": None,
+    "ViT_v3": None,
+}
+
+# get_wd14_tags' own cutoffs; node thresholds only ever raise them
+GENERAL_THRESHOLD = 0.35
+CHARACTER_THRESHOLD = 0.85
+
+# "<model>_int8" selects a dynamically quantized copy of <model>, built locally on first use
+INT8_SUFFIX = "_int8"
+
+
+def split_model_name(model_name: str):
+    """("SwinV2_int8") -> ("SwinV2", True), ("SwinV2") -> ("SwinV2", False)"""
+    if model_name.endswith(INT8_SUFFIX):
+        return model_name[: -len(INT8_SUFFIX)], True
+    return model_name, False
+
+_wd14_module = None
+
+
+def _wd14_backend():
+    global _wd14_module
+    if _wd14_module is None:
+        try:
+            from imgutils.tagging import wd14
+        except Exception as e:
+            raise RuntimeError(
+                "Tagger feature not available. Install 'dghs-imgutils' to enable it."
+            ) from e
+        _wd14_module = wd14
+    return _wd14_module
+
+
+def get_wd14_tags(image_path, model_name="SwinV2", **kwargs):
+    return _wd14_backend().get_wd14_tags(image_path, split_model_name(model_name)[0], **kwargs)
+
+
+def _env_int(name, default):
+    try:
+        return int(os.environ.get(name, "").strip() or default)
+    except ValueError:
+        return default
+
+
+# tried in this order among the providers the installed onnxruntime offers; CPU always last.
+# TensorRT is left out on purpose: it builds an engine per model on first load.
+DEFAULT_PROVIDERS = ("CUDAExecutionProvider", "ROCMExecutionProvider", "DmlExecutionProvider", "CoreMLExecutionProvider")
+
+
+def select_providers(available, preference=None) -> List[str]:
+    """
+    Providers for a tagger session: the preferred ones that are available, in preference
+    order, then CPUExecutionProvider as the fallback. COMFYUI_LOGICUTILS_TAGGER_PROVIDERS
+    (comma separated, e.g. "CPUExecutionProvider") overrides the preference.
+    """
+    if preference is None:
+        configured = os.environ.get("COMFYUI_LOGICUTILS_TAGGER_PROVIDERS", "")
+        preference = [name.strip() for name in configured.split(",") if name.strip()] or DEFAULT_PROVIDERS
+    providers = [name for name in preference if name in available and name != "CPUExecutionProvider"]
+    return providers + ["CPUExecutionProvider"]
+
+
+class TaggerSessionPool:
+    """
+    Keeps up to max_models WD14 ONNX sessions loaded, least recently used first out.
+
+    Sessions idle for longer than idle_seconds are dropped by a daemon thread (0 disables it).
+    intra_op_threads / inter_op_threads are passed to onnxruntime (0 lets it decide).
+    """
+    def __init__(self, max_models=2, idle_seconds=600, intra_op_threads=0, inter_op_threads=0):
+        self.max_models = max_models
+        self.idle_seconds = idle_seconds
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+        self._sessions = OrderedDict()  # model_name -> [session, last_used]
+        self._load_locks = {}
+        self._lock = threading.Lock()
+        self._janitor = None
+
+    def configure(self, max_models=None, idle_seconds=None, intra_op_threads=None, inter_op_threads=None):
+        """Update settings. Changing thread counts drops loaded sessions so they are rebuilt with them."""
+        with self._lock:
+            if max_models is not None:
+                self.max_models = max_models
+            if idle_seconds is not None:
+                self.idle_seconds = idle_seconds
+            threads_changed = False
+            if intra_op_threads is not None and intra_op_threads != self.intra_op_threads:
+                self.intra_op_threads = intra_op_threads
+                threads_changed = True
+            if inter_op_threads is not None and inter_op_threads != self.inter_op_threads:
+                self.inter_op_threads = inter_op_threads
+                threads_changed = True
+            if threads_changed:
+                self._sessions.clear()
+            self._trim_locked()
+
+    def _create_session(self, model_name):
+        import onnxruntime
+
+        model_path = resolve_model_path(model_name)
+        options = onnxruntime.SessionOptions()
+        if self.intra_op_threads:
+            options.intra_op_num_threads = self.intra_op_threads
+        if self.inter_op_threads:
+            options.inter_op_num_threads = self.inter_op_threads
+        return onnxruntime.InferenceSession(
+            model_path, sess_options=options, providers=select_providers(onnxruntime.get_available_providers())
+        )
+
+    def _trim_locked(self):
+        while len(self._sessions) > max(self.max_models, 0):
+            self._sessions.popitem(last=False)
+
+    def get(self, model_name):
+        with self._lock:
+            entry = self._sessions.get(model_name)
+            if entry is not None:
+                entry[1] = time.monotonic()
+                self._sessions.move_to_end(model_name)
+                return entry[0]
+            load_lock = self._load_locks.setdefault(model_name, threading.Lock())
+        # load outside the pool lock, but only once per model
+        with load_lock:
+            with self._lock:
+                entry = self._sessions.get(model_name)
+                if entry is not None:
+                    entry[1] = time.monotonic()
+                    return entry[0]
+            session = self._create_session(model_name)
+            with self._lock:
+                self._sessions[model_name] = [session, time.monotonic()]
+                self._trim_locked()
+                self._ensure_janitor_locked()
+        return session
+
+    def evict_idle(self):
+        if not self.idle_seconds:
+            return
+        now = time.monotonic()
+        with self._lock:
+            for model_name in [name for name, (_, used) in self._sessions.items() if now - used > self.idle_seconds]:
+                del self._sessions[model_name]
+
+    def _ensure_janitor_locked(self):
+        if not self.idle_seconds or (self._janitor is not None and self._janitor.is_alive()):
+            return
+
+        def run():
+            while True:
+                time.sleep(max(self.idle_seconds / 2.0, 1.0))
+                self.evict_idle()
+                with self._lock:
+                    if not self._sessions:
+                        self._janitor = None
+                        return
+
+        self._janitor = threading.Thread(target=run, name="logicutils-tagger-janitor", daemon=True)
+        self._janitor.start()
+
+    def loaded(self) -> List[str]:
+        with self._lock:
+            return list(self._sessions.keys())
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+
+    def warm(self, model_names: Iterable[str], background=True) -> Optional[threading.Thread]:
+        """Load the given models, on a daemon thread by default. Failures are printed, not raised."""
+        model_names = [name for name in model_names if name]
+
+        def run():
+            for model_name in model_names:
+                try:
+                    self.get(model_name)
+                    get_label_index(model_name)
+                except Exception as e:
+                    print(f"Failed to preload tagger model {model_name}: {e}")
+
+        if not background:
+            run()
+            return None
+        thread = threading.Thread(target=run, name="logicutils-tagger-warmup", daemon=True)
+        thread.start()
+        return thread
+
+
+session_pool = TaggerSessionPool(
+    max_models=_env_int("COMFYUI_LOGICUTILS_TAGGER_MAX_MODELS", 2),
+    idle_seconds=_env_int("COMFYUI_LOGICUTILS_TAGGER_IDLE_SECONDS", 600),
+    intra_op_threads=_env_int("COMFYUI_LOGICUTILS_TAGGER_INTRA_THREADS", 0),
+    inter_op_threads=_env_int("COMFYUI_LOGICUTILS_TAGGER_INTER_THREADS", 0),
+)
+
+
+_quantize_lock = threading.Lock()
+
+
+def quantized_model_dir() -> str:
+    return os.environ.get("COMFYUI_LOGICUTILS_TAGGER_INT8_DIR") or os.path.join(
+        os.path.expanduser("~"), ".cache", "comfyui-logicutils", "tagger-int8"
+    )
+
+
+def quantize_model(source_path: str, model_name: str) -> str:
+    """
+    Dynamically quantize (int8 weights, activations quantized at run time) an fp32 ONNX model.
+
+    The copy is written once under quantized_model_dir(), named after the source path so a new
+    upstream revision gets its own file, and reused afterwards.
+    Only MatMul/Gemm are quantized: ConvInteger has no fast kernel on most CPU builds,
+    so quantizing convolutions would make the convnet taggers slower, not faster.
+    """
+    digest = hashlib.blake2b(os.path.abspath(source_path).encode("utf-8"), digest_size=6).hexdigest()
+    target = os.path.join(quantized_model_dir(), f"{model_name}-{digest}.int8.onnx")
+    with _quantize_lock:
+        if os.path.exists(target):
+            return target
+        try:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+        except Exception as e:
+            raise RuntimeError(
+                "Quantized tagger models need 'onnxruntime' with its quantization tools (and 'onnx')."
+            ) from e
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        partial = f"{target}.{os.getpid()}.partial"
+        try:
+            quantize_dynamic(
+                source_path, partial, op_types_to_quantize=["MatMul", "Gemm"], weight_type=QuantType.QUInt8
+            )
+            os.replace(partial, target)
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+    return target
+
+
+def resolve_model_path(model_name: str) -> str:
+    """Local path of the ONNX file for model_name, quantizing it first for "<model>_int8"."""
+    base_name, quantized = split_model_name(model_name)
+    from huggingface_hub import hf_hub_download
+
+    source_path = hf_hub_download(_wd14_backend().MODEL_NAMES[base_name], "model.onnx")
+    return quantize_model(source_path, base_name) if quantized else source_path
+
+
+def start_preload() -> Optional[threading.Thread]:
+    """
+    Warm the models listed in COMFYUI_LOGICUTILS_TAGGER_PRELOAD (comma separated) in the background.
+    """
+    names = [name.strip() for name in os.environ.get("COMFYUI_LOGICUTILS_TAGGER_PRELOAD", "").split(",")]
+    names = [name for name in names if name]
+    if not names:
+        return None
+    return session_pool.warm(names)
+
+
+class LabelIndex:
+    """
+    Tag names of one model with their category index arrays, built once per model.
+    display_names has underscores already replaced so replace=True costs nothing per call.
+    """
+    def __init__(self, names, rating_indexes, general_indexes, character_indexes):
+        self.names = np.asarray(list(names), dtype=object)
+        self.display_names = np.asarray([replace_underscore(name) for name in self.names], dtype=object)
+        self.categories = {
+            "rating": np.asarray(rating_indexes, dtype=np.int64),
+            "general": np.asarray(general_indexes, dtype=np.int64),
+            "character": np.asarray(character_indexes, dtype=np.int64),
+        }
+
+    def __len__(self):
+        return len(self.names)
+
+
+_label_indexes = {}
+_label_lock = threading.Lock()
+
+
+def get_label_index(model_name: str) -> LabelIndex:
+    # a quantized model shares the label index of the model it was made from
+    base_name = split_model_name(model_name)[0]
+    with _label_lock:
+        index = _label_indexes.get(base_name)
+        if index is None:
+            tag_names, rating_indexes, general_indexes, character_indexes = (
+                _wd14_backend()._get_wd14_labels(base_name)[:4]
+            )
+            index = LabelIndex(tag_names, rating_indexes, general_indexes, character_indexes)
+            _label_indexes[base_name] = index
+        return index
+
+
+class TagScores:
+    """
+    Scores of one image as a float32 vector over a shared LabelIndex.
+
+    Threshold / top-k / category views are numpy operations over that vector,
+    so pulling several views out of one inference is cheap.
+    """
+    def __init__(self, scores: np.ndarray, labels: LabelIndex):
+        self.scores = np.asarray(scores, dtype=np.float32)
+        self.labels = labels
+
+    @classmethod
+    def from_dicts(cls, rating: dict, features: dict, chars: dict) -> "TagScores":
+        names = list(rating) + list(features) + list(chars)
+        n_rating, n_features = len(rating), len(features)
+        labels = LabelIndex(
+            names,
+            range(n_rating),
+            range(n_rating, n_rating + n_features),
+            range(n_rating + n_features, len(names)),
+        )
+        values = list(rating.values()) + list(features.values()) + list(chars.values())
+        return cls(np.asarray(values, dtype=np.float32), labels)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.scores.nbytes) + 64
+
+    def rating(self) -> str:
+        indexes = self.labels.categories["rating"]
+        return self.labels.names[indexes[int(np.argmax(self.scores[indexes]))]]
+
+    def above(self, threshold=0.4, category="general", replace=False, top_k=None) -> List[str]:
+        """
+        Tag names of category with score > threshold, in label order,
+        or the top_k highest first when top_k is given.
+        """
+        indexes = self.labels.categories[category]
+        values = self.scores[indexes]
+        selected = indexes[values > threshold]
+        if top_k is not None:
+            order = np.argsort(-self.scores[selected], kind="stable")[: max(int(top_k), 0)]
+            selected = selected[order]
+        names = self.labels.display_names if replace else self.labels.names
+        return names[selected].tolist()
+
+    def as_dict(self, category="general") -> dict:
+        indexes = self.labels.categories[category]
+        return dict(zip(self.labels.names[indexes].tolist(), self.scores[indexes].tolist()))
+
+    def as_dicts(self):
+        """(rating, features, chars) dicts, the get_wd14_tags format."""
+        return self.as_dict("rating"), self.as_dict("general"), self.as_dict("character")
+
+
+class ScoreCache:
+    """
+    Byte-bounded LRU of raw tagger scores, keyed by (image fingerprint, model name).
+
+    Rating / tags / characters nodes on the same image share one inference this way;
+    thresholds and underscore replacement are applied to the cached scores afterwards.
+    """
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, size: int):
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+score_cache = ScoreCache(
+    int(float(os.environ.get("COMFYUI_LOGICUTILS_TAGGER_CACHE_MB", "64")) * 1024 * 1024)
+)
+
+
+def image_fingerprint(image) -> Optional[str]:
+    """
+    Content hash of a PIL image / tensor, or path + mtime + size for files. None if it can't be fingerprinted.
+    """
+    if isinstance(image, Image.Image):
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{image.mode}:{image.size}".encode())
+        digest.update(image.tobytes())
+        return digest.hexdigest()
+    if isinstance(image, torch.Tensor):
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{image.dtype}:{tuple(image.shape)}".encode())
+        digest.update(image.detach().cpu().contiguous().numpy().tobytes())
+        return digest.hexdigest()
+    if isinstance(image, str) and os.path.isfile(image):
+        stat = os.stat(image)
+        return f"{os.path.abspath(image)}:{stat.st_mtime_ns}:{stat.st_size}"
+    return None
+
+
+def get_raw_scores(image_path: Union[str, Image.Image], model_name: str = "SwinV2"):
+    """
+    TagScores over every tag, served from score_cache when possible.
+    """
+    key = image_fingerprint(image_path)
+    if key is not None:
+        cached = score_cache.get((key, model_name))
+        if cached is not None:
+            return cached
+    # same pooled session as the batch path, with every score kept for later thresholding
+    if isinstance(image_path, str):
+        # convert inside the with block: the file is closed right away, not at garbage collection
+        with Image.open(image_path) as image:
+            rgba = image.convert("RGBA")
+    else:
+        rgba = image_path.convert("RGBA")
+    array = np.asarray(rgba, dtype=np.float32) / 255.0
+    scores = _infer_batch(torch.from_numpy(array).unsqueeze(0), model_name)[0]
+    if key is not None:
+        score_cache.put((key, model_name), scores, scores.nbytes)
+    return scores
+
+
+def preprocess_batch(images: torch.Tensor, target_size: int) -> np.ndarray:
+    """
+    Vectorized equivalent of imgutils' per-image WD14 preprocessing for a whole IMAGE batch:
+    alpha over white, centered white padding to a square, bicubic resize, RGB -> BGR in [0, 255].
+    """
+    images = flatten_alpha(as_batch(images).float())
+    _, height, width, _ = images.shape
+    side = max(height, width)
+    pad_left, pad_top = (side - width) // 2, (side - height) // 2
+    x = F.pad(
+        images.movedim(-1, 1),
+        (pad_left, side - width - pad_left, pad_top, side - height - pad_top),
+        value=1.0,
+    )
+    if side != target_size:
+        x = F.interpolate(
+            x, size=(target_size, target_size), mode="bicubic", antialias=True, align_corners=False
+        )
+    x = x.clamp(0.0, 1.0).mul(255.0).round().movedim(1, -1).flip(-1)
+    return np.ascontiguousarray(x.cpu().numpy(), dtype=np.float32)
+
+
+def _model_target_size(model) -> int:
+    return int(model.get_inputs()[0].shape[1])
+
+
+def _run_model(model, array: np.ndarray) -> np.ndarray:
+    """
+    Run a preprocessed (N, S, S, 3) batch through a WD14 session, returns (N, num_labels) scores.
+    """
+    model_input = model.get_inputs()[0]
+    batch_dim = model_input.shape[0]
+    label_name = model.get_outputs()[0].name
+    if isinstance(batch_dim, int) and batch_dim > 0 and batch_dim != array.shape[0]:
+        # model exported with a fixed batch size, feed it in chunks of that size
+        return np.concatenate(
+            [
+                model.run([label_name], {model_input.name: array[i : i + batch_dim]})[0]
+                for i in range(0, array.shape[0], batch_dim)
+            ]
+        )
+    return model.run([label_name], {model_input.name: array})[0]
+
+
+def _infer_batch(images: torch.Tensor, model_name: str) -> List[TagScores]:
+    """
+    One ONNX session call for the whole batch. Returns TagScores per image.
+    """
+    model = session_pool.get(model_name)
+    preds = _run_model(model, preprocess_batch(images, _model_target_size(model)))
+    labels = get_label_index(model_name)
+    # copy rows so a cached entry doesn't keep the whole prediction matrix alive
+    return [TagScores(row.astype(np.float32, copy=True), labels) for row in preds]
+
+
+def get_raw_scores_batch(images: torch.Tensor, model_name: str = "SwinV2") -> List[TagScores]:
+    """
+    Raw scores for every image of an IMAGE batch. Images already in score_cache are skipped,
+    the rest go through a single batched inference.
+    """
+    images = as_batch(images)
+    keys = [image_fingerprint(image) for image in images]
+    results = [score_cache.get((key, model_name)) for key in keys]
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        scores = _infer_batch(images[missing], model_name)
+        for i, score in zip(missing, scores):
+            results[i] = score
+            score_cache.put((keys[i], model_name), score, score.nbytes)
+    return results
+
 
 def get_rating_class(rating):
     # argmax
@@ -34,13 +557,312 @@ def replace_underscore(tag):
     return tag.replace('_', ' ')
 
 def get_tags(image_path:Union[str, Image.Image], threshold:float = 0.4, replace:bool = False, model_name:str = "SwinV2") -> dict[str, list[str]]:
+    return _threshold_scores(get_raw_scores(image_path, model_name), threshold, replace)
+
+def _threshold_scores(scores: TagScores, threshold, replace) -> dict[str, list[str]]:
     result = {}
-    rating, features, chars = get_wd14_tags(image_path, model_name)
-    result['rating'] = get_rating_class(rating)
-    result['tags'] = get_tags_above_threshold(features, threshold)
-    result['chars'] = get_tags_above_threshold(chars, threshold)
-    if replace:
-        result['tags'] = [replace_underscore(tag) for tag in result['tags']]
-        result['chars'] = [replace_underscore(tag) for tag in result['chars']]
+    result['rating'] = scores.rating()
+    # same tags as get_wd14_tags (general > 0.35, characters > 0.85) followed by the node threshold
+    result['tags'] = scores.above(max(threshold, GENERAL_THRESHOLD), "general", replace)
+    result['chars'] = scores.above(max(threshold, CHARACTER_THRESHOLD), "character", replace)
     return result
-tagger_keys = list(tagger_model_names.keys())
+
+def get_tags_batch(images: torch.Tensor, threshold:float = 0.4, replace:bool = False, model_name:str = "SwinV2") -> list[dict[str, list[str]]]:
+    """
+    get_tags for every image of an IMAGE batch, with one batched inference.
+    """
+    return [_threshold_scores(scores, threshold, replace) for scores in get_raw_scores_batch(images, model_name)]
+tagger_keys = list(tagger_model_names.keys()) + [name + INT8_SUFFIX for name in tagger_model_names]
+
+
+
+##############################################################################
+# Offline bulk tagging: python utils/tagger.py <folder> -o tags.jsonl
+##############################################################################
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".bmp", ".gif", ".tif", ".tiff")
+
+
+def iter_image_files(root: str, recursive: bool = True):
+    if recursive:
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if filename.lower().endswith(IMAGE_EXTENSIONS):
+                    yield os.path.join(dirpath, filename)
+    else:
+        for filename in sorted(os.listdir(root)):
+            path = os.path.join(root, filename)
+            if os.path.isfile(path) and filename.lower().endswith(IMAGE_EXTENSIONS):
+                yield path
+
+
+def load_for_tagging(path: str, target_size: int):
+    """
+    Decode and preprocess one file the way imgutils does (worker process side).
+    Returns (path, uint8 (S, S, 3) BGR array or None, error message or None).
+    """
+    try:
+        with Image.open(path) as image:
+            image = image.convert("RGBA")
+        side = max(image.size)
+        padded = Image.new("RGB", (side, side), (255, 255, 255))
+        padded.paste(image, ((side - image.width) // 2, (side - image.height) // 2), mask=image)
+        if side != target_size:
+            padded = padded.resize((target_size, target_size), Image.BICUBIC)
+        return path, np.ascontiguousarray(np.asarray(padded, dtype=np.uint8)[:, :, ::-1]), None
+    except Exception as e:
+        return path, None, f"{type(e).__name__}: {e}"
+
+
+def read_checkpoint(output_path: str) -> set:
+    """
+    Paths already recorded in a previous (possibly interrupted) run's JSONL output.
+    A torn last line is cut off so appending continues on a clean line.
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    valid_end = 0
+    with open(output_path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                done.add(json.loads(line)["path"])
+            except (ValueError, KeyError):
+                break
+            valid_end += len(line)
+    if valid_end != os.path.getsize(output_path):
+        with open(output_path, "r+b") as f:
+            f.truncate(valid_end)
+    return done
+
+
+def bounded_map(pool, function, items, window: int, *args):
+    """
+    pool.map(function, items, ...) in order, with at most window tasks submitted but not
+    yet consumed, so results can't pile up faster than the caller uses them.
+    """
+    pending = deque()
+    for item in items:
+        if len(pending) >= window:
+            yield pending.popleft().result()
+        pending.append(pool.submit(function, item, *args))
+    while pending:
+        yield pending.popleft().result()
+
+
+def tag_folder(
+    input_dir: str,
+    output_path: str,
+    model_name: str = "SwinV2",
+    threshold: float = GENERAL_THRESHOLD,
+    character_threshold: float = CHARACTER_THRESHOLD,
+    replace: bool = False,
+    batch_size: int = 16,
+    workers: int = 0,
+    recursive: bool = True,
+    report_every: float = 10.0,
+    log=print,
+) -> dict:
+    """
+    Tag every image under input_dir into output_path (JSONL, one object per image).
+
+    Files are decoded/preprocessed in a process pool while the main process runs one
+    batched inference per batch_size images on the shared pooled session. At most
+    2 * workers * batch_size decodes are in flight, so memory doesn't grow with the
+    folder. Paths already in output_path are skipped, so an interrupted run resumes
+    where it stopped.
+    """
+    done = read_checkpoint(output_path)
+    paths = [
+        path for path in iter_image_files(input_dir, recursive)
+        if os.path.relpath(path, input_dir) not in done
+    ]
+    stats = {"skipped": len(done), "tagged": 0, "failed": 0, "seconds": 0.0}
+    if not paths:
+        log(f"Nothing to tag, {len(done)} images already in {output_path}")
+        return stats
+
+    model = session_pool.get(model_name)
+    labels = get_label_index(model_name)
+    target_size = _model_target_size(model)
+    workers = workers or max(1, (os.cpu_count() or 2) - 1)
+    start = last_report = time.monotonic()
+
+    def flush(batch, out):
+        if not batch:
+            return
+        preds = _run_model(model, np.stack([array for _, array in batch]).astype(np.float32))
+        for (path, _), row in zip(batch, preds):
+            scores = TagScores(row, labels)
+            record = {
+                "path": os.path.relpath(path, input_dir),
+                "model": model_name,
+                "rating": scores.rating(),
+                "tags": scores.above(threshold, "general", replace),
+                "chars": scores.above(character_threshold, "character", replace),
+            }
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        out.flush()
+        stats["tagged"] += len(batch)
+        batch.clear()
+
+    # decoded arrays are ~2.4 MB each; keep about two batches per worker in flight
+    window = 2 * workers * batch_size
+    with open(output_path, "a", encoding="utf-8") as out, ProcessPoolExecutor(max_workers=workers) as pool:
+        batch = []
+        for path, array, error in bounded_map(pool, load_for_tagging, paths, window, target_size):
+            if error is not None:
+                # recorded as done too, so a broken file isn't retried on every resume
+                out.write(json.dumps({"path": os.path.relpath(path, input_dir), "error": error}) + "\n")
+                stats["failed"] += 1
+                continue
+            batch.append((path, array))
+            if len(batch) >= batch_size:
+                flush(batch, out)
+            now = time.monotonic()
+            if now - last_report >= report_every:
+                last_report = now
+                processed = stats["tagged"] + stats["failed"]
+                log(f"{processed}/{len(paths)} images, {processed / (now - start):.1f} images/s")
+        flush(batch, out)
+    stats["seconds"] = time.monotonic() - start
+    rate = (stats["tagged"] + stats["failed"]) / max(stats["seconds"], 1e-9)
+    log(
+        f"Tagged {stats['tagged']} images ({stats['failed']} failed, {stats['skipped']} skipped) "
+        f"in {stats['seconds']:.1f}s, {rate:.1f} images/s"
+    )
+    return stats
+
+
+def _time_model(model, arrays, batch_size):
+    """Scores for arrays and the seconds spent in inference, after one warm-up batch."""
+    _run_model(model, arrays[:batch_size])
+    start = time.perf_counter()
+    preds = np.concatenate(
+        [_run_model(model, arrays[i : i + batch_size]) for i in range(0, len(arrays), batch_size)]
+    )
+    return preds, time.perf_counter() - start
+
+
+def _jaccard(a, b) -> float:
+    a, b = set(a), set(b)
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def compare_models(
+    input_dir: str,
+    model_name: str = "SwinV2" + INT8_SUFFIX,
+    threshold: float = GENERAL_THRESHOLD,
+    character_threshold: float = CHARACTER_THRESHOLD,
+    limit: int = 64,
+    batch_size: int = 16,
+    recursive: bool = True,
+    log=print,
+) -> dict:
+    """
+    Accuracy / speed of the int8 variant of model_name against its fp32 model, on up to
+    limit images of input_dir. Tag agreement is the mean per-image Jaccard index of the
+    thresholded tag sets; times cover inference only (decoding is shared and not counted).
+    """
+    base_name = split_model_name(model_name)[0]
+    candidates = {"fp32": base_name, "int8": base_name + INT8_SUFFIX}
+    paths = list(iter_image_files(input_dir, recursive))[:limit]
+    if not paths:
+        raise ValueError(f"No images found in {input_dir}")
+    labels = get_label_index(base_name)
+
+    inputs = {}
+    results = {}
+    for kind, name in candidates.items():
+        model = session_pool.get(name)
+        target_size = _model_target_size(model)
+        if target_size not in inputs:
+            loaded = [load_for_tagging(path, target_size)[1] for path in paths]
+            inputs[target_size] = np.stack([array for array in loaded if array is not None]).astype(np.float32)
+        results[kind] = _time_model(model, inputs[target_size], batch_size)
+
+    (reference, reference_seconds), (quantized, quantized_seconds) = results["fp32"], results["int8"]
+    count = len(reference)
+    rating_agree, tag_agree, char_agree = 0, 0.0, 0.0
+    for ref_row, q_row in zip(reference, quantized):
+        ref_scores, q_scores = TagScores(ref_row, labels), TagScores(q_row, labels)
+        rating_agree += ref_scores.rating() == q_scores.rating()
+        tag_agree += _jaccard(ref_scores.above(threshold), q_scores.above(threshold))
+        char_agree += _jaccard(
+            ref_scores.above(character_threshold, "character"), q_scores.above(character_threshold, "character")
+        )
+    diff = np.abs(reference.astype(np.float64) - quantized)
+    report = {
+        "model": base_name,
+        "images": count,
+        "rating_agreement": rating_agree / count,
+        "tag_agreement": tag_agree / count,
+        "character_agreement": char_agree / count,
+        "mean_abs_score_diff": float(diff.mean()),
+        "max_abs_score_diff": float(diff.max()),
+        "fp32_images_per_second": count / max(reference_seconds, 1e-9),
+        "int8_images_per_second": count / max(quantized_seconds, 1e-9),
+        "speedup": reference_seconds / max(quantized_seconds, 1e-9),
+    }
+    log(
+        f"{base_name} on {count} images: int8 is {report['speedup']:.2f}x fp32 "
+        f"({report['int8_images_per_second']:.1f} vs {report['fp32_images_per_second']:.1f} images/s); "
+        f"tag agreement {report['tag_agreement']:.3f}, character agreement {report['character_agreement']:.3f}, "
+        f"rating agreement {report['rating_agreement']:.3f}, max score diff {report['max_abs_score_diff']:.3f}"
+    )
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk WD14 tagging of an image folder into resumable JSONL.")
+    parser.add_argument("input_dir")
+    parser.add_argument("-o", "--output", default="tags.jsonl", help="JSONL output, also the resume checkpoint")
+    parser.add_argument("-m", "--model", default="SwinV2", choices=tagger_keys)
+    parser.add_argument("--threshold", type=float, default=GENERAL_THRESHOLD)
+    parser.add_argument("--character-threshold", type=float, default=CHARACTER_THRESHOLD)
+    parser.add_argument("--replace", action="store_true", help="replace underscores with spaces")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=0, help="decode processes, 0 = cpu count - 1")
+    parser.add_argument("--no-recursive", action="store_true")
+    parser.add_argument("--intra-threads", type=int, default=None)
+    parser.add_argument("--inter-threads", type=int, default=None)
+    parser.add_argument(
+        "--compare-int8", action="store_true",
+        help="instead of tagging, compare the model's int8 copy against fp32 on a sample of the folder",
+    )
+    parser.add_argument("--limit", type=int, default=64, help="sample size for --compare-int8")
+    args = parser.parse_args(argv)
+    session_pool.configure(intra_op_threads=args.intra_threads, inter_op_threads=args.inter_threads)
+    if args.compare_int8:
+        # both sessions are held at once
+        session_pool.configure(max_models=max(session_pool.max_models, 2))
+        report = compare_models(
+            args.input_dir,
+            args.model,
+            threshold=args.threshold,
+            character_threshold=args.character_threshold,
+            limit=args.limit,
+            batch_size=args.batch_size,
+            recursive=not args.no_recursive,
+        )
+        print(json.dumps(report, indent=2))
+        return 0
+    tag_folder(
+        args.input_dir,
+        args.output,
+        model_name=args.model,
+        threshold=args.threshold,
+        character_threshold=args.character_threshold,
+        replace=args.replace,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        recursive=not args.no_recursive,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""
+Offline load benchmark of the WebUI API client against local stub servers.
+
+For each concurrency level, `requests` calls of get_image_from_prompt (one stub)
+and get_image_from_prompt_fallback (a healthy and a flaky stub) are issued from a
+thread pool. Reported per run: throughput, p50/p99 latency, and the share of
+wall time spent on base64 and PIL decoding in the client.
+
+    python -m webuiapi.benchmark --concurrency 1 4 16 --requests 64 --latency 0.05
+"""
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from . import out_api
+from .stub_server import StubServer
+
+
+class DecodeTimer:
+    """Accumulates wall time spent inside the wrapped callables, across threads."""
+    def __init__(self):
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def wrap(self, function):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                with self._lock:
+                    self.seconds += elapsed
+        return timed
+
+
+@contextmanager
+def timed_decoding(timer: DecodeTimer):
+    """Route out_api's base64 and image decoding through timer for the duration."""
+    original_base64, original_decode = out_api.base64, out_api.decode_images
+    out_api.base64 = SimpleNamespace(b64decode=timer.wrap(original_base64.b64decode))
+    out_api.decode_images = timer.wrap(original_decode)
+    try:
+        yield timer
+    finally:
+        out_api.base64, out_api.decode_images = original_base64, original_decode
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else float("nan")
+
+
+def run_load(call, requests: int, concurrency: int) -> dict:
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def one(_):
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            images = call()
+        except Exception:
+            with lock:
+                errors += 1
+            return 0
+        with lock:
+            latencies.append(time.perf_counter() - start)
+        return len(images)
+
+    with timed_decoding(DecodeTimer()) as timer:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            images = sum(pool.map(one, range(requests)))
+        wall = time.perf_counter() - start
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "images": images,
+        "requests_per_second": requests / wall,
+        "images_per_second": images / wall,
+        "p50_ms": _percentile(latencies, 0.5) * 1000.0,
+        "p99_ms": _percentile(latencies, 0.99) * 1000.0,
+        "decode_seconds": timer.seconds,
+        # summed over threads, so it can exceed 100% of wall time with concurrency
+        "decode_share": timer.seconds / wall,
+    }
+
+
+def benchmark(concurrency_levels=(1, 4, 16), requests=64, latency=0.05, failure_rate=0.3,
+              width=512, height=512, batch_size=1, log=print) -> list:
+    results = []
+    # fresh client state, so earlier runs (or a real backend) don't skew breakers and counters
+    out_api.client_pool.close()
+    out_api.balancer.reset()
+    out_api.client_pool.pool_size = max(out_api.client_pool.pool_size, max(concurrency_levels))
+    with StubServer(latency=latency) as healthy, StubServer(latency=latency, failure_rate=failure_rate) as flaky:
+        kwargs = dict(width=width, height=height, batch_size=batch_size)
+        paths = {
+            "direct": lambda: out_api.get_image_from_prompt("benchmark", healthy.url, **kwargs),
+            "fallback": lambda: out_api.get_image_from_prompt_fallback(
+                "benchmark", [flaky.url, healthy.url], **kwargs
+            ),
+        }
+        for name, call in paths.items():
+            call()  # warm up connections and the stub's image cache
+            for concurrency in concurrency_levels:
+                result = run_load(call, requests, concurrency)
+                result["path"] = name
+                results.append(result)
+                log(
+                    f"{name:<8} c={concurrency:<3} {result['requests_per_second']:7.1f} req/s "
+                    f"{result['images_per_second']:7.1f} img/s  p50 {result['p50_ms']:7.1f} ms  "
+                    f"p99 {result['p99_ms']:7.1f} ms  decode {result['decode_seconds']:6.2f}s "
+                    f"({result['decode_share']:.0%})  errors {result['errors']}"
+                )
+        log(f"stub traffic: healthy {healthy.config.requests} requests, "
+            f"flaky {flaky.config.requests} requests / {flaky.config.failures} failed")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load benchmark of the WebUI API client against local stubs.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.05, help="stub seconds per request")
+    parser.add_argument("--failure-rate", type=float, default=0.3, help="503 rate of the flaky fallback stub")
+    parser.add_argument("--size", type=int, nargs=2, metavar=("WIDTH", "HEIGHT"), default=[512, 512])
+    parser.add_argument("--batch-size", type=int, default=1)
+    args = parser.parse_args(argv)
+    benchmark(
+        args.concurrency,
+        args.requests,
+        args.latency,
+        args.failure_rate,
+        args.size[0],
+        args.size[1],
+        args.batch_size,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
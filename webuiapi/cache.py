@@ -0,0 +1,202 @@
+"""
+Response cache and request coalescing for deterministic WebUI API calls.
+
+A txt2img call with a fixed seed renders the same images every time, so its
+response can be kept on disk and identical concurrent calls can share one
+backend request. Entries hold the image files exactly as the backend encoded
+them (base64-decoded), which is both compact and free to store.
+"""
+import hashlib
+import json
+import os
+import struct
+import threading
+import time
+from typing import Callable, List, Optional
+
+_MAGIC = b"WUIC"
+_COUNT = struct.Struct(">I")
+
+
+def request_key(api_endpoint: str, arguments: dict) -> str:
+    """Canonical hash of (endpoint, arguments), independent of dict key order."""
+    canonical = json.dumps(
+        {"endpoint": api_endpoint, "arguments": arguments},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def is_deterministic(arguments: dict) -> bool:
+    return arguments.get("seed", -1) != -1
+
+
+class ResponseCache:
+    """
+    Disk-backed LRU of image payload lists, bounded by total file size.
+
+    Recency is the file mtime (touched on every hit), so the order survives restarts.
+    The directory is scanned once on first use; afterwards sizes are tracked in memory.
+    """
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._entries = None  # key -> [size, mtime]
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".bin")
+
+    def _load_index_locked(self):
+        if self._entries is not None:
+            return
+        self._entries = {}
+        self._total = 0
+        if not os.path.isdir(self.directory):
+            return
+        for filename in os.listdir(self.directory):
+            if not filename.endswith(".bin"):
+                continue
+            stat = os.stat(os.path.join(self.directory, filename))
+            self._entries[filename[: -len(".bin")]] = [stat.st_size, stat.st_mtime]
+            self._total += stat.st_size
+
+    def get(self, key: str) -> Optional[List[bytes]]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            payloads = self._unpack(data)
+        except ValueError:
+            self._remove(key)
+            return None
+        now = time.time()
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+        with self._lock:
+            self._load_index_locked()
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry[1] = now
+        return payloads
+
+    def put(self, key: str, payloads: List[bytes]):
+        data = self._pack(payloads)
+        if self.max_bytes <= 0 or len(data) > self.max_bytes:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        partial = f"{path}.{os.getpid()}.{threading.get_ident()}.partial"
+        with open(partial, "wb") as f:
+            f.write(data)
+        os.replace(partial, path)
+        with self._lock:
+            self._load_index_locked()
+            previous = self._entries.get(key)
+            if previous is not None:
+                self._total -= previous[0]
+            self._entries[key] = [len(data), os.path.getmtime(path)]
+            self._total += len(data)
+            evicted = []
+            for victim, _ in sorted(self._entries.items(), key=lambda item: item[1][1]):
+                if self._total <= self.max_bytes:
+                    break
+                if victim == key:
+                    continue
+                self._total -= self._entries.pop(victim)[0]
+                evicted.append(victim)
+        for victim in evicted:
+            try:
+                os.remove(self._path(victim))
+            except OSError:
+                pass
+
+    def _remove(self, key: str):
+        with self._lock:
+            self._load_index_locked()
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._total -= entry[0]
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            self._load_index_locked()
+            return self._total
+
+    @staticmethod
+    def _pack(payloads: List[bytes]) -> bytes:
+        parts = [_MAGIC, _COUNT.pack(len(payloads))]
+        for payload in payloads:
+            parts.append(_COUNT.pack(len(payload)))
+            parts.append(payload)
+        return b"".join(parts)
+
+    @staticmethod
+    def _unpack(data: bytes) -> List[bytes]:
+        if data[:4] != _MAGIC or len(data) < 4 + _COUNT.size:
+            raise ValueError("not a cache entry")
+        (count,) = _COUNT.unpack_from(data, 4)
+        idx = 4 + _COUNT.size
+        payloads = []
+        for _ in range(count):
+            if idx + _COUNT.size > len(data):
+                raise ValueError("truncated cache entry")
+            (length,) = _COUNT.unpack_from(data, idx)
+            idx += _COUNT.size
+            if idx + length > len(data):
+                raise ValueError("truncated cache entry")
+            payloads.append(data[idx : idx + length])
+            idx += length
+        return payloads
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def coalesce(key: str, fetch: Callable[[], List[bytes]]) -> List[bytes]:
+    """
+    Run fetch() once for concurrent callers with the same key; the others wait for it
+    and get the same result (or exception).
+    """
+    with _inflight_lock:
+        call = _inflight.get(key)
+        leader = call is None
+        if leader:
+            call = _inflight[key] = _Call()
+    if not leader:
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+    try:
+        call.result = fetch()
+        return call.result
+    except BaseException as e:
+        call.error = e
+        raise
+    finally:
+        with _inflight_lock:
+            del _inflight[key]
+        call.done.set()
@@ -1,26 +1,338 @@
 import requests
 import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from PIL import Image
 import io
 import base64
-from typing import Optional
+from typing import Optional, Union
 
+from .cache import ResponseCache, coalesce, is_deterministic, request_key
 
-def send_request(api_endpoint:str, auth:Optional[str], arguments:dict) -> list[Image.Image]:
-    session = requests.Session()
-    if auth:
-        session.auth = (auth.split(":")[0], auth.split(":")[1])
-    api_endpoint = api_endpoint.rstrip("/") + "/sdapi/v1/txt2img"
-    response = session.post(api_endpoint, json=arguments)
-    response.raise_for_status()
+
+def _env_float(name, default):
+    try:
+        return float(os.environ.get(name, "").strip() or default)
+    except ValueError:
+        return default
+
+
+class EndpointStats:
+    """Request / error / retry counters and recent latencies of one endpoint."""
+    def __init__(self, window=256):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_seconds = 0.0
+        self.last_error = None
+        self.latencies = deque(maxlen=window)
+
+    def snapshot(self) -> dict:
+        latencies = sorted(self.latencies)
+
+        def percentile(q):
+            return latencies[min(len(latencies) - 1, int(q * len(latencies)))] if latencies else None
+
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "mean_seconds": self.total_seconds / self.requests if self.requests else None,
+            "p50_seconds": percentile(0.5),
+            "p99_seconds": percentile(0.99),
+            "last_error": self.last_error,
+        }
+
+
+class APIClientPool:
+    """
+    One keep-alive requests.Session per (endpoint, auth), shared by every node call.
+
+    Requests get connect/read timeouts, and 502/503 responses or connection errors are
+    retried with full-jitter exponential backoff. A read timeout is not retried: the
+    backend may still be rendering, and resending would queue the same work twice.
+    """
+    RETRY_STATUSES = (502, 503)
+
+    def __init__(self, connect_timeout=5.0, read_timeout=600.0, retries=3, backoff=0.5, backoff_max=8.0, pool_size=8):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.pool_size = pool_size
+        self._sessions = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def session(self, api_endpoint: str, auth: Optional[str] = None) -> requests.Session:
+        key = (api_endpoint.rstrip("/"), auth or "")
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                if auth:
+                    session.auth = tuple(auth.split(":", 1))
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._sessions[key] = session
+            return session
+
+    def _endpoint_stats(self, api_endpoint: str) -> EndpointStats:
+        with self._lock:
+            return self._stats.setdefault(api_endpoint.rstrip("/"), EndpointStats())
+
+    def _sleep_before_retry(self, attempt: int):
+        time.sleep(random.uniform(0.0, min(self.backoff_max, self.backoff * (2 ** attempt))))
+
+    def post(self, api_endpoint: str, auth: Optional[str], path: str, payload: dict, retries: Optional[int] = None) -> requests.Response:
+        retries = self.retries if retries is None else retries
+        session = self.session(api_endpoint, auth)
+        url = api_endpoint.rstrip("/") + path
+        stats = self._endpoint_stats(api_endpoint)
+        start = time.monotonic()
+        attempt = 0
+        try:
+            while True:
+                try:
+                    response = session.post(url, json=payload, timeout=(self.connect_timeout, self.read_timeout))
+                except requests.ConnectionError:
+                    if attempt >= retries:
+                        raise
+                else:
+                    if response.status_code not in self.RETRY_STATUSES or attempt >= retries:
+                        response.raise_for_status()
+                        break
+                    response.close()
+                with self._lock:
+                    stats.retries += 1
+                self._sleep_before_retry(attempt)
+                attempt += 1
+        except Exception as e:
+            with self._lock:
+                stats.requests += 1
+                stats.errors += 1
+                stats.last_error = f"{type(e).__name__}: {e}"
+            raise
+        elapsed = time.monotonic() - start
+        with self._lock:
+            stats.requests += 1
+            stats.total_seconds += elapsed
+            stats.latencies.append(elapsed)
+        return response
+
+    def stats(self) -> dict:
+        """Per-endpoint counters, {endpoint: {requests, errors, retries, mean/p50/p99 seconds, last_error}}."""
+        with self._lock:
+            return {endpoint: stats.snapshot() for endpoint, stats in self._stats.items()}
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+client_pool = APIClientPool(
+    connect_timeout=_env_float("COMFYUI_LOGICUTILS_WEBUI_CONNECT_TIMEOUT", 5.0),
+    read_timeout=_env_float("COMFYUI_LOGICUTILS_WEBUI_READ_TIMEOUT", 600.0),
+    retries=int(_env_float("COMFYUI_LOGICUTILS_WEBUI_RETRIES", 3)),
+)
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker of one endpoint.
+
+    closed: requests flow. After failure_threshold failures in a row it opens and rejects
+    everything for reset_seconds, then half-opens: a single probe request is let through,
+    success closes the breaker again, failure reopens it for another reset_seconds.
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+    def __init__(self, failure_threshold=3, reset_seconds=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def state(self, now: float) -> str:
+        if self.opened_at is None:
+            return self.CLOSED
+        if now - self.opened_at >= self.reset_seconds:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allows(self, now: float) -> bool:
+        state = self.state(now)
+        return state == self.CLOSED or (state == self.HALF_OPEN and not self.probing)
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self, now: float):
+        self.failures += 1
+        self.probing = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = now
+
+
+class EndpointBalancer:
+    """
+    Health and in-flight request counts of WebUI endpoints, shared by every node instance.
+
+    acquire() picks the endpoint with the fewest outstanding requests among those whose
+    breaker lets a request through (earlier endpoints win ties), release() reports the outcome.
+    """
+    def __init__(self, failure_threshold=3, reset_seconds=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._breakers = {}
+        self._outstanding = {}
+        self._lock = threading.Lock()
+
+    def _breaker(self, endpoint: str) -> CircuitBreaker:
+        breaker = self._breakers.get(endpoint)
+        if breaker is None:
+            breaker = self._breakers[endpoint] = CircuitBreaker(self.failure_threshold, self.reset_seconds)
+        return breaker
+
+    def acquire(self, endpoints) -> Optional[str]:
+        now = time.monotonic()
+        with self._lock:
+            candidates = [endpoint for endpoint in endpoints if self._breaker(endpoint).allows(now)]
+            if not candidates:
+                return None
+            endpoint = min(candidates, key=lambda candidate: self._outstanding.get(candidate, 0))
+            breaker = self._breaker(endpoint)
+            if breaker.state(now) == CircuitBreaker.HALF_OPEN:
+                breaker.probing = True
+            self._outstanding[endpoint] = self._outstanding.get(endpoint, 0) + 1
+            return endpoint
+
+    def release(self, endpoint: str, healthy: bool):
+        with self._lock:
+            self._outstanding[endpoint] = max(0, self._outstanding.get(endpoint, 0) - 1)
+            if healthy:
+                self._breaker(endpoint).record_success()
+            else:
+                self._breaker(endpoint).record_failure(time.monotonic())
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                endpoint: {
+                    "state": breaker.state(now),
+                    "consecutive_failures": breaker.failures,
+                    "outstanding": self._outstanding.get(endpoint, 0),
+                }
+                for endpoint, breaker in self._breakers.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._breakers.clear()
+            self._outstanding.clear()
+
+
+balancer = EndpointBalancer(
+    failure_threshold=int(_env_float("COMFYUI_LOGICUTILS_WEBUI_BREAKER_FAILURES", 3)),
+    reset_seconds=_env_float("COMFYUI_LOGICUTILS_WEBUI_BREAKER_RESET_SECONDS", 30.0),
+)
+
+
+def endpoint_stats() -> dict:
+    """Client counters per endpoint, with the breaker state of endpoints the fallback node has used."""
+    stats = client_pool.stats()
+    for endpoint, health in balancer.snapshot().items():
+        stats.setdefault(endpoint, {}).update(health)
+    return stats
+
+
+def parse_endpoints(api_endpoint) -> list[str]:
+    """A list, or a comma / newline separated string, of endpoints -> normalized list."""
+    if isinstance(api_endpoint, str):
+        api_endpoint = api_endpoint.replace("\n", ",").split(",")
+    return [endpoint.strip().rstrip("/") for endpoint in api_endpoint if endpoint and endpoint.strip()]
+
+
+def _is_endpoint_failure(error: Exception) -> bool:
+    # connection problems and server errors say something about the backend,
+    # a 4xx or an odd response body is about this request
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code >= 500
+    return False
+
+
+response_cache = ResponseCache(
+    os.environ.get("COMFYUI_LOGICUTILS_WEBUI_CACHE_DIR")
+    or os.path.join(os.path.expanduser("~"), ".cache", "comfyui-logicutils", "webui"),
+    max_bytes=int(_env_float("COMFYUI_LOGICUTILS_WEBUI_CACHE_MB", 1024) * 1024 * 1024),
+)
+
+
+def _decode_image(data: bytes) -> Image.Image:
+    image = Image.open(io.BytesIO(data))
+    image.load()  # decode here, Image.open alone is lazy
+    return image
+
+
+def decode_images(payloads: list[bytes]) -> list[Image.Image]:
+    """Decode image files on a thread pool (PIL releases the GIL while decoding)."""
+    if len(payloads) <= 1:
+        return [_decode_image(data) for data in payloads]
+    with ThreadPoolExecutor(max_workers=min(len(payloads), os.cpu_count() or 1)) as pool:
+        return list(pool.map(_decode_image, payloads))
+
+
+def request_payloads(api_endpoint:str, auth:Optional[str], arguments:dict, retries:Optional[int] = None) -> list[bytes]:
+    """txt2img call returning the image files of the response, base64-decoded but not decoded as images."""
+    response = client_pool.post(api_endpoint, auth, "/sdapi/v1/txt2img", arguments, retries=retries)
     response_json = response.json()
     if "images" in response_json.keys():
-        images = [Image.open(io.BytesIO(base64.b64decode(i))) for i in response_json["images"]]
+        return [base64.b64decode(i) for i in response_json["images"]]
     elif "image" in response_json.keys():
-        images = [Image.open(io.BytesIO(base64.b64decode(response_json["image"])))]
-    else:
-        raise ValueError("No image data in response")
-    return images
+        return [base64.b64decode(response_json["image"])]
+    raise ValueError("No image data in response")
+
+
+def send_request(api_endpoint:str, auth:Optional[str], arguments:dict, retries:Optional[int] = None) -> list[Image.Image]:
+    return decode_images(request_payloads(api_endpoint, auth, arguments, retries=retries))
+
+
+def cached_payloads(cache_endpoint: str, arguments: dict, fetch, use_cache: bool = False) -> list[bytes]:
+    """
+    fetch() unless arguments are deterministic (seed != -1): then identical concurrent
+    calls share one fetch, and with use_cache the result is served from / stored in
+    response_cache. cache_endpoint identifies the backend(s) in the cache key.
+    """
+    if not is_deterministic(arguments):
+        return fetch()
+    key = request_key(cache_endpoint, arguments)
+
+    def load():
+        if use_cache:
+            payloads = response_cache.get(key)
+            if payloads is not None:
+                return payloads
+        payloads = fetch()
+        if use_cache:
+            response_cache.put(key, payloads)
+        return payloads
+
+    return coalesce(key, load)
 
 def construct_args(
     prompt:str,
@@ -33,6 +345,8 @@ def construct_args(
     hr_upscale:str = "Latent",
     enable_hr:bool = False,
     cfg_scale:int = 7,
+    batch_size:int = 1,
+    n_iter:int = 1,
 ):
     arguments = {
         "prompt": prompt,
@@ -44,6 +358,8 @@ def construct_args(
         "hr_upscale": hr_upscale,
         "enable_hr": enable_hr,
         "cfg_scale": cfg_scale,
+        "batch_size": batch_size,
+        "n_iter": n_iter,
     }
     if negative_prompt:
         arguments["negative_prompt"] = negative_prompt
@@ -64,6 +380,9 @@ def get_image_from_prompt(
     hr_upscale:str = "Latent",
     enable_hr:bool = False,
     cfg_scale:int = 7,
+    batch_size:int = 1,
+    n_iter:int = 1,
+    use_cache:bool = False,
 ):
     arguments = construct_args(
         prompt=prompt,
@@ -76,12 +395,18 @@ def get_image_from_prompt(
         hr_upscale=hr_upscale,
         enable_hr=enable_hr,
         cfg_scale=cfg_scale,
+        batch_size=batch_size,
+        n_iter=n_iter,
+    )
+    api_endpoint = api_endpoint.rstrip("/")
+    payloads = cached_payloads(
+        api_endpoint, arguments, lambda: request_payloads(api_endpoint, auth, arguments), use_cache
     )
-    return send_request(api_endpoint, auth, arguments)
+    return decode_images(payloads)
 
 def get_image_from_prompt_fallback(
     prompt:str,
-    api_endpoint:str,
+    api_endpoint:Union[str, list[str]],
     auth:Optional[str]=None,
     seed:int=-1,
     negative_prompt:Optional[str] = None,
@@ -92,6 +417,9 @@ def get_image_from_prompt_fallback(
     hr_upscale:str = "Latent",
     enable_hr:bool = False,
     cfg_scale:int = 7,
+    batch_size:int = 1,
+    n_iter:int = 1,
+    use_cache:bool = False,
 ):
     arguments = construct_args(
         prompt=prompt,
@@ -104,9 +432,39 @@ def get_image_from_prompt_fallback(
         hr_upscale=hr_upscale,
         enable_hr=enable_hr,
         cfg_scale=cfg_scale,
+        batch_size=batch_size,
+        n_iter=n_iter,
     )
+    endpoints = parse_endpoints(api_endpoint)
     try:
-        return send_request(api_endpoint, auth, arguments)
+        payloads = cached_payloads(
+            ",".join(sorted(endpoints)),
+            arguments,
+            lambda: _request_with_failover(endpoints, auth, arguments),
+            use_cache,
+        )
+        return decode_images(payloads)
     except Exception as e:
+        print(f"WebUI API fallback: {type(e).__name__}: {e}")
         # create blank image
-        return [Image.new("RGB", (width, height), (255, 255, 255))]
+        return [Image.new("RGB", (width, height), (255, 255, 255))] * (batch_size * n_iter)
+
+
+def _request_with_failover(endpoints: list[str], auth: Optional[str], arguments: dict) -> list[bytes]:
+    # with several endpoints, failing over beats retrying the same one
+    retries = 0 if len(endpoints) > 1 else None
+    remaining = list(endpoints)
+    while remaining:
+        endpoint = balancer.acquire(remaining)
+        if endpoint is None:
+            break  # every remaining endpoint is open-circuited
+        remaining.remove(endpoint)
+        try:
+            payloads = request_payloads(endpoint, auth, arguments, retries=retries)
+        except Exception as e:
+            balancer.release(endpoint, healthy=not _is_endpoint_failure(e))
+            print(f"WebUI API request to {endpoint} failed: {type(e).__name__}: {e}")
+            continue
+        balancer.release(endpoint, healthy=True)
+        return payloads
+    raise RuntimeError(f"No WebUI endpoint available out of {endpoints}")
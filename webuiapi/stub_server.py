@@ -0,0 +1,164 @@
+"""
+Local stand-in for a WebUI backend, implementing only POST /sdapi/v1/txt2img.
+
+Each response takes `latency` seconds (plus up to `jitter`), fails with a 503 at
+`failure_rate`, and returns batch_size * n_iter PNGs of the requested size (or
+of a fixed image_size). PNGs are rendered once per size and reused, so the
+stub itself stays cheap next to the client being measured.
+
+    python -m webuiapi.stub_server --port 7861 --latency 0.5 --failure-rate 0.1
+"""
+import argparse
+import base64
+import io
+import json
+import random
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+
+class StubConfig:
+    def __init__(self, latency=0.0, jitter=0.0, failure_rate=0.0, image_size: Optional[Tuple[int, int]] = None, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.image_size = image_size
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.failures = 0
+        self._images = {}
+        self._lock = threading.Lock()
+
+    def image_base64(self, width: int, height: int) -> str:
+        with self._lock:
+            encoded = self._images.get((width, height))
+        if encoded is None:
+            # noisy gradient: compresses like a real render rather than a flat fill
+            y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+            pixels = np.stack((x / max(width, 1), y / max(height, 1), (x + y) / max(width + height, 1)), axis=-1)
+            pixels = pixels * 200.0 + np.random.default_rng(width * 7919 + height).normal(0, 10, pixels.shape)
+            buffer = io.BytesIO()
+            Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).save(buffer, format="PNG", compress_level=1)
+            encoded = base64.b64encode(buffer.getvalue()).decode("ascii")
+            with self._lock:
+                self._images[(width, height)] = encoded
+        return encoded
+
+    def delay(self) -> float:
+        with self._lock:
+            return self.latency + self.random.random() * self.jitter
+
+    def should_fail(self) -> bool:
+        with self._lock:
+            self.requests += 1
+            failed = self.random.random() < self.failure_rate
+            self.failures += failed
+            return failed
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real server
+
+    def setup(self):
+        super().setup()
+        # headers and body go out as two writes; with Nagle on, delayed ACK holds the body
+        # back ~40 ms on every keep-alive request and the stub measures itself, not the client
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status: int, body: dict):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        arguments = json.loads(self.rfile.read(length) or b"{}")
+        if self.path.rstrip("/") != "/sdapi/v1/txt2img":
+            self._reply(404, {"detail": "Not Found"})
+            return
+        config = self.server.config
+        delay = config.delay()
+        if delay > 0:
+            time.sleep(delay)
+        if config.should_fail():
+            self._reply(503, {"detail": "stub failure"})
+            return
+        width, height = config.image_size or (int(arguments.get("width", 512)), int(arguments.get("height", 512)))
+        count = int(arguments.get("batch_size", 1)) * int(arguments.get("n_iter", 1))
+        image = config.image_base64(width, height)
+        self._reply(200, {"images": [image] * count, "parameters": arguments, "info": "{}"})
+
+
+class StubServer:
+    """
+    ThreadingHTTPServer on a background thread. Use as a context manager;
+    `url` is the endpoint to hand to the WebUI API functions.
+    """
+    def __init__(self, host="127.0.0.1", port=0, **config):
+        self.config = StubConfig(**config)
+        self.httpd = ThreadingHTTPServer((host, port), StubHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.config = self.config
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="webui-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline stub of the WebUI txt2img API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7861)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random seconds, up to this much")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--image-size", type=int, nargs=2, metavar=("WIDTH", "HEIGHT"), default=None)
+    args = parser.parse_args(argv)
+    server = StubServer(
+        args.host,
+        args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        failure_rate=args.failure_rate,
+        image_size=tuple(args.image_size) if args.image_size else None,
+    )
+    print(f"WebUI stub listening on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()